@@ -4,6 +4,7 @@ from sklearn.model_selection import train_test_split
 from xgboost import XGBClassifier
 import joblib
 import os
+from model_registry import publish_model
 
 def generate_training_data(n=10000):
     np.random.seed(42)
@@ -41,4 +42,8 @@ model.fit(X_train, y_train)
 
 os.makedirs("data", exist_ok=True)
 joblib.dump(model, "xgboost_fraud_model.joblib")
-print("✅ Model trained and saved as xgboost_fraud_model.joblib")
\ No newline at end of file
+print("✅ Model trained and saved as xgboost_fraud_model.joblib")
+
+# Publish a versioned copy; a running scorer swaps it in without restarting
+version = publish_model(model, metadata={"features": list(X.columns), "training_rows": len(X_train)})
+print(f"📦 Published model {version} to the model registry")
\ No newline at end of file
@@ -1,59 +1,417 @@
+import argparse
+import asyncio
+import glob
+import itertools
+import multiprocessing
 import pandas as pd
 import joblib
 import numpy as np
 from datetime import datetime
 import os
+import re
+import socket
+import sys
+import threading
 import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from stream_reader import CsvTailReader
+from stream_segments import SEGMENT_DIR, SegmentedStreamReader, manifest_path
+from scored_index import ScoredIdIndex, csv_id_chunks, partition_of
+from feature_encoder import FeatureEncoder
+from fraud_predictor import FraudPredictor
+from file_watcher import FileWatcher
+from micro_batcher import MicroBatcher
+from latency_metrics import LatencyRecorder, StageUtilization
+from model_registry import REGISTRY_DIR, ModelRegistryWatcher, latest_version, load_model_version
+from checkpoint import load_checkpoint, save_checkpoint
+from compressed_io import find_variant, read_csv_chunks, read_csv_chunks_from
+from transaction_schema import apply_schema, format_timestamp, format_timestamps, read_options
+import parquet_store
+import sqlite_store
+import arrow_feed
+import rollup_store
+from broker import SCORED_TOPIC, TRANSACTIONS_TOPIC, open_broker
 
-MODEL_FILE = "xgboost_fraud_model.joblib"
-INPUT_FILE = "data/realtime_stream.csv"
+MODEL_FILE = "xgboost_fraud_model.joblib"  # Used when the model registry has no versions yet
+MODEL_REGISTRY_DIR = REGISTRY_DIR  # Versioned models published by 02_model_trainer.py
+LEGACY_MODEL_VERSION = "legacy"  # model_version recorded for rows scored with MODEL_FILE
+INPUT_FILE = "data/realtime_stream.csv"  # Single-file stream of older simulators, read only with --legacy-stream
+INPUT_SEGMENT_DIR = SEGMENT_DIR  # Rotating segments written by data_simulator.py
 OUTPUT_FILE = "data/scored_transactions.csv"
+INDEX_DIR = "data/scored_index"
+SHARD_OUTPUT_DIR = "data/scored_shards"  # Per-shard output segments when running with --workers
+PARQUET_OUTPUT_DIR = parquet_store.PARQUET_DIR  # date=/hour= partitions written by the parquet backend
+SQLITE_OUTPUT_FILE = sqlite_store.SQLITE_FILE  # WAL-mode database written by the sqlite backend
+ARROW_OUTPUT_FILE = arrow_feed.ARROW_FEED_FILE  # Arrow IPC stream memory-mapped by the dashboard
+ROLLUP_OUTPUT_FILE = rollup_store.ROLLUP_FILE  # Minute/hour/day rollups of the scored output, read by the dashboard
+SCORER_BROKER = os.environ.get("SCORER_BROKER")  # e.g. "file:data/broker" or "redis://host:6379" (see broker.py)
+BROKER_GROUP = "scorers"  # Consumer group the broker workers share
+OUTPUT_BACKEND = os.environ.get("SCORER_OUTPUT_BACKEND", "csv")  # "csv" (OUTPUT_FILE), "parquet", "sqlite" or "arrow"
+METRICS_FILE = "data/scorer_metrics.json"  # Per-stage latency percentiles, rewritten after every batch
+CHECKPOINT_FILE = "data/scorer_checkpoint.json"  # Committed stream offset, output size and index size
+BACKFILL_INPUT = "data/historical_data.csv"  # Default --mode backfill input (or its .zst/.gz variant)
+BACKFILL_OUTPUT_DIR = "data/backfill_parquet"  # date=/hour= partitions written by --mode backfill
+BACKFILL_CHUNKSIZE = 500_000  # Rows per backfill task
 THRESHOLD = 0.75  # Increased to reduce fraud rate (less sensitive, fewer false positives)
+PREDICT_MODE = os.environ.get("SCORER_PREDICT_MODE", "native")  # "native" (Booster.inplace_predict) or "sklearn"
+PREDICT_NTHREAD = int(os.environ.get("SCORER_NTHREAD", "0")) or None  # None keeps XGBoost's default
+MAX_BATCH_SIZE = 10_000  # Rows per model call
+MAX_WAIT_MS = 100  # Longest a queued row waits for its batch to fill
+PIPELINE_STAGES = ["read", "featurize", "predict", "write"]  # --pipeline stages, in order
+PIPELINE_QUEUE_SIZE = 2  # Batches a --pipeline stage may hold ready ahead of the next one
 
 os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
 
-print("🔍 Loading model...")
-model = joblib.load(MODEL_FILE)
-print("✅ Model loaded successfully.")
+OUTPUT_COLUMNS = [
+    "transaction_id", "timestamp", "processed_time",
+    "sender_account", "receiver_account", "amount",
+    "transaction_type", "location",
+    "fraud_prediction", "fraud_probability", "model_version"
+]
 
-def score_new_transactions():
+# A model version with its encoder and predictor, swapped in together between batches
+ScoringModel = namedtuple("ScoringModel", ["version", "model", "encoder", "predictor"])
+# Cleaned rows with their feature matrix, ready for predict_rows()
+Features = namedtuple("Features", ["rows", "X", "model", "simulator_prob_backup"])
+
+# Per-process scoring state, set up by init_scorer_state()
+scoring_model = None
+model_watcher = None
+output_columns = OUTPUT_COLUMNS
+stream_reader = None
+scored_index = None
+batcher = None
+batch_id = 0
+part_prefix = "part"  # Parquet part files are named <part_prefix>-<batch_id>.parquet
+output_db = None  # sqlite3 connection when OUTPUT_BACKEND is "sqlite"
+rollup_db = None  # sqlite3 connection to ROLLUP_OUTPUT_FILE, updated with every written batch
+metrics = LatencyRecorder()
+index_lock = threading.Lock()  # Pipeline mode reads the index in one stage while another adds to it
+SHARD = 0
+NUM_SHARDS = 1
+
+
+def shard_output_file(shard, num_shards):
+    return os.path.join(SHARD_OUTPUT_DIR, f"scored_transactions-shard{shard:02d}of{num_shards:02d}.csv")
+
+
+def scored_output_files():
+    """All files holding scored transactions: the main output plus any shard segments."""
+    files = [OUTPUT_FILE] + sorted(glob.glob(os.path.join(SHARD_OUTPUT_DIR, "*.csv")))
+    return [f for f in files if os.path.exists(f)]
+
+
+def arrow_output_files():
+    files = [arrow_feed.ARROW_FEED_FILE] + sorted(glob.glob(os.path.join(SHARD_OUTPUT_DIR, "*.arrows")))
+    return [f for f in files if os.path.exists(f)]
+
+
+def open_scored_index(index_dir, output_file, shard=0, num_shards=1):
+    """Open the scored-ID index, rebuilding it from existing output when it is out of step."""
+    # Keys are only merged once their batch is checkpointed (see commit_checkpoint)
+    index = ScoredIdIndex(index_dir, auto_merge=False)
+    if os.path.exists(output_file) and len(index) > 0:
+        return index
+
+    index.clear()
+    # Both backends are indexed, so switching --backend never rescores rows
+    existing = scored_output_files()
+    parquet_files = parquet_store.part_files(PARQUET_OUTPUT_DIR)
+    arrow_files = arrow_output_files()
+    if existing or parquet_files or arrow_files or os.path.exists(SQLITE_OUTPUT_FILE):
+        print("🗂️ Building scored-ID index from existing output...")
+        id_filter = None
+        if num_shards > 1:
+            id_filter = lambda ids: ids[partition_of(ids, num_shards) == shard]
+        skipped = []
+        index.rebuild(itertools.chain(csv_id_chunks(existing, skipped=skipped),
+                                      parquet_store.id_chunks(PARQUET_OUTPUT_DIR),
+                                      sqlite_store.id_chunks(SQLITE_OUTPUT_FILE),
+                                      arrow_feed.id_chunks(arrow_files)), id_filter)
+        if skipped:
+            print("⚠️ 'transaction_id' column missing in a scored file. Its rows are not indexed.")
+    return index
+
+
+def load_scoring_model(version=None, nthread=PREDICT_NTHREAD):
+    """Load a registry version (or MODEL_FILE when version is None) ready for scoring."""
+    if version is None:
+        model = joblib.load(MODEL_FILE)
+        version = LEGACY_MODEL_VERSION
+    else:
+        model = load_model_version(version, MODEL_REGISTRY_DIR)
+    # Maps cleaned rows straight into the booster's feature order
+    encoder = FeatureEncoder.from_booster(model.get_booster())
+    predictor = FraudPredictor(model, mode=PREDICT_MODE, nthread=nthread)
+    # Warm up once so the first real batch doesn't pay for lazy initialisation
+    predictor.predict_proba(np.zeros((1, len(encoder.feature_names)), dtype=np.float32))
+    return ScoringModel(version, model, encoder, predictor)
+
+
+def swap_model_if_updated():
+    """Switch to a newly published model version once the watcher has loaded it."""
+    global scoring_model
+    loaded = model_watcher.take_ready()
+    if loaded is not None:
+        print(f"🔄 Swapped model {scoring_model.version} → {loaded.version}")
+        scoring_model = loaded
+
+
+def upgrade_output_file(path):
+    """Add any OUTPUT_COLUMNS missing from an existing output file.
+
+    Files written before a column was added are rewritten once, so newly
+    appended rows stay aligned with the header. Returns the file's columns
+    and whether it was rewritten.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return OUTPUT_COLUMNS, False
+    header = pd.read_csv(path, nrows=0).columns.tolist()
+    missing = [col for col in OUTPUT_COLUMNS if col not in header]
+    if not missing:
+        return header, False
+    print(f"🛠️ Adding {missing} to {path}...")
+    columns = header + missing
+    tmp_path = f"{path}.tmp"
+    chunks = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=500_000)
+    for i, chunk in enumerate(chunks):
+        chunk.reindex(columns=columns).to_csv(tmp_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    os.replace(tmp_path, path)
+    return columns, True
+
+
+def output_target():
+    if OUTPUT_BACKEND == "parquet":
+        return PARQUET_OUTPUT_DIR
+    if OUTPUT_BACKEND == "sqlite":
+        return SQLITE_OUTPUT_FILE
+    if OUTPUT_BACKEND == "arrow":
+        return ARROW_OUTPUT_FILE
+    return OUTPUT_FILE
+
+
+def output_size():
+    """Bytes in the append-only output file (csv and arrow backends), else 0."""
+    if OUTPUT_BACKEND not in ("csv", "arrow"):
+        return 0
+    target = output_target()
+    return os.path.getsize(target) if os.path.exists(target) else 0
+
+
+def recover_output(checkpoint):
+    """Roll the output back to the last committed batch.
+
+    Returns the checkpoint, or None if it doesn't describe the current files.
+    """
+    if checkpoint is None:
+        return None
+    if checkpoint.get("input_file") != INPUT_FILE or checkpoint.get("output_file") != output_target():
+        print("⚠️ Checkpoint is for different files. Ignoring it.")
+        return None
+    if OUTPUT_BACKEND == "parquet":
+        removed = parquet_store.remove_parts_after(PARQUET_OUTPUT_DIR, part_prefix, checkpoint["batch_id"])
+        if removed:
+            print(f"♻️ Discarding {removed} uncommitted Parquet part file(s)")
+        return checkpoint
+    if OUTPUT_BACKEND == "sqlite":
+        removed = sqlite_store.delete_after(output_db, part_prefix, checkpoint["batch_id"])
+        if removed:
+            print(f"♻️ Discarding {removed} uncommitted rows from {SQLITE_OUTPUT_FILE}")
+        return checkpoint
+    size = output_size()
+    if size < checkpoint["output_size"]:
+        print("⚠️ Output file is shorter than its checkpoint. Ignoring the checkpoint.")
+        return None
+    if size > checkpoint["output_size"]:
+        # A batch was written but the process died before committing it
+        print(f"♻️ Discarding {size - checkpoint['output_size']:,} bytes of uncommitted output")
+        os.truncate(output_target(), checkpoint["output_size"])
+    return checkpoint
+
+
+def commit_checkpoint():
+    """Atomically record the committed stream offset, output size and index size."""
+    global batch_id
+    batch_id += 1
+    save_checkpoint(CHECKPOINT_FILE, {
+        "batch_id": batch_id,
+        "input_file": INPUT_FILE,
+        "input_offset": stream_reader.offset,
+        "output_file": output_target(),
+        "output_size": output_size(),
+        "index_size": scored_index.size_on_disk,
+        "shard": SHARD,
+        "num_shards": NUM_SHARDS,
+        "updated": format_timestamp(datetime.now()),
+    })
+
+
+def init_model(nthread=PREDICT_NTHREAD):
+    """Load the latest model version and watch the registry for newer ones."""
+    global scoring_model, model_watcher
+    print("🔍 Loading model...")
+    scoring_model = load_scoring_model(latest_version(MODEL_REGISTRY_DIR), nthread)
+    print(f"✅ Model {scoring_model.version} loaded successfully.")
+    # Picks up versions published later; they are swapped in between batches
+    model_watcher = ModelRegistryWatcher(lambda version: load_scoring_model(version, nthread),
+                                         scoring_model.version, MODEL_REGISTRY_DIR)
+
+
+def init_scorer_state(shard=0, num_shards=1, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                      nthread=PREDICT_NTHREAD, backend=OUTPUT_BACKEND, legacy_stream=False):
+    """Set up the model, stream reader, batcher, output file and scored-ID index for this process.
+
+    With num_shards > 1 the process only scores the hash partition ``shard``
+    of transaction_id and writes to its own output segment. The stream is
+    read from the simulator's segments, or from the single INPUT_FILE with
+    legacy_stream=True.
+    """
+    global output_columns
+    global stream_reader, scored_index, batcher, batch_id, part_prefix, output_db, rollup_db
+    global INPUT_FILE, OUTPUT_FILE, ARROW_OUTPUT_FILE, OUTPUT_BACKEND, METRICS_FILE, CHECKPOINT_FILE, SHARD, NUM_SHARDS
+    SHARD, NUM_SHARDS = shard, num_shards
+    OUTPUT_BACKEND = backend
+    segmented = not legacy_stream
+    if segmented:
+        if os.path.exists(INPUT_FILE) and not os.path.exists(manifest_path(INPUT_SEGMENT_DIR)):
+            # Left by an older simulator; the current one only writes segments
+            print(f"ℹ️ Ignoring {INPUT_FILE} and waiting for segments in {INPUT_SEGMENT_DIR} "
+                  f"(pass --legacy-stream to score the single file)")
+        INPUT_FILE = INPUT_SEGMENT_DIR
+        os.makedirs(INPUT_SEGMENT_DIR, exist_ok=True)
+    index_dir = INDEX_DIR
+    if num_shards > 1:
+        OUTPUT_FILE = shard_output_file(shard, num_shards)
+        ARROW_OUTPUT_FILE = os.path.join(SHARD_OUTPUT_DIR, f"scored_feed-shard{shard:02d}of{num_shards:02d}.arrows")
+        METRICS_FILE = METRICS_FILE.replace(".json", f"-shard{shard:02d}of{num_shards:02d}.json")
+        CHECKPOINT_FILE = CHECKPOINT_FILE.replace(".json", f"-shard{shard:02d}of{num_shards:02d}.json")
+        index_dir = os.path.join(INDEX_DIR, f"shard{shard:02d}of{num_shards:02d}")
+        part_prefix = f"part-shard{shard:02d}of{num_shards:02d}"
+        os.makedirs(SHARD_OUTPUT_DIR, exist_ok=True)
+
+    init_model(nthread)
+
+    if OUTPUT_BACKEND == "sqlite":
+        output_db = sqlite_store.connect(SQLITE_OUTPUT_FILE)
+
+    # Resume from the last committed batch without rescanning any file
+    checkpoint = recover_output(load_checkpoint(CHECKPOINT_FILE))
+    output_columns, rewritten = OUTPUT_COLUMNS, False
+    if OUTPUT_BACKEND == "csv":
+        output_columns, rewritten = upgrade_output_file(OUTPUT_FILE)
+    scored_index = None
+    if checkpoint is not None:
+        scored_index = ScoredIdIndex(index_dir, auto_merge=False)
+        if not scored_index.truncate(checkpoint["index_size"]):
+            print("⚠️ Scored-ID index is out of step with the checkpoint. Rebuilding it.")
+            scored_index = None
+    if scored_index is None:
+        # On-disk set of already scored IDs, kept in step with the output
+        scored_index = open_scored_index(index_dir, output_target(), shard, num_shards)
+
+    # Tails the stream so each poll only parses rows appended since the last one
+    offset = checkpoint["input_offset"] if checkpoint is not None else 0
+    if segmented:
+        stream_reader = SegmentedStreamReader(INPUT_FILE, offset=offset)
+    else:
+        stream_reader = CsvTailReader(INPUT_FILE, offset=offset)
+    batch_id = checkpoint["batch_id"] if checkpoint is not None else 0
+    if checkpoint is not None:
+        print(f"📍 Resuming after batch {batch_id} at stream offset {offset:,}")
+    if checkpoint is None or rewritten:
+        commit_checkpoint()
+    rollup_db = rollup_store.connect(ROLLUP_OUTPUT_FILE)
+    sync_rollups(checkpoint is not None)
+    # Groups new rows into model calls bounded by size and queueing delay
+    batcher = MicroBatcher(max_batch_size, max_wait_ms)
+
+
+def output_frames():
+    """Yield this process's scored output as DataFrames (what the rollups are rebuilt from)."""
+    if OUTPUT_BACKEND == "parquet":
+        pattern = re.compile(rf"^{re.escape(part_prefix)}-\d+\.parquet$")
+        for path in parquet_store.part_files(PARQUET_OUTPUT_DIR):
+            if pattern.match(os.path.basename(path)):
+                yield from parquet_store.read_chunks(path)
+    elif OUTPUT_BACKEND == "sqlite":
+        yield sqlite_store.query(SQLITE_OUTPUT_FILE, writer=part_prefix)
+    elif OUTPUT_BACKEND == "arrow":
+        if os.path.exists(ARROW_OUTPUT_FILE):
+            yield arrow_feed.ArrowFeedReader(ARROW_OUTPUT_FILE).read_pandas()
+    elif os.path.exists(OUTPUT_FILE):
+        for chunk in read_csv_chunks(OUTPUT_FILE, **read_options(chunked=True)):
+            yield apply_schema(chunk)
+
+
+def sync_rollups(recovered):
+    """Bring this writer's rollups in step with the committed output.
+
+    A batch written to the rollups but never checkpointed is taken out
+    again; rollups that are missing, or that can't be matched to the output
+    (no usable checkpoint), are rebuilt from the output.
+    """
+    applied = rollup_store.applied_batch(rollup_db, part_prefix)
+    if recovered and applied is not None and applied > batch_id:
+        if rollup_store.undo_after(rollup_db, part_prefix, batch_id):
+            print("♻️ Discarding the uncommitted batch from the rollups")
+            applied = batch_id
+    if not recovered or applied is None or applied > batch_id:
+        print("🧮 Rebuilding rollups from existing output...")
+        rollup_store.rebuild(rollup_db, part_prefix, output_frames(), batch_id)
+
+
+def read_new_transactions():
+    """Read rows appended to the stream and queue the unscored ones for batching."""
     if not os.path.exists(INPUT_FILE):
         print("⚠️ Input file not found.")
-        return
+        return 0
 
-    df_stream = pd.read_csv(INPUT_FILE)
+    with metrics.time("ingest_read"):
+        # Typed on read: string IDs, float amounts and parsed timestamps
+        df_stream = stream_reader.read_new(**read_options())
+        if not df_stream.empty:
+            df_stream = apply_schema(df_stream)
     if df_stream.empty:
-        print("⏳ No transactions found.")
-        return
+        print("⏳ No new stream rows.")
+        return 0
 
-    df_stream["transaction_id"] = df_stream["transaction_id"].astype(str)
+    if NUM_SHARDS > 1:
+        df_stream = df_stream[partition_of(df_stream["transaction_id"], NUM_SHARDS) == SHARD]
     
     # Debug: Check for fraud flags in input
     if 'is_fraud' in df_stream.columns:
         fraud_count_input = df_stream['is_fraud'].sum()
-        print(f"🔍 Input file has {fraud_count_input} fraud transactions (is_fraud column)")
+        print(f"🔍 New stream rows have {fraud_count_input} fraud transactions (is_fraud column)")
     elif 'fraud_prediction' in df_stream.columns:
         fraud_count_input = df_stream['fraud_prediction'].sum()
-        print(f"🔍 Input file has {fraud_count_input} fraud transactions (fraud_prediction column)")
-
-    if os.path.exists(OUTPUT_FILE):
-        df_scored = pd.read_csv(OUTPUT_FILE)
-        if "transaction_id" in df_scored.columns:
-            df_scored["transaction_id"] = df_scored["transaction_id"].astype(str)
-            scored_ids = set(df_scored["transaction_id"])
-        else:
-            print("⚠️ 'transaction_id' column missing. Resetting scored file.")
-            df_scored = pd.DataFrame()
-            scored_ids = set()
-    else:
-        df_scored = pd.DataFrame()
-        scored_ids = set()
+        print(f"🔍 New stream rows have {fraud_count_input} fraud transactions (fraud_prediction column)")
 
-    df_new = df_stream[~df_stream["transaction_id"].isin(scored_ids)].copy()
+    with index_lock:
+        df_new = df_stream[~scored_index.contains(df_stream["transaction_id"])]
+    # Queued even when empty, so the stream offset still advances in order
+    batcher.add(df_new, offset=stream_reader.position)
     if df_new.empty:
         print("⏳ No new transactions to score.")
-        return
+    else:
+        print(f"📥 Queued {len(df_new)} new transactions ({len(batcher)} waiting)")
+    return len(df_new)
+
+def score_rows(df_new, active_model):
+    """Clean, featurize and predict rows with one model version.
+
+    Returns (df_output, processed_at), or None if no row survives cleaning.
+    """
+    features = featurize_rows(df_new, active_model)
+    return None if features is None else predict_rows(features)
 
+def featurize_rows(df_new, active_model, own_matrix=False):
+    """Clean rows and build the model's feature matrix. Returns Features, or None if no row survives cleaning.
+
+    The encoder writes every batch into one reused buffer; with own_matrix=True
+    the matrix is copied out of it, for callers that featurize the next batch
+    before this one is predicted (--pipeline).
+    """
     print(f"🆕 New transactions to score: {len(df_new)}")
     
     # Debug: Check for fraud flags in new transactions
@@ -64,9 +422,13 @@ def score_new_transactions():
         fraud_count_new = df_new['fraud_prediction'].sum()
         print(f"🔍 New transactions include {fraud_count_new} fraud transactions (fraud_prediction column)")
 
-    required_cols = ["transaction_id", "timestamp", "sender_account", "receiver_account", "amount", "transaction_type", "location"]
+    required_cols = ["transaction_id", "sender_account", "receiver_account", "amount", "transaction_type", "location"]
     # Don't drop rows based on is_fraud or fraud_probability - they're optional
     df_new = df_new.dropna(subset=required_cols)
+    # apply_schema turns unparseable timestamps into NaT; those rows are still scored, with an unknown hour and day
+    unknown_times = int(df_new['timestamp'].isna().sum())
+    if unknown_times:
+        print(f"⚠️ {unknown_times} rows have a missing or unparseable timestamp; scoring them without hour/day features")
     
     # Preserve simulator fraud flags if they exist
     simulator_fraud_backup = None
@@ -78,7 +440,6 @@ def score_new_transactions():
     if 'fraud_probability' in df_new.columns:
         simulator_prob_backup = df_new['fraud_probability'].copy()
 
-    df_new['amount'] = pd.to_numeric(df_new['amount'], errors='coerce')
     before = len(df_new)
     df_new = df_new.dropna(subset=['amount'])
     df_new = df_new[df_new['amount'] < 1e6]
@@ -87,26 +448,25 @@ def score_new_transactions():
 
     if df_new.empty:
         print("⚠️ No valid transactions to score after cleaning.")
-        return
-
-    df_new['timestamp'] = pd.to_datetime(df_new['timestamp'], errors='coerce')
-    df_new['hour'] = df_new['timestamp'].dt.hour
-    df_new['day_of_week'] = df_new['timestamp'].dt.dayofweek
-    df_new['amount_log'] = np.log1p(df_new['amount'])
+        return None
 
-    df_new["transaction_type_raw"] = df_new["transaction_type"]
-    df_new["location_raw"] = df_new["location"]
-
-    df_model = pd.get_dummies(df_new, columns=['transaction_type', 'location'], drop_first=True)
-
-    model_features = model.get_booster().feature_names
-    for col in model_features:
-        if col not in df_model.columns:
-            df_model[col] = 0
-    df_model = df_model[model_features]
+    with metrics.time("featurize"):
+        df_new['hour'] = df_new['timestamp'].dt.hour
+        df_new['day_of_week'] = df_new['timestamp'].dt.dayofweek
+        df_new['amount_log'] = np.log1p(df_new['amount'])
+        X = active_model.encoder.transform(df_new)
+        if own_matrix:
+            X = X.copy()
+    for col, unknown in active_model.encoder.unknown_counts.items():
+        print(f"🔤 {col} values without a model column (encoded as baseline): {unknown}")
+    return Features(df_new, X, active_model, simulator_prob_backup)
 
+def predict_rows(features):
+    """Predict featurized rows and build the output rows. Returns (df_output, processed_at)."""
+    df_new, X, active_model, simulator_prob_backup = features
     # 🔍 Predict fraud probability and label using ML model
-    fraud_probs = model.predict_proba(df_model)[:, 1]
+    with metrics.time("predict"):
+        fraud_probs = active_model.predictor.predict_proba(X)
     
     # Check if simulator already marked transactions as fraud
     simulator_fraud_col = None
@@ -152,27 +512,459 @@ def score_new_transactions():
         df_new["fraud_probability"] = fraud_probs
         df_new["fraud_prediction"] = (fraud_probs >= THRESHOLD).astype(int)
 
-    df_new["processed_time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    processed_at = datetime.now()
+    df_new["processed_time"] = format_timestamp(processed_at)
+    df_new["model_version"] = active_model.version
 
-    df_output = df_new[[
-        "transaction_id", "timestamp", "processed_time",
-        "sender_account", "receiver_account", "amount",
-        "transaction_type_raw", "location_raw",
-        "fraud_prediction", "fraud_probability"
-    ]].rename(columns={
-        "transaction_type_raw": "transaction_type",
-        "location_raw": "location"
-    })
+    df_output = df_new[OUTPUT_COLUMNS].copy()
 
     df_output["fraud_prediction"] = df_output["fraud_prediction"].astype(int)
     df_output["fraud_probability"] = df_output["fraud_probability"].round(4)
     df_output = df_output.sort_values(by="timestamp")
+    return df_output, processed_at
+
+def score_batch(df_new):
+    """Clean, featurize, predict and write one batch of new transactions"""
+    # The whole batch is scored by one model version, even if a swap is pending
+    scored = score_rows(df_new, scoring_model)
+    if scored is not None:
+        write_output(*scored)
 
-    df_output.to_csv(OUTPUT_FILE, mode='a', header=not os.path.exists(OUTPUT_FILE), index=False)
-    print(f"✅ Scored {len(df_output)} new transactions → {OUTPUT_FILE}")
+def write_output(df_output, processed_at):
+    """Write scored rows to the output backend and record their IDs (committed later by commit_batch)"""
+    with metrics.time("write"):
+        if OUTPUT_BACKEND == "parquet":
+            # Named after the batch_id this batch is committed under (see recover_output)
+            parquet_store.write_partitioned(df_output, PARQUET_OUTPUT_DIR, f"{part_prefix}-{batch_id + 1:010d}")
+        elif OUTPUT_BACKEND == "sqlite":
+            sqlite_store.insert_batch(output_db, df_output, part_prefix, batch_id + 1)
+        elif OUTPUT_BACKEND == "arrow":
+            arrow_feed.append_batch(ARROW_OUTPUT_FILE, df_output)
+        else:
+            append_output(df_output)
+        # Same batch_id as the output, so recovery can take the batch out if it is never committed
+        rollup_store.apply_batch(rollup_db, df_output, part_prefix, batch_id + 1)
+        with index_lock:
+            scored_index.add(df_output["transaction_id"], sync=True)
+    # Event time → scored time, per transaction
+    metrics.record("end_to_end", (processed_at - df_output["timestamp"]).dt.total_seconds().to_numpy() * 1000)
+    print(f"✅ Scored {len(df_output)} new transactions → {output_target()}")
     print(f"🚨 Detected {df_output['fraud_prediction'].sum()} frauds ({df_output['fraud_prediction'].mean() * 100:.2f}%)")
 
-if __name__ == "__main__":
+def append_output(df_output):
+    """Append a batch to OUTPUT_FILE and fsync it (committed later by commit_checkpoint)"""
+    write_header = not os.path.exists(OUTPUT_FILE) or os.path.getsize(OUTPUT_FILE) == 0
+    df_output = df_output.assign(timestamp=format_timestamps(df_output["timestamp"]))
+    data = df_output.reindex(columns=output_columns).to_csv(index=False, header=write_header)
+    with open(OUTPUT_FILE, "ab") as f:
+        f.write(data.encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+
+def score_new_transactions(flush=False):
+    """Read new stream rows and score every batch the micro-batcher releases.
+
+    flush=True scores whatever is queued without waiting for the batch limits.
+    """
+    read_new_transactions()
     while True:
-        score_new_transactions()
-        time.sleep(5)
\ No newline at end of file
+        batch = batcher.next_batch(force=flush)
+        if batch is None:
+            break
+        if len(batch.rows):
+            print(f"📦 Batch of {len(batch.rows)} rows released on {batch.trigger} limit "
+                  f"after {batch.queue_delay_ms:.1f} ms in queue")
+            metrics.record("queue_delay", batch.queue_delay_ms)
+            swap_model_if_updated()
+            score_batch(batch.rows.copy())
+            metrics.export(METRICS_FILE)
+        commit_batch(batch.offset)
+
+def commit_batch(offset):
+    """Commit a written batch: advance the stream offset, save the checkpoint, then merge the index."""
+    if offset is not None:
+        stream_reader.commit(offset)
+    with metrics.time("commit"):
+        commit_checkpoint()
+        # Only committed keys may reach the sorted run, so merge after the checkpoint
+        with index_lock:
+            merged = scored_index.maybe_merge()
+        if merged:
+            commit_checkpoint()
+
+async def run_pipeline(mode="watch", interval=5.0, once=False, queue_size=PIPELINE_QUEUE_SIZE):
+    """Score with read → featurize → predict → write as overlapping asyncio stages.
+
+    Each stage runs its blocking work on its own one-thread executor and
+    hands batches to the next through a bounded queue, so batch N+1 is read
+    and featurized while batch N is predicted and batch N-1 is written.
+    Batches stay in stream order, and only the write stage commits, so the
+    checkpoint protocol is the same as in sequential mode. Stage
+    utilization (busy time / wall time) is exported with the stage latencies.
+    """
+    loop = asyncio.get_running_loop()
+    executors = {stage: ThreadPoolExecutor(1, thread_name_prefix=stage) for stage in PIPELINE_STAGES}
+    to_featurize, to_predict, to_write = (asyncio.Queue(queue_size) for _ in range(3))
+    utilization = StageUtilization(PIPELINE_STAGES)
+
+    async def run(stage, fn, *args):
+        with utilization.busy(stage):
+            return await loop.run_in_executor(executors[stage], fn, *args)
+
+    async def reader():
+        watcher = FileWatcher(INPUT_FILE) if mode == "watch" and not once else None
+        if watcher is not None:
+            print(f"👀 Watching {INPUT_FILE} for new transactions ({watcher.mode})")
+        while True:
+            await run("read", read_new_transactions)
+            while (batch := batcher.next_batch(force=once)) is not None:
+                await to_featurize.put(batch)
+            if once:
+                await to_featurize.put(None)
+                return
+            pending = batcher.time_until_flush()
+            if watcher is not None:
+                await loop.run_in_executor(None, watcher.wait, pending)
+            else:
+                # Wake early if a queued batch hits its wait limit before the next poll
+                await asyncio.sleep(interval if pending is None else min(interval, pending))
+
+    async def featurizer():
+        while (batch := await to_featurize.get()) is not None:
+            features = None
+            if len(batch.rows):
+                print(f"📦 Batch of {len(batch.rows)} rows released on {batch.trigger} limit "
+                      f"after {batch.queue_delay_ms:.1f} ms in queue")
+                metrics.record("queue_delay", batch.queue_delay_ms)
+                swap_model_if_updated()
+                # The whole batch is scored by one model version, even if a swap is pending
+                # The predict stage may still hold the previous batch's matrix, so each batch gets its own
+                features = await run("featurize", featurize_rows, batch.rows.copy(), scoring_model, True)
+            await to_predict.put((batch, features))
+        await to_predict.put(None)
+
+    async def predictor():
+        while (item := await to_predict.get()) is not None:
+            batch, features = item
+            scored = await run("predict", predict_rows, features) if features is not None else None
+            await to_write.put((batch, scored))
+        await to_write.put(None)
+
+    def write_and_commit(batch, scored):
+        if scored is not None:
+            write_output(*scored)
+        commit_batch(batch.offset)
+        metrics.export(METRICS_FILE, utilization=utilization.snapshot())
+
+    async def writer():
+        while (item := await to_write.get()) is not None:
+            await run("write", write_and_commit, *item)
+
+    try:
+        await asyncio.gather(reader(), featurizer(), predictor(), writer())
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+        print("⚙️ Stage utilization: " + " | ".join(
+            f"{stage} {stats['utilization'] * 100:.0f}%" for stage, stats in utilization.snapshot().items()))
+
+
+def run_scorer(mode="watch", interval=5.0, once=False, pipeline=False):
+    """Score new transactions until interrupted (or once, with once=True)."""
+    if pipeline:
+        asyncio.run(run_pipeline(mode, interval, once))
+        return
+    if once:
+        score_new_transactions(flush=True)
+        return
+    if mode == "poll":
+        while True:
+            score_new_transactions()
+            # Wake early if a queued batch hits its wait limit before the next poll
+            pending = batcher.time_until_flush()
+            time.sleep(interval if pending is None else min(interval, pending))
+    else:
+        watcher = FileWatcher(INPUT_FILE)
+        print(f"👀 Watching {INPUT_FILE} for new transactions ({watcher.mode})")
+        while True:
+            score_new_transactions()
+            watcher.wait(timeout=batcher.time_until_flush())
+
+
+def run_broker_worker(broker_url, group, name, backend="broker", interval=1.0, once=False):
+    """Score transactions from a broker consumer group until interrupted (or drained, with once=True).
+
+    The worker keeps no local state: the broker tracks what the group has
+    consumed, and a dead worker's uncommitted rows are redelivered to the
+    others. Scored rows are sent to SCORED_TOPIC (backend "broker") or
+    written as Parquet parts named after the consumer (backend "parquet",
+    for storage shared by every node). A delivery is committed only after
+    its rows are written, so a row may be scored twice but never lost;
+    readers drop repeated transaction_ids. Workers do not update the
+    rollups (ROLLUP_OUTPUT_FILE); the dashboard sees their rows are missing
+    from them and charts the raw rows instead.
+    """
+    global METRICS_FILE
+    METRICS_FILE = METRICS_FILE.replace(".json", f"-{name}.json")
+    init_model()
+    broker = open_broker(broker_url)
+    consumer = broker.consumer(TRANSACTIONS_TOPIC, group, name)
+    print(f"🤝 {name} consuming {TRANSACTIONS_TOPIC} in group {group} from {broker_url}")
+    # Millisecond start time keeps part names unique if a consumer name is reused after a restart
+    run_id = int(time.time() * 1000)
+    parts = 0
+    try:
+        while True:
+            with metrics.time("ingest_read"):
+                delivery = consumer.poll(**read_options())
+            if delivery is None:
+                if once:
+                    break
+                time.sleep(interval)
+                continue
+            # Entries trimmed from a Redis stream come back as a delivery without rows
+            scored = None
+            if not delivery.rows.empty:
+                swap_model_if_updated()
+                scored = score_rows(apply_schema(delivery.rows), scoring_model)
+            if scored is not None:
+                df_output = scored[0]
+                with metrics.time("write"):
+                    if backend == "parquet":
+                        parts += 1
+                        parquet_store.write_partitioned(df_output, PARQUET_OUTPUT_DIR, f"{name}-{run_id}-{parts:06d}")
+                    else:
+                        broker.send(SCORED_TOPIC, df_output.assign(timestamp=format_timestamps(df_output["timestamp"])))
+                print(f"✅ Scored {len(df_output)} transactions → {PARQUET_OUTPUT_DIR if backend == 'parquet' else SCORED_TOPIC}")
+            with metrics.time("commit"):
+                consumer.commit(delivery)
+            metrics.export(METRICS_FILE)
+    finally:
+        consumer.close()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where the resource module is missing)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def backfill_inputs(patterns):
+    """Expand files, globs and Parquet output directories into a sorted list of input files."""
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(pattern) or [find_variant(pattern)]:
+            if path is None:
+                continue
+            if os.path.isdir(path):
+                paths.update(parquet_store.part_files(path))
+            else:
+                paths.add(path)
+    return sorted(paths)
+
+
+def read_backfill_chunks(path, chunksize, position=None):
+    """Yield (fixed-size DataFrame, position after it) from a CSV (plain or compressed) or Parquet file.
+
+    A position is a byte offset into the uncompressed CSV or a Parquet
+    [row group, row]; passing one back resumes right after that chunk
+    without parsing the rows before it.
+    """
+    if path.endswith(".parquet"):
+        yield from parquet_store.read_chunks_from(path, chunksize, position)
+    else:
+        # Every chunk is parsed on its own, so the (faster) non-chunked engine can be used
+        yield from read_csv_chunks_from(path, chunksize, position or 0, **read_options())
+
+
+def init_backfill_worker(version, nthread):
+    global scoring_model
+    scoring_model = load_scoring_model(version, nthread)
+
+
+def backfill_chunk(df, input_number, chunk, output_dir):
+    """Score one chunk in a pool worker and write it as ``backfill-<input>-<chunk>`` parts.
+
+    Part names are stable, so a chunk that is scored again after an
+    interruption overwrites its earlier parts instead of duplicating them.
+    """
+    df = apply_schema(df)
+    # Rescoring earlier scorer output: its old predictions are not simulator flags
+    if "model_version" in df.columns:
+        df = df.drop(columns=["fraud_prediction", "fraud_probability", "model_version"], errors="ignore")
+    scored = score_rows(df, scoring_model)
+    written = frauds = 0
+    if scored is not None:
+        df_output = scored[0]
+        parquet_store.write_partitioned(df_output, output_dir, f"backfill-{input_number:03d}-{chunk:06d}")
+        written = len(df_output)
+        frauds = int(df_output["fraud_prediction"].sum())
+    return input_number, chunk, len(df), written, frauds, peak_rss_mb()
+
+
+def load_backfill_progress(path, inputs, chunksize, version, output_dir):
+    """The saved progress if it belongs to this exact run, else a fresh one.
+
+    A run with other inputs, chunk size or model version starts over, after
+    removing the parts the previous run wrote.
+    """
+    run = {"inputs": inputs, "chunksize": chunksize, "model_version": version}
+    progress = load_checkpoint(path)
+    if progress is not None and all(progress.get(key) == value for key, value in run.items()):
+        return progress
+    if progress is not None:
+        print(f"🔄 {path} is from a different backfill run, starting over")
+        for input_number in range(len(progress.get("inputs", []))):
+            parquet_store.remove_parts_after(output_dir, f"backfill-{input_number:03d}", -1)
+    return {**run, "done": {}, "positions": {}, "rows": 0, "scored": 0, "frauds": 0}
+
+
+def run_backfill(patterns, output_dir=BACKFILL_OUTPUT_DIR, chunksize=BACKFILL_CHUNKSIZE, workers=1):
+    """Score whole files in fixed-size chunks on a process pool, resumably.
+
+    The main process reads chunks and hands them to the workers, keeping at
+    most two per worker in flight. Each finished chunk is recorded in
+    <output_dir>/_backfill_progress.json with the input position after it,
+    so an interrupted run seeks past the finished chunks at the start of
+    each input and only skips the few that finished out of order after them.
+    """
+    inputs = backfill_inputs(patterns)
+    if not inputs:
+        print("⚠️ No input files to backfill.")
+        return
+    os.makedirs(output_dir, exist_ok=True)
+    version = latest_version(MODEL_REGISTRY_DIR)
+    progress_file = os.path.join(output_dir, "_backfill_progress.json")
+    progress = load_backfill_progress(progress_file, inputs, chunksize, version or LEGACY_MODEL_VERSION, output_dir)
+    skipped = sum(len(chunks) for chunks in progress["done"].values())
+    if skipped:
+        print(f"⏩ Resuming: {skipped} chunks ({progress['rows']:,} rows) already backfilled")
+
+    # XGBoost threads only compete with each other when several workers share the cores
+    nthread = PREDICT_NTHREAD or (1 if workers > 1 else None)
+    start = time.perf_counter()
+    rows = 0
+    peak_worker_rss = 0.0
+    positions = {}  # (input, chunk) → input position after the chunk, for chunks in flight
+
+    def record(result):
+        nonlocal rows, peak_worker_rss
+        input_number, chunk, chunk_rows, written, frauds, worker_rss = result
+        progress["done"].setdefault(str(input_number), []).append(chunk)
+        progress.setdefault("positions", {}).setdefault(str(input_number), {})[str(chunk)] = \
+            positions.pop((input_number, chunk))
+        progress["rows"] += chunk_rows
+        progress["scored"] += written
+        progress["frauds"] += frauds
+        save_checkpoint(progress_file, progress)
+        rows += chunk_rows
+        peak_worker_rss = max(peak_worker_rss, worker_rss or 0.0)
+        elapsed = time.perf_counter() - start
+        print(f"📈 {inputs[input_number]} chunk {chunk}: {written:,} rows scored | "
+              f"{rows / elapsed:,.0f} rows/s | peak RSS worker {peak_worker_rss:,.0f} MB")
+
+    # spawn rather than fork, so workers don't inherit XGBoost's OpenMP state
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=ctx, initializer=init_backfill_worker,
+                             initargs=(version, nthread)) as pool:
+        pending = set()
+        for input_number, path in enumerate(inputs):
+            done = set(progress["done"].get(str(input_number), []))
+            # Seek past the unbroken run of finished chunks from the start of the input
+            first = 0
+            while first in done:
+                first += 1
+            position = progress.get("positions", {}).get(str(input_number), {}).get(str(first - 1))
+            if position is None:
+                first = 0  # Progress saved before positions were recorded: read from the start
+            for chunk, (df, end) in enumerate(read_backfill_chunks(path, chunksize, position), start=first):
+                if chunk in done:
+                    continue
+                positions[input_number, chunk] = end
+                if len(pending) >= 2 * workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record(future.result())
+                pending.add(pool.submit(backfill_chunk, df, input_number, chunk, output_dir))
+        for future in wait(pending).done:
+            record(future.result())
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Backfilled {rows:,} rows in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s) "
+          f"→ {output_dir}")
+    print(f"🚨 {progress['scored']:,} rows scored in total, {progress['frauds']:,} frauds "
+          f"({progress['frauds'] / max(progress['scored'], 1) * 100:.2f}%)")
+    print(f"🧠 Peak RSS: main {peak_rss_mb() or 0:,.0f} MB, worker {peak_worker_rss:,.0f} MB")
+
+
+def run_shard_worker(shard, num_shards, args):
+    # One XGBoost thread per worker unless told otherwise, so workers don't oversubscribe cores
+    init_scorer_state(shard, num_shards, args.max_batch_size, args.max_wait_ms,
+                      nthread=PREDICT_NTHREAD or 1, backend=args.backend, legacy_stream=args.legacy_stream)
+    print(f"🧩 Worker {shard + 1}/{num_shards} scoring its partition → {output_target()}")
+    run_scorer(args.mode, args.interval, args.once, args.pipeline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score streamed transactions with the fraud model.")
+    parser.add_argument("--mode", choices=["watch", "poll", "backfill"], default="watch",
+                        help="watch: score as soon as the stream file changes; poll: score on a fixed interval; "
+                             "backfill: rescore whole files (--input) into partitioned Parquet")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls in poll mode")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes, each scoring a hash partition of transaction_id")
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE,
+                        help="Release a batch once this many rows are queued")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="Release a batch once its oldest row has waited this long")
+    parser.add_argument("--backend", choices=["csv", "parquet", "sqlite", "arrow", "broker"], default=None,
+                        help="csv: append to one CSV file; parquet: hourly-partitioned Parquet files; "
+                             "sqlite: WAL-mode SQLite database; arrow: Arrow IPC stream file; "
+                             "broker: send to the broker's scored topic (--broker only). "
+                             f"Default: broker with --broker, else {OUTPUT_BACKEND}")
+    parser.add_argument("--once", action="store_true", help="Score the rows available now and exit")
+    parser.add_argument("--legacy-stream", action="store_true",
+                        help=f"Read the single-file stream {INPUT_FILE} instead of the segments in {INPUT_SEGMENT_DIR}")
+    parser.add_argument("--broker", default=SCORER_BROKER,
+                        help="Consume from a broker instead of the local stream: file:<directory> or redis://host:port")
+    parser.add_argument("--group", default=BROKER_GROUP, help="Broker consumer group shared by the workers")
+    parser.add_argument("--consumer", default=f"{socket.gethostname()}-{os.getpid()}",
+                        help="This worker's name within the consumer group")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap reading, featurizing, predicting and writing as asyncio stages")
+    parser.add_argument("--input", nargs="+", default=[BACKFILL_INPUT],
+                        help="Backfill: CSV (plain, .zst or .gz) or Parquet files, globs or Parquet directories")
+    parser.add_argument("--output", default=BACKFILL_OUTPUT_DIR, help="Backfill: output partition root")
+    parser.add_argument("--chunksize", type=int, default=BACKFILL_CHUNKSIZE, help="Backfill: rows per task")
+    args = parser.parse_args()
+    if args.backend is None:
+        args.backend = "broker" if args.broker else OUTPUT_BACKEND
+    if args.broker and args.backend not in ("broker", "parquet"):
+        parser.error("broker workers on several nodes need --backend broker or parquet")
+    if args.backend == "broker" and not args.broker:
+        parser.error("--backend broker needs --broker")
+
+    if args.broker:
+        run_broker_worker(args.broker, args.group, args.consumer, args.backend, args.interval, args.once)
+    elif args.mode == "backfill":
+        run_backfill(args.input, args.output, args.chunksize, args.workers)
+    elif args.workers > 1:
+        # spawn rather than fork, so workers don't inherit XGBoost's OpenMP state
+        ctx = multiprocessing.get_context("spawn")
+        workers = [
+            ctx.Process(target=run_shard_worker, args=(shard, args.workers, args))
+            for shard in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    else:
+        init_scorer_state(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms, backend=args.backend,
+                          legacy_stream=args.legacy_stream)
+        run_scorer(args.mode, args.interval, args.once, args.pipeline)
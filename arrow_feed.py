@@ -0,0 +1,152 @@
+import os
+import threading
+import zlib
+
+import pandas as pd
+import pyarrow as pa
+
+from parquet_store import SCHEMA, to_table
+from stream_reader import ChunkedFrame
+
+ARROW_FEED_FILE = "data/scored_feed.arrows"
+
+
+def append_batch(path, df):
+    """Append scored rows to an Arrow IPC stream file and fsync it.
+
+    The file is a schema message followed by one record batch message per
+    call, with no end-of-stream marker, so it can keep growing across runs.
+    Returns the new file size.
+    """
+    table = to_table(df)
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "ab") as f:
+        if new_file:
+            f.write(SCHEMA.serialize())
+        for batch in table.to_batches():
+            f.write(batch.serialize())
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+
+def read_messages(buffer, offset, schema=None):
+    """Decode the complete messages in ``buffer`` from ``offset``.
+
+    Returns (schema, record batches, offset after the last complete message,
+    offset where that message starts). A message still being appended is
+    left for the next call.
+    """
+    reader = pa.BufferReader(buffer)
+    reader.seek(offset)
+    batches = []
+    last_start = offset
+    while reader.tell() < buffer.size:
+        start = reader.tell()
+        try:
+            message = pa.ipc.read_message(reader)
+        except (OSError, pa.ArrowInvalid):
+            break
+        if message is None:
+            break
+        if schema is None:
+            schema = pa.ipc.read_schema(message)
+        else:
+            batches.append(pa.ipc.read_record_batch(message, schema))
+        offset, last_start = reader.tell(), start
+    return schema, batches, offset, last_start
+
+
+def id_chunks(paths):
+    """Yield the transaction_id column of each record batch in the feed files."""
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        schema, batches, _, _ = read_messages(pa.memory_map(path).read_buffer(), 0)
+        for batch in batches:
+            yield batch.column("transaction_id").to_pandas()
+
+
+class ArrowFeedReader:
+    """Follow an Arrow IPC stream file written by append_batch.
+
+    The file is memory-mapped and record batches are decoded in place, so
+    their columns point straight into the page cache: every process mapping
+    the file shares the same pages. Each call only decodes and converts the
+    batches appended since the previous one. One reader can be shared by
+    several threads (e.g. Streamlit sessions).
+
+    The last message read is checked again before reading on: if the file
+    was truncated and appended to again (scorer recovery), the offset may
+    no longer be a message boundary, so the feed is read from the start.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.generation = 0  # Bumped on every reset, so callers can tell a reread from growth
+        self.reset()
+
+    def reset(self):
+        self.generation += 1
+        self.offset = 0
+        self.schema = None
+        self.batches = []
+        self._rows = ChunkedFrame()  # The first _converted batches as pandas
+        self._converted = 0
+        self._last_message = None  # (start, CRC) of the last message read
+
+    def _read_new(self):
+        """Map the file and decode batches appended since the last read. Returns them."""
+        if not os.path.exists(self.path):
+            self.reset()
+            return []
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            # Truncated (e.g. rolled back by scorer recovery) or replaced
+            self.reset()
+        if size == self.offset:
+            return []
+        buffer = pa.memory_map(self.path).read_buffer(size)
+        if self._last_message is not None:
+            start, crc = self._last_message
+            if zlib.crc32(memoryview(buffer)[start:self.offset]) != crc:
+                # Rewritten past our offset (rolled back by scorer recovery, then appended to again)
+                self.reset()
+        self.schema, batches, offset, last_start = read_messages(buffer, self.offset, self.schema)
+        if offset != self.offset:
+            self._last_message = last_start, zlib.crc32(memoryview(buffer)[last_start:offset])
+            self.offset = offset
+        self.batches.extend(batches)
+        return batches
+
+    def table(self):
+        """Every batch read so far as a zero-copy Arrow table."""
+        with self._lock:
+            self._read_new()
+            return pa.Table.from_batches(self.batches, self.schema or SCHEMA)
+
+    def _update(self):
+        self._read_new()
+        pending = self.batches[self._converted:]
+        if pending:
+            self._rows.append(pa.Table.from_batches(pending, self.schema or SCHEMA).to_pandas())
+            self._converted = len(self.batches)
+
+    def _empty(self):
+        return pa.Table.from_batches([], self.schema or SCHEMA).to_pandas()
+
+    def read_pandas(self):
+        """DataFrame of the whole feed; only new batches are converted to pandas."""
+        with self._lock:
+            self._update()
+            # Shallow copy: callers may add or replace columns without touching the shared frame
+            return (self._rows.frame() if len(self._rows) else self._empty()).copy(deep=False)
+
+    def read_since(self, generation, rows):
+        """(generation, row count, new rows): the rows after the first ``rows`` if ``generation`` is current, else all."""
+        with self._lock:
+            self._update()
+            since = rows if generation == self.generation else 0
+            frame = self._rows.since(since) if len(self._rows) else self._empty()
+            return self.generation, len(self._rows), frame.copy(deep=False)
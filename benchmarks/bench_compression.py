@@ -0,0 +1,84 @@
+"""Bytes on disk, read throughput and load time of plain vs gzip vs zstd CSV.
+
+Writes a synthetic transaction CSV into a scratch directory (in 1M-row
+chunks), compresses it with each codec, then measures:
+  - size on disk and compression ratio
+  - raw read throughput in uncompressed MB/s (streamed 1 MB at a time)
+  - end-to-end load: chunked read_csv plus timestamp parsing, as
+    load_historical_data() does
+
+Usage: python benchmarks/bench_compression.py [--rows 10000000] [--chunksize 500000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synthetic import make_transactions
+import compressed_io
+
+WRITE_CHUNK = 1_000_000
+
+
+def write_sample(path, rows):
+    written = 0
+    while written < rows:
+        n = min(WRITE_CHUNK, rows - written)
+        make_transactions(n, seed=written).to_csv(path, mode="a", header=written == 0, index=False)
+        written += n
+
+
+def read_throughput(path):
+    start = time.perf_counter()
+    total = 0
+    with compressed_io.open_read(path) as f:
+        while True:
+            chunk = f.read(compressed_io.COPY_CHUNK)
+            if not chunk:
+                break
+            total += len(chunk)
+    return total / 1e6 / (time.perf_counter() - start)
+
+
+def load_time(path, chunksize):
+    start = time.perf_counter()
+    rows = 0
+    for chunk in compressed_io.read_csv_chunks(path, chunksize=chunksize):
+        chunk["timestamp"] = pd.to_datetime(chunk["timestamp"], format="%Y-%m-%d %H:%M:%S")
+        rows += len(chunk)
+    return time.perf_counter() - start, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        plain = os.path.join(workdir, "sample.csv")
+        print(f"📝 Writing {args.rows:,} rows...")
+        write_sample(plain, args.rows)
+        plain_size = os.path.getsize(plain)
+
+        files = {"plain": (plain, 0.0)}
+        for codec in ("gzip", "zstd"):
+            start = time.perf_counter()
+            files[codec] = (compressed_io.compress_file(plain, codec), time.perf_counter() - start)
+
+        print(f"{'codec':>6} {'MB':>9} {'ratio':>6} {'compress s':>11} {'read MB/s':>10} {'load s':>8}")
+        for codec, (path, compress_seconds) in files.items():
+            size = os.path.getsize(path)
+            throughput = read_throughput(path)
+            seconds, rows = load_time(path, args.chunksize)
+            assert rows == args.rows
+            print(f"{codec:>6} {size / 1e6:>9,.1f} {plain_size / size:>5.1f}x {compress_seconds:>11.1f} "
+                  f"{throughput:>10,.0f} {seconds:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
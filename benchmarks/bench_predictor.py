@@ -0,0 +1,67 @@
+"""Per-batch prediction latency: sklearn wrapper vs native inplace_predict.
+
+Usage: python benchmarks/bench_predictor.py [--nthread N] [--repeat R]
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feature_encoder import FeatureEncoder
+from fraud_predictor import FraudPredictor
+from synthetic import make_transactions
+
+MODEL_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "xgboost_fraud_model.joblib")
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nthread", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    model = joblib.load(MODEL_FILE)
+    encoder = FeatureEncoder.from_booster(model.get_booster())
+    sklearn_predictor = FraudPredictor(model, mode="sklearn", nthread=args.nthread)
+    native_predictor = FraudPredictor(model, mode="native", nthread=args.nthread)
+    feature_names = model.get_booster().feature_names
+
+    df = make_transactions(max(BATCH_SIZES))
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["hour"] = df["timestamp"].dt.hour
+    df["day_of_week"] = df["timestamp"].dt.dayofweek
+    df["amount_log"] = np.log1p(df["amount"])
+
+    print(f"{'batch':>8} {'sklearn+DataFrame ms':>21} {'sklearn+ndarray ms':>19} {'native ms':>10} {'speedup':>8}")
+    for size in BATCH_SIZES:
+        X = encoder.transform(df.head(size)).copy()
+        frame = pd.DataFrame(X, columns=feature_names)
+        # Warm up once so lazy initialisation is not timed
+        sklearn_predictor.predict_proba(frame)
+        native_predictor.predict_proba(X)
+        repeat = max(3, args.repeat if size <= 10_000 else args.repeat // 4)
+        frame_ms = median_ms(lambda: sklearn_predictor.predict_proba(frame), repeat)
+        array_ms = median_ms(lambda: sklearn_predictor.predict_proba(X), repeat)
+        native_ms = median_ms(lambda: native_predictor.predict_proba(X), repeat)
+        print(f"{size:>8} {frame_ms:>21.3f} {array_ms:>19.3f} {native_ms:>10.3f} {frame_ms / native_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
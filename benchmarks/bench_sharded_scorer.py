@@ -0,0 +1,63 @@
+"""Scorer throughput (tx/s) against the number of worker processes.
+
+Writes a synthetic stream into a scratch directory and times
+`03_processor_scorer.py --once --workers N` over it for each N.
+
+Usage: python benchmarks/bench_sharded_scorer.py [--rows 200000] [--workers 1 2 4 8]
+"""
+import argparse
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synthetic import make_transactions
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCORER = os.path.join(REPO_DIR, "03_processor_scorer.py")
+
+
+def run_scorer(workdir, workers):
+    # Fresh output for every run, the stream is shared
+    for path in ("data/scored_transactions.csv", "data/scored_shards", "data/scored_index"):
+        full = os.path.join(workdir, path)
+        if os.path.isdir(full):
+            shutil.rmtree(full)
+        elif os.path.exists(full):
+            os.remove(full)
+    for path in glob.glob(os.path.join(workdir, "data", "scorer_checkpoint*.json")):
+        os.remove(path)
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, PYTHONWARNINGS="ignore")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, SCORER, "--once", "--legacy-stream", "--workers", str(workers)],
+                   cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        os.symlink(os.path.join(REPO_DIR, "xgboost_fraud_model.joblib"), os.path.join(workdir, "xgboost_fraud_model.joblib"))
+        make_transactions(args.rows).to_csv(os.path.join(workdir, "data", "realtime_stream.csv"), index=False)
+
+        # Process start-up and model load are included, as they are for a real run
+        baseline = None
+        print(f"{'workers':>8} {'seconds':>9} {'tx/s':>10} {'scaling':>8}")
+        for workers in sorted(set(args.workers)):
+            elapsed = run_scorer(workdir, workers)
+            rate = args.rows / elapsed
+            baseline = baseline or rate
+            print(f"{workers:>8} {elapsed:>9.2f} {rate:>10,.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
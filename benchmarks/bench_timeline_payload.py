@@ -0,0 +1,77 @@
+"""Plotly payload of the 7-day timeline with and without downsampling.
+
+Builds a per-minute series over 7 days (Poisson transaction counts with a
+daily cycle, 1% fraud, and a few injected fraud spikes), draws it the way
+the dashboard's timeline does, then for the full series, min/max and LTTB:
+  - JSON bytes sent to the browser and the time to downsample + serialize
+  - points per trace
+  - how many injected spikes keep their exact height
+
+Usage: python benchmarks/bench_timeline_payload.py [--days 7] [--width 1200] [--spikes 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import downsample
+
+
+def make_timeline(days, spikes, seed=0):
+    rng = np.random.default_rng(seed)
+    time_index = pd.date_range(end=pd.Timestamp.now().floor("min"), periods=days * 24 * 60, freq="min")
+    rate = 60 + 40 * np.sin(np.arange(len(time_index)) / (24 * 60) * 2 * np.pi)
+    count = rng.poisson(rate)
+    frauds = rng.binomial(count, 0.01)
+    spike_at = rng.choice(len(time_index), spikes, replace=False)
+    frauds[spike_at] += rng.integers(20, 40, spikes)
+    count[spike_at] += frauds[spike_at]
+    return pd.DataFrame({"time": time_index, "count": count, "frauds": frauds}), spike_at
+
+
+def figure(count_points, fraud_points):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=count_points["time"], y=count_points["count"], mode="lines+markers"))
+    fig.add_trace(go.Scatter(x=fraud_points["time"], y=fraud_points["frauds"], mode="lines+markers"))
+    return fig
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--spikes", type=int, default=20)
+    args = parser.parse_args()
+
+    timeline, spike_at = make_timeline(args.days, args.spikes)
+    spikes = timeline.iloc[spike_at]
+    print(f"📝 {len(timeline):,} one-minute buckets, {args.spikes} fraud spikes, {args.width} px wide")
+
+    print(f"{'method':>8} {'points':>13} {'payload KB':>11} {'seconds':>8} {'spikes kept':>12} {'vs full':>8}")
+    full_bytes = None
+    for method in ["full", "minmax", "lttb"]:
+        start = time.perf_counter()
+        if method == "full":
+            count_points, fraud_points = timeline, timeline
+        else:
+            count_points = downsample.downsample(timeline, "time", "count", args.width, method)
+            fraud_points = downsample.downsample(timeline, "time", "frauds", args.width, method)
+        payload = figure(count_points, fraud_points).to_json()
+        seconds = time.perf_counter() - start
+
+        kept = spikes.merge(fraud_points, on=["time", "frauds"]).shape[0]
+        if method == "minmax":
+            assert fraud_points["frauds"].max() == timeline["frauds"].max()
+            assert count_points["count"].max() == timeline["count"].max()
+        full_bytes = full_bytes or len(payload)
+        print(f"{method:>8} {len(count_points):>6,}+{len(fraud_points):<6,} {len(payload) / 1024:>11,.0f} "
+              f"{seconds:>8.3f} {kept:>6}/{args.spikes:<5} {full_bytes / len(payload):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
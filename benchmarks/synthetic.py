@@ -0,0 +1,30 @@
+"""Vectorized generator of simulator-shaped transactions for benchmarks."""
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Same categories as data_simulator.py
+TRANSACTION_TYPES = ["PURCHASE", "WITHDRAWAL", "DEPOSIT", "TRANSFER", "UPI", "IMPS", "NEFT", "RTGS"]
+LOCATIONS = ["Mumbai", "Delhi", "Bangalore", "Hyderabad", "Chennai", "Kolkata", "Pune", "Ahmedabad", "Andra Pradesh", "Tamil Nadu", "Kerala"]
+
+
+def make_transactions(n, seed=42, start=None):
+    """Return ``n`` transactions with the columns written by data_simulator.py."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start or datetime.now().replace(microsecond=0)) - pd.Timedelta(seconds=n)
+    timestamps = (start + pd.to_timedelta(np.arange(n), unit="s")).strftime("%Y-%m-%d %H:%M:%S")
+    is_fraud = (rng.random(n) < 0.01).astype(int)
+    return pd.DataFrame({
+        "transaction_id": [str(uuid.UUID(int=int(x), version=4)) for x in rng.integers(0, 2**63, n)],
+        "timestamp": timestamps,
+        "processed_time": timestamps,
+        "sender_account": [f"AC{x}" for x in rng.integers(100000, 999999, n)],
+        "receiver_account": [f"AC{x}" for x in rng.integers(100000, 999999, n)],
+        "amount": np.round(rng.exponential(8000, n) + 500, 2),
+        "transaction_type": rng.choice(TRANSACTION_TYPES, n),
+        "location": rng.choice(LOCATIONS, n),
+        "is_fraud": is_fraud,
+        "fraud_probability": np.round(np.where(is_fraud == 1, rng.uniform(0.7, 0.99, n), rng.uniform(0.01, 0.3, n)), 4),
+    })
@@ -0,0 +1,325 @@
+import glob
+import io
+import json
+import os
+import socket
+import time
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from datetime import datetime
+from urllib.parse import urlparse
+
+import pandas as pd
+
+from checkpoint import atomic_write_bytes, load_checkpoint
+from scored_index import partition_of
+from stream_reader import CsvTailReader
+
+try:
+    import fcntl
+except ImportError:  # Windows: FileBroker then assumes a single producer per topic
+    fcntl = None
+
+TRANSACTIONS_TOPIC = "transactions"  # Raw transactions, sent by data_simulator.py
+SCORED_TOPIC = "scored"  # Scored rows, sent by scorer workers with --backend broker
+BROKER_DIR = "data/broker"  # Root of the default file broker
+DEFAULT_PARTITIONS = 8  # File broker partitions per topic; the most workers a group can use at once
+# Seconds without a heartbeat (or ack) before a consumer's work goes to the others
+SESSION_TIMEOUT = float(os.environ.get("BROKER_SESSION_TIMEOUT", "15"))
+
+JOIN_DELAY = 1.0  # Seconds a new file broker consumer waits to see who else is joining before taking partitions
+
+# rows: DataFrame delivered to a consumer; token: what commit() needs to acknowledge it
+Delivery = namedtuple("Delivery", ["rows", "token"])
+
+
+class Broker(ABC):
+    """Carries DataFrames from producers to consumer groups.
+
+    Every consumer group sees every row sent to a topic. Within a group the
+    rows are shared out between the named consumers, each row going to one
+    of them. A consumer ``commit()``s a delivery once it has been handled.
+    Delivered rows that were never committed go to another consumer after
+    the first one stops heartbeating, so delivery is at least once and
+    consumers should tolerate repeats (scored rows are deduplicated by
+    transaction_id downstream).
+    """
+
+    @abstractmethod
+    def send(self, topic, df):
+        """Send the rows of ``df`` to ``topic``."""
+
+    @abstractmethod
+    def consumer(self, topic, group, name):
+        """Join ``group`` on ``topic`` as consumer ``name``; returns an object with poll(), commit() and close()."""
+
+
+class FileBroker(Broker):
+    """Broker on a (shared) POSIX file system.
+
+    A topic is ``partitions`` append-only CSV files, rows being assigned by
+    the hash of transaction_id. A group's live consumers each own the
+    partitions ``p`` with ``members[p % len(members)]`` equal to their name,
+    where members are the consumers whose heartbeat file is fresher than
+    ``session_timeout``. A consumer that joins, leaves or dies therefore
+    changes the assignment for everyone at their next poll, and the
+    partitions it owned resume from their committed offsets.
+    """
+
+    def __init__(self, root=BROKER_DIR, partitions=DEFAULT_PARTITIONS, session_timeout=SESSION_TIMEOUT):
+        self.root = root
+        self.partitions = partitions
+        self.session_timeout = session_timeout
+
+    def partition_path(self, topic, partition):
+        return os.path.join(self.root, topic, f"partition-{partition:03d}.csv")
+
+    def send(self, topic, df):
+        """Append rows to their partitions (each write under an exclusive lock, then fsynced)."""
+        if df.empty:
+            return
+        os.makedirs(os.path.join(self.root, topic), exist_ok=True)
+        partitions = partition_of(df["transaction_id"], self.partitions)
+        for partition in sorted(set(partitions.tolist())):
+            rows = df[partitions == partition]
+            with open(self.partition_path(topic, partition), "ab") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                # Header only on the first write, decided under the lock
+                header = f.seek(0, os.SEEK_END) == 0
+                f.write(rows.to_csv(index=False, header=header).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def consumer(self, topic, group, name):
+        return FileConsumer(self, topic, group, name)
+
+
+class FileConsumer:
+    def __init__(self, broker, topic, group, name):
+        self.broker = broker
+        self.topic = topic
+        self.name = name
+        self.group_dir = os.path.join(broker.root, "groups", group, topic)
+        os.makedirs(os.path.join(self.group_dir, "members"), exist_ok=True)
+        os.makedirs(os.path.join(self.group_dir, "offsets"), exist_ok=True)
+        self.readers = {}  # partition → CsvTailReader, for the partitions this consumer owns
+        self.joined = False
+
+    def _member_path(self, name):
+        return os.path.join(self.group_dir, "members", f"{name}.json")
+
+    def _offset_path(self, partition):
+        return os.path.join(self.group_dir, "offsets", f"partition-{partition:03d}.json")
+
+    def heartbeat(self):
+        state = {"name": self.name, "host": socket.gethostname(), "pid": os.getpid(), "heartbeat": time.time()}
+        atomic_write_bytes(self._member_path(self.name), json.dumps(state).encode("utf-8"))
+
+    def members(self):
+        """Names of the consumers in the group with a fresh heartbeat, sorted."""
+        now = time.time()
+        alive = []
+        for path in glob.glob(os.path.join(self.group_dir, "members", "*.json")):
+            state = load_checkpoint(path)
+            if state is not None and now - state["heartbeat"] <= self.broker.session_timeout:
+                alive.append(state["name"])
+        return sorted(alive)
+
+    def assignment(self):
+        members = self.members()
+        if self.name not in members:
+            return []
+        return [p for p in range(self.broker.partitions) if members[p % len(members)] == self.name]
+
+    def committed(self, partition):
+        state = load_checkpoint(self._offset_path(partition))
+        return state["offset"] if state is not None else 0
+
+    def rebalance(self):
+        """Follow the current assignment: drop lost partitions, start owned ones at their commit."""
+        assigned = self.assignment()
+        lost = [p for p in self.readers if p not in assigned]
+        new = [p for p in assigned if p not in self.readers]
+        for partition in lost:
+            del self.readers[partition]
+        for partition in new:
+            offset = self.committed(partition)
+            self.readers[partition] = CsvTailReader(self.broker.partition_path(self.topic, partition), offset)
+        if lost or new:
+            print(f"🔀 {self.name} now owns partitions {assigned} of {self.topic}")
+
+    def poll(self, **read_csv_kwargs):
+        """Heartbeat, rebalance and return a Delivery of every new row in the owned partitions (or None)."""
+        self.heartbeat()
+        if not self.joined:
+            time.sleep(JOIN_DELAY)
+            self.joined = True
+        self.rebalance()
+        frames, token = [], {}
+        for partition, reader in self.readers.items():
+            df = reader.read_new(**read_csv_kwargs)
+            if len(df):
+                frames.append(df)
+                token[partition] = reader.position
+        if not frames:
+            return None
+        return Delivery(pd.concat(frames, ignore_index=True), token)
+
+    def commit(self, delivery):
+        """Save the offsets of a handled delivery, except for partitions another consumer now owns."""
+        assigned = self.assignment()
+        for partition, offset in delivery.token.items():
+            if partition not in assigned:
+                # The new owner re-reads from the last commit, so these rows are delivered again
+                print(f"⚠️ {self.name} lost partition {partition} before committing; it will be redelivered")
+                continue
+            state = {"offset": max(offset, self.committed(partition)), "consumer": self.name,
+                     "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]}
+            atomic_write_bytes(self._offset_path(partition), json.dumps(state).encode("utf-8"))
+
+    def close(self):
+        """Leave the group now instead of after session_timeout."""
+        try:
+            os.remove(self._member_path(self.name))
+        except FileNotFoundError:
+            pass
+
+
+class RespError(Exception):
+    """An error reply from a Redis-protocol server."""
+
+
+class RespConnection:
+    """Minimal RESP2 client: just enough of the protocol for the stream commands RedisBroker uses."""
+
+    def __init__(self, host="localhost", port=6379, timeout=30.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.file = self.sock.makefile("rb")
+
+    def command(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(parts))
+        return self._reply()
+
+    def _reply(self):
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("connection closed by server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RespError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self.file.read(length + 2)[:-2]
+            return data
+        if kind == b"*":
+            length = int(body)
+            return None if length < 0 else [self._reply() for _ in range(length)]
+        raise RespError(f"unexpected reply {line!r}")
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+class RedisBroker(Broker):
+    """Broker on Redis streams (or anything speaking their part of the protocol).
+
+    Each send() is one stream entry holding the rows as CSV. Consumer groups
+    are Redis consumer groups: XREADGROUP shares entries out, XACK commits
+    them, and entries a consumer has held unacknowledged for longer than
+    ``session_timeout`` are taken over by the next consumer to poll
+    (XAUTOCLAIM), which is how the work of a dead worker is rebalanced.
+    """
+
+    def __init__(self, host="localhost", port=6379, session_timeout=SESSION_TIMEOUT, max_entries=1000):
+        self.host = host
+        self.port = port
+        self.session_timeout = session_timeout
+        self.max_entries = max_entries  # Most stream entries per delivery
+        self._conn = None
+
+    def connect(self):
+        return RespConnection(self.host, self.port)
+
+    def send(self, topic, df):
+        if df.empty:
+            return
+        if self._conn is None:
+            self._conn = self.connect()
+        self._conn.command("XADD", topic, "*", "rows", len(df), "csv", df.to_csv(index=False))
+
+    def consumer(self, topic, group, name):
+        return RedisConsumer(self, topic, group, name)
+
+
+class RedisConsumer:
+    def __init__(self, broker, topic, group, name):
+        self.broker = broker
+        self.topic = topic
+        self.group = group
+        self.name = name
+        self.conn = broker.connect()
+        try:
+            self.conn.command("XGROUP", "CREATE", topic, group, "0", "MKSTREAM")
+        except RespError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _entries_to_frame(self, entries, read_csv_kwargs):
+        frames, ids = [], []
+        for entry_id, fields in entries or []:
+            if fields is None:
+                # Claimed entry that was trimmed from the stream; just acknowledge it
+                ids.append(entry_id)
+                continue
+            values = dict(zip(fields[::2], fields[1::2]))
+            frames.append(pd.read_csv(io.BytesIO(values[b"csv"]), **read_csv_kwargs))
+            ids.append(entry_id)
+        return frames, ids
+
+    def poll(self, **read_csv_kwargs):
+        """Claim entries abandoned by dead consumers, then read new ones. Returns a Delivery or None."""
+        count = self.broker.max_entries
+        idle_ms = int(self.broker.session_timeout * 1000)
+        claimed = self.conn.command("XAUTOCLAIM", self.topic, self.group, self.name, idle_ms, "0-0", "COUNT", count)
+        frames, ids = self._entries_to_frame(claimed[1], read_csv_kwargs)
+        if claimed[1]:
+            print(f"🔀 {self.name} took over {len(claimed[1])} unacknowledged entries of {self.topic}")
+        reply = self.conn.command("XREADGROUP", "GROUP", self.group, self.name, "COUNT", count,
+                                  "STREAMS", self.topic, ">")
+        for _, entries in reply or []:
+            more_frames, more_ids = self._entries_to_frame(entries, read_csv_kwargs)
+            frames += more_frames
+            ids += more_ids
+        if not ids:
+            return None
+        rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        return Delivery(rows, ids)
+
+    def commit(self, delivery):
+        if delivery.token:
+            self.conn.command("XACK", self.topic, self.group, *delivery.token)
+
+    def close(self):
+        self.conn.close()
+
+
+def open_broker(url):
+    """A broker from a URL: ``file:<directory>`` or ``redis://host[:port]``."""
+    parsed = urlparse(url)
+    if parsed.scheme == "redis":
+        return RedisBroker(parsed.hostname or "localhost", parsed.port or 6379)
+    if parsed.scheme == "file":
+        return FileBroker(url[len("file:"):] or BROKER_DIR)
+    raise ValueError(f"unsupported broker URL {url!r} (expected file:<directory> or redis://host:port)")
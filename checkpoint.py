@@ -0,0 +1,41 @@
+import json
+import os
+
+
+def fsync_directory(path):
+    """Make a rename inside ``path`` durable (a no-op where directories can't be opened)."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path or ".", os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path, data):
+    """Replace ``path`` with ``data`` so readers see either the old or the new file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(os.path.dirname(path))
+
+
+def load_checkpoint(path):
+    """Return the saved checkpoint dict, or None if there is none."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        # Can only happen if the file was edited by hand; the rename keeps it whole otherwise
+        print(f"⚠️ Ignoring unreadable checkpoint {path}")
+        return None
+
+
+def save_checkpoint(path, state):
+    atomic_write_bytes(path, json.dumps(state, indent=2).encode("utf-8"))
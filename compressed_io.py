@@ -0,0 +1,122 @@
+import gzip
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# zstd decompresses several times faster than gzip at a better ratio; gzip
+# is the fallback for pyarrow builds without it
+DEFAULT_CODEC = "zstd" if pa.Codec.is_available("zstd") else "gzip"
+EXTENSIONS = {"zstd": ".zst", "gzip": ".gz"}
+COPY_CHUNK = 1 << 20
+READ_BLOCK = 16 << 20  # Uncompressed bytes read at a time when splitting a CSV into chunks
+
+
+def codec_of(path):
+    """The codec implied by the file extension, or None for plain files."""
+    for codec, extension in EXTENSIONS.items():
+        if path.endswith(extension):
+            return codec
+    return None
+
+
+def find_variant(path):
+    """``path`` if it exists, else its first existing compressed variant (or None)."""
+    for candidate in [path] + [path + extension for extension in EXTENSIONS.values()]:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def open_read(path):
+    """Open a plain or compressed file for streaming reads of its uncompressed bytes."""
+    codec = codec_of(path)
+    if codec == "zstd":
+        return pa.CompressedInputStream(pa.OSFile(path), "zstd")
+    if codec == "gzip":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def compress_file(path, codec=DEFAULT_CODEC):
+    """Write a compressed copy of ``path`` next to it and return the new path.
+
+    The copy is streamed in 1 MB chunks, fsynced and renamed into place, so
+    it is either complete or absent. The original is left for the caller
+    to remove.
+    """
+    target = path + EXTENSIONS[codec]
+    tmp_path = target + ".tmp"
+    with open(path, "rb") as src, open(tmp_path, "wb") as raw:
+        if codec == "gzip":
+            out = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+        else:
+            out = pa.CompressedOutputStream(raw, codec)
+        while True:
+            chunk = src.read(COPY_CHUNK)
+            if not chunk:
+                break
+            out.write(chunk)
+        # Flushes the compressed tail into raw (pyarrow's stream closes raw as well)
+        out.close()
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, target)
+    return target
+
+
+def read_csv_chunks(path, chunksize=500_000, **read_csv_kwargs):
+    """Yield DataFrames of up to ``chunksize`` rows, decompressing as the parser reads."""
+    with open_read(path) as f:
+        yield from pd.read_csv(f, chunksize=chunksize, **read_csv_kwargs)
+
+
+def _skip(f, position, offset):
+    """Move ``f`` from uncompressed byte ``position`` to ``offset``, reading and dropping bytes if it can't seek."""
+    if f.seekable():
+        f.seek(offset)
+        return
+    while position < offset:
+        data = f.read(min(COPY_CHUNK, offset - position))
+        if not data:
+            break
+        position += len(data)
+
+
+def read_csv_chunks_from(path, chunksize=500_000, offset=0, **read_csv_kwargs):
+    """Yield (DataFrame of up to ``chunksize`` rows, uncompressed byte offset after it).
+
+    Rows are split at newlines (so fields must not contain line breaks) and
+    each chunk is parsed on its own, which lets a reader resume at a saved
+    offset without parsing anything before it; a compressed file is only
+    decompressed up to there. ``offset`` 0 starts after the header.
+    """
+    with open_read(path) as f:
+        header = b""
+        while not header.endswith(b"\n"):
+            byte = f.read(1)
+            if not byte:
+                return
+            header += byte
+        position = len(header)
+        if offset > position:
+            _skip(f, position, offset)
+            position = offset
+        buffer = b""
+        while True:
+            block = f.read(READ_BLOCK)
+            buffer += block
+            newlines = np.flatnonzero(np.frombuffer(buffer, dtype=np.uint8) == ord("\n"))
+            start = 0
+            for i in range(chunksize - 1, len(newlines), chunksize):
+                end = int(newlines[i]) + 1
+                yield pd.read_csv(io.BytesIO(header + buffer[start:end]), **read_csv_kwargs), position + end
+                start = end
+            if not block:
+                if buffer[start:].strip():
+                    yield pd.read_csv(io.BytesIO(header + buffer[start:]), **read_csv_kwargs), position + len(buffer)
+                return
+            position += start
+            buffer = buffer[start:]
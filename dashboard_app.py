@@ -5,8 +5,28 @@ import plotly.graph_objects as go
 from streamlit_autorefresh import st_autorefresh
 import time
 import os
+import bisect
+import glob
+import json
 import warnings
-from datetime import datetime
+from datetime import datetime, timedelta
+import parquet_store
+import sqlite_store
+import arrow_feed
+import broker
+import rollup_store
+import downsample
+import compressed_io
+import transaction_schema
+from transaction_schema import apply_schema
+from stream_reader import CachedCsvReader
+from shared_store import SharedDataStore
+from one_hot import decode_one_hot
+
+# Sessions share the loaded frames; copy-on-write keeps a session's edits out of them
+# (always on from pandas 3, where the option is deprecated)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # Suppress pandas date parsing warnings
 warnings.filterwarnings('ignore', category=UserWarning, message='.*Could not infer format.*')
@@ -803,7 +823,18 @@ heading_css = """
 st.markdown(heading_css, unsafe_allow_html=True)
 
 REALTIME_FILE = "data/scored_transactions.csv"
-HISTORICAL_FILE = "data/historical_data.csv"
+REALTIME_SHARD_DIR = "data/scored_shards"  # Per-shard segments written by the scorer's --workers mode
+REALTIME_PARQUET_DIR = parquet_store.PARQUET_DIR  # Hourly partitions written by the scorer's parquet backend
+REALTIME_DB_FILE = sqlite_store.SQLITE_FILE  # WAL-mode database written by the scorer's sqlite backend
+REALTIME_ARROW_FILE = arrow_feed.ARROW_FEED_FILE  # Arrow IPC stream written by the scorer's arrow backend
+REALTIME_BROKER_DIR = os.path.join(broker.BROKER_DIR, broker.SCORED_TOPIC)  # Scored topic of the file broker
+ROLLUP_FILE = rollup_store.ROLLUP_FILE  # Minute/hour/day rollups maintained by the scorer, read by the charts
+HISTORICAL_FILE = "data/historical_data.csv"  # May also be stored compressed as .csv.zst or .csv.gz
+SCORER_METRICS_GLOB = "data/scorer_metrics*.json"  # Per-stage latency percentiles exported by the scorer
+STREAM_QUEUE_METRICS_FILE = "data/stream_queue_metrics.json"  # Simulator → scorer backlog exported by data_simulator.py
+TIMELINE_ZOOMS = {"Past 7 days": timedelta(days=7), "Past day": timedelta(days=1), "Past 6 hours": timedelta(hours=6),
+                  "Past hour": timedelta(hours=1), "Past 15 minutes": timedelta(minutes=15)}
+TIMELINE_FREQS = ["1s", "10s", "1min"]  # Timeline bucket sizes, finest first; rollups start at 1min
 
 # ---------------------------
 # INITIALIZE SESSION STATE
@@ -835,138 +866,295 @@ realtime_mode = st.sidebar.checkbox("🔴 Real-Time Mode (Fast Updates)", value=
 if realtime_mode:
     st.sidebar.info(f"🔄 Updating every {refresh_rate} seconds")
 
+# Only partitions overlapping the window are read from the Parquet store
+TIME_WINDOWS = {"All time": None, "Last hour": timedelta(hours=1), "Last 24 hours": timedelta(days=1), "Last 7 days": timedelta(days=7)}
+time_window = st.sidebar.selectbox("Real-time window", list(TIME_WINDOWS), index=0)
+
 # Review table size
 review_limit = st.sidebar.slider("Review table size", 10, 200, 50, step=10,
     help="How many suspicious transactions to show for manual review")
 
-# ---------------------------
-# HELPER FUNCTIONS
-# ---------------------------
-def extract_transaction_type(row):
-    """Extract transaction type from one-hot encoded columns or direct column"""
-    if 'transaction_type' in row.index and pd.notna(row.get('transaction_type')):
-        return str(row['transaction_type'])
-    
-    # Try to extract from one-hot encoded columns
-    tx_type_cols = [col for col in row.index if col.startswith('transaction_type_')]
-    for col in tx_type_cols:
-        if row.get(col) == True or row.get(col) == 1:
-            return col.replace('transaction_type_', '')
-    return 'UNKNOWN'
-
-def extract_location(row):
-    """Extract location from one-hot encoded columns or direct column"""
-    if 'location' in row.index and pd.notna(row.get('location')):
-        return str(row['location'])
-    
-    # Try to extract from one-hot encoded columns
-    loc_cols = [col for col in row.index if col.startswith('location_')]
-    for col in loc_cols:
-        if row.get(col) == True or row.get(col) == 1:
-            return col.replace('location_', '')
-    return 'UNKNOWN'
-
 # ---------------------------
 # LOAD DATA FUNCTION
 # ---------------------------
-def load_realtime_data():
-    """Load and process real-time transaction data"""
-    if not os.path.exists(REALTIME_FILE):
+def realtime_files():
+    """Scored transaction files: the main output plus any per-shard segments"""
+    files = [REALTIME_FILE] + sorted(glob.glob(os.path.join(REALTIME_SHARD_DIR, "*.csv")))
+    files += sorted(glob.glob(os.path.join(REALTIME_BROKER_DIR, "*.csv")))
+    return [f for f in files if os.path.exists(f)]
+
+def arrow_feed_files():
+    files = [REALTIME_ARROW_FILE] + sorted(glob.glob(os.path.join(REALTIME_SHARD_DIR, "*.arrows")))
+    return [f for f in files if os.path.exists(f)]
+
+def shared_reader(store, path, factory):
+    """One reader per file, kept in the shared store between loads"""
+    readers = store.state.setdefault("readers", {})
+    if path not in readers:
+        readers[path] = factory(path)
+    return readers[path]
+
+def arrow_feed_reader(store, path):
+    """Memory-mapped reader of a feed file"""
+    return shared_reader(store, path, arrow_feed.ArrowFeedReader)
+
+def realtime_csv_reader(store, path):
+    """Incremental reader of a scored CSV file"""
+    return shared_reader(store, path, lambda p: CachedCsvReader(p, transform=apply_schema, **transaction_schema.read_options()))
+
+def file_snapshot(path):
+    """(size, mtime) of a file, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def prepare_realtime_rows(df_rt):
+    """Column types and derived columns for real-time rows from any source"""
+    if df_rt.empty or 'transaction_id' not in df_rt.columns:
         return pd.DataFrame()
+
+    # Shared column types; a no-op for columns already typed by their source
+    df_rt = apply_schema(df_rt)
     
-    try:
-        # Read CSV
-        df_rt = pd.read_csv(REALTIME_FILE, low_memory=False)
-        if df_rt.empty:
-            return pd.DataFrame()
-        
-        # Convert transaction_id to string
-        if 'transaction_id' in df_rt.columns:
-            df_rt['transaction_id'] = df_rt['transaction_id'].astype(str)
-        else:
-            return pd.DataFrame()
-        
-        # Handle numeric columns
-        if 'amount' in df_rt.columns:
-            df_rt['amount'] = pd.to_numeric(df_rt['amount'], errors='coerce')
-        if 'fraud_probability' in df_rt.columns:
-            df_rt['fraud_probability'] = pd.to_numeric(df_rt['fraud_probability'], errors='coerce')
-        
-        # Handle fraud_prediction - check if it exists, otherwise use is_fraud
-        if 'fraud_prediction' in df_rt.columns:
-            df_rt['fraud_prediction'] = pd.to_numeric(df_rt['fraud_prediction'], errors='coerce').fillna(0).astype(int)
-        elif 'is_fraud' in df_rt.columns:
-            df_rt['fraud_prediction'] = pd.to_numeric(df_rt['is_fraud'], errors='coerce').fillna(0).astype(int)
-        else:
-            df_rt['fraud_prediction'] = 0
-        
-        # Handle timestamps - specify format to avoid warnings
+    # Handle fraud_prediction - check if it exists, otherwise use is_fraud
+    if 'fraud_prediction' in df_rt.columns:
+        df_rt['fraud_prediction'] = df_rt['fraud_prediction'].astype(int)
+    elif 'is_fraud' in df_rt.columns:
+        df_rt['fraud_prediction'] = df_rt['is_fraud'].astype(int)
+    else:
+        df_rt['fraud_prediction'] = 0
+    
+    if 'processed_time' not in df_rt.columns:
         if 'timestamp' in df_rt.columns:
-            df_rt['timestamp'] = pd.to_datetime(df_rt['timestamp'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
-        if 'processed_time' in df_rt.columns:
-            df_rt['processed_time'] = pd.to_datetime(df_rt['processed_time'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+            df_rt['processed_time'] = df_rt['timestamp']
         else:
-            if 'timestamp' in df_rt.columns:
-                df_rt['processed_time'] = df_rt['timestamp']
-            else:
-                df_rt['processed_time'] = pd.Timestamp.now()
-        
-        # Extract transaction_type and location if not present
-        if 'transaction_type' not in df_rt.columns:
-            df_rt['transaction_type'] = df_rt.apply(extract_transaction_type, axis=1)
-        if 'location' not in df_rt.columns:
-            df_rt['location'] = df_rt.apply(extract_location, axis=1)
-        
-        # Remove duplicates
-        df_rt.drop_duplicates(subset="transaction_id", inplace=True)
-        df_rt["source"] = "Real-Time"
-        
-        # Sort by processed_time, handling NaT values
-        if 'processed_time' in df_rt.columns:
-            df_rt = df_rt.sort_values(by="processed_time", ascending=False, na_position='last')
-        
+            df_rt['processed_time'] = pd.Timestamp.now()
+    
+    # Decode transaction_type and location from one-hot exports if not present
+    if 'transaction_type' not in df_rt.columns:
+        df_rt['transaction_type'] = decode_one_hot(df_rt, 'transaction_type_')
+    if 'location' not in df_rt.columns:
+        df_rt['location'] = decode_one_hot(df_rt, 'location_')
+    df_rt["source"] = "Real-Time"
+    return df_rt
+
+def merge_realtime_rows(df_rt, df_new, ids):
+    """Add prepared rows to the merged frame, skipping IDs in ``ids`` (updated), newest processed_time first"""
+    if df_new.empty:
+        return df_rt if df_rt is not None else df_new
+    # Remove duplicates
+    df_new = df_new.drop_duplicates(subset="transaction_id")
+    if ids:
+        # A set lookup per new row; Series.isin would convert every cached ID on each merge
+        df_new = df_new[[i not in ids for i in df_new["transaction_id"]]]
+    ids.update(df_new["transaction_id"])
+    df_new = df_new.sort_values(by="processed_time", ascending=False, na_position='last')
+    if df_rt is None or df_rt.empty:
+        return df_new.reset_index(drop=True)
+    if df_new.empty:
         return df_rt
-    except Exception as e:
-        # Don't show error in function - let caller handle it
-        return pd.DataFrame()
+    # df_rt is newest first with missing times last, so new rows without a time go at the end and the
+    # cached rows the others sort in with are a prefix of it, found by binary search. New rows are
+    # normally scored after every cached one, so the prefix is empty and they are prepended as they are.
+    untimed = df_new["processed_time"].isna()
+    timed, untimed = df_new[~untimed], df_new[untimed]
+    overlap = 0
+    if not timed.empty:
+        times, oldest_new = df_rt["processed_time"].to_numpy(), timed["processed_time"].iloc[-1].to_datetime64()
+        overlap = bisect.bisect_left(range(len(times)), True, key=lambda i: pd.isna(times[i]) or times[i] < oldest_new)
+    head = timed
+    if overlap:
+        head = pd.concat([timed, df_rt.iloc[:overlap]]).sort_values(by="processed_time", ascending=False, kind="stable")
+    parts = [part for part in (head, df_rt.iloc[overlap:], untimed) if not part.empty]
+    return pd.concat(parts, ignore_index=True)
 
-def load_historical_data():
-    """Load historical data"""
-    if not os.path.exists(HISTORICAL_FILE):
-        return pd.DataFrame()
+def load_realtime_data(store):
+    """Load and process real-time transaction data for the shared store
+
+    Covers the widest window any session has asked for, by the time rows were
+    scored (processed_time, the axis of the rollups). The merged frame is
+    kept in the store between loads: CSV files, Arrow feeds and the SQLite
+    database only grow, so their appended rows are read and merged into it,
+    and Parquet partitions are queried again only when their files change
+    (or the window reaches further back). With no new data this costs a few
+    stat calls and two indexed lookups in SQLite, and returns the same frame,
+    so the snapshot version holds.
+    """
+    window = store.state.get("window")
+    start = pd.Timestamp.now() - window if window is not None else None
+    files = realtime_files()
+    # Parquet partitions are by event time, which says nothing about when a row was scored
+    parquet_files = parquet_store.part_files(REALTIME_PARQUET_DIR)
+    has_db = os.path.exists(REALTIME_DB_FILE)
+    feed_files = arrow_feed_files()
+    cache = store.state.setdefault("realtime", {"df": pd.DataFrame(), "ids": set(), "start": None, "queried": None, "sources": None})
     
-    try:
-        df_hist = pd.read_csv(HISTORICAL_FILE, low_memory=False)
-        if df_hist.empty:
-            return pd.DataFrame()
-        
-        df_hist['amount'] = pd.to_numeric(df_hist['amount'], errors='coerce')
-        # Specify format to avoid warnings and improve performance
-        df_hist['timestamp'] = pd.to_datetime(df_hist['timestamp'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
-        if 'processed_time' in df_hist.columns:
-            df_hist['processed_time'] = pd.to_datetime(df_hist['processed_time'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
-        else:
+    # Growing sources: (reader generation, row count, typed rows not merged yet); unchanged files cost one stat
+    readers = {path: realtime_csv_reader(store, path) for path in files}
+    readers.update({path: arrow_feed_reader(store, path) for path in feed_files})
+    known = cache["sources"] or {}
+    growing = {path: reader.read_since(*known.get(path, (None, 0))) for path, reader in readers.items()}
+    # The SQLite store is followed by rowid like a growing file; it is read again from the start only
+    # when it is replaced or the scorer deletes rows on recovery (which bumps its generation)
+    queried = (tuple((f, file_snapshot(f)) for f in parquet_files),
+               (os.stat(REALTIME_DB_FILE).st_ino, sqlite_store.generation(REALTIME_DB_FILE)) if has_db else None)
+    sources = cache["sources"]
+    rebuild = (
+        sources is None
+        or queried != cache["queried"]
+        or (cache["start"] is not None and (start is None or start < cache["start"]))
+        or set(growing) != set(sources)
+        or any(generation != sources[path][0] for path, (generation, _, _) in growing.items())
+    )
+    if rebuild:
+        # Whole frames: each reader consolidates its chunks once and keeps the result
+        growing = {path: reader.read_since(None, 0) for path, reader in readers.items()}
+        # CSV first, then Parquet, SQLite and Arrow: the first copy of a transaction_id wins
+        frames = [frame for path, (_, _, frame) in growing.items() if path in files]
+        # Typed Parquet files need no parsing; only those scored within the window are read
+        if parquet_files:
+            frames.append(parquet_store.read_scored(REALTIME_PARQUET_DIR, processed_since=start))
+        # Indexed range query; WAL mode means this never blocks the scorer's inserts
+        db_frame, db_row = pd.DataFrame(), 0
+        if has_db:
+            db_frame, db_row = sqlite_store.rows_after(REALTIME_DB_FILE, 0, processed_since=start)
+        frames += [frame for path, (_, _, frame) in growing.items() if path in feed_files]
+        # from_db marks rows the SQLite store can filter through its indexes (see db_rows)
+        frames = [f.assign(from_db=False) for f in frames] + [db_frame.assign(from_db=True)]
+        frames = [f for f in frames if not f.empty]
+        df_new = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        ids = set()
+        cache.update(df=merge_realtime_rows(None, prepare_realtime_rows(df_new), ids),
+                     ids=ids, start=start, queried=queried, db_row=db_row)
+    else:
+        frames = [frame.assign(from_db=False) for _, _, frame in growing.values() if not frame.empty]
+        if has_db:
+            db_frame, cache["db_row"] = sqlite_store.rows_after(REALTIME_DB_FILE, cache["db_row"], processed_since=start)
+            if not db_frame.empty:
+                frames.append(db_frame.assign(from_db=True))
+        if frames:
+            df_new = pd.concat(frames, ignore_index=True)
+            cache["df"] = merge_realtime_rows(cache["df"], prepare_realtime_rows(df_new), cache["ids"])
+    cache["sources"] = {path: (generation, rows) for path, (generation, rows, _) in growing.items()}
+    return cache["df"]
+
+def load_historical_data(store):
+    """Load historical data for the shared store (parsed again only when the file changes)"""
+    path = compressed_io.find_variant(HISTORICAL_FILE)
+    key = (path, file_snapshot(path)) if path is not None else None
+    cached = store.state.get("historical")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    if path is None:
+        df_hist = pd.DataFrame()
+    else:
+        # Decompressed and parsed chunk by chunk, so the raw text is never held in memory at once
+        chunks = [apply_schema(chunk) for chunk in
+                  compressed_io.read_csv_chunks(path, **transaction_schema.read_options(chunked=True))]
+        df_hist = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    if not df_hist.empty:
+        if 'processed_time' not in df_hist.columns:
             df_hist['processed_time'] = df_hist['timestamp']
         
         # Handle fraud prediction
         if 'fraud_prediction' in df_hist.columns:
-            df_hist["fraud_prediction"] = pd.to_numeric(df_hist["fraud_prediction"], errors='coerce').fillna(0).astype(int)
+            df_hist["fraud_prediction"] = df_hist["fraud_prediction"].astype(int)
         elif 'is_fraud' in df_hist.columns:
-            df_hist["fraud_prediction"] = pd.to_numeric(df_hist["is_fraud"], errors='coerce').fillna(0).astype(int)
+            df_hist["fraud_prediction"] = df_hist["is_fraud"].astype(int)
         else:
             df_hist["fraud_prediction"] = 0
         
         df_hist["source"] = "Historical"
-        return df_hist
-    except Exception as e:
+    store.state["historical"] = (key, df_hist)
+    return df_hist
+
+@st.cache_resource
+def data_store():
+    """The process-wide data store: one refresher thread loads the data for every session of this server"""
+    store = SharedDataStore()
+    store.register("realtime", lambda: load_realtime_data(store))
+    store.register("historical", lambda: load_historical_data(store))
+    return store.start()
+
+def realtime_snapshot(store, window):
+    """The shared real-time Snapshot, first widening the shared load if ``window`` reaches further back"""
+    state = store.state
+    if "window" not in state or (state["window"] is not None and (window is None or window > state["window"])):
+        state["window"] = window
+        if "realtime" in store.snapshots:
+            return store.refresh("realtime")
+    return store.get("realtime")
+
+def snapshot_ids(store, snapshot):
+    """transaction_ids of a real-time Snapshot, built once per version and shared by every session"""
+    cached = store.state.get("snapshot_ids")
+    if cached is None or cached[0] != snapshot.version:
+        ids = frozenset(snapshot.data['transaction_id']) if 'transaction_id' in snapshot.data.columns else frozenset()
+        cached = (snapshot.version, ids)
+        store.state["snapshot_ids"] = cached
+    return cached[1]
+
+def file_rows(store, snapshot):
+    """Rows of a real-time Snapshot that did not come from the SQLite store, built once per version and shared"""
+    cached = store.state.get("file_rows")
+    if cached is None or cached[0] != snapshot.version:
+        df = snapshot.data
+        cached = (snapshot.version, df[~df['from_db']] if 'from_db' in df.columns else df)
+        store.state["file_rows"] = cached
+    return cached[1]
+
+def db_rows(start, sender="All", receiver="All", hour="All", fraud_only=False, limit=None):
+    """Real-time rows of the SQLite store matching the filters, found through its indexes (empty without one)"""
+    if not os.path.exists(REALTIME_DB_FILE):
         return pd.DataFrame()
+    df = sqlite_store.query(REALTIME_DB_FILE, processed_since=start, fraud_only=fraud_only, limit=limit,
+                            sender_account=None if sender == "All" else sender,
+                            receiver_account=None if receiver == "All" else receiver,
+                            hour=None if hour == "All" else int(hour))
+    df = prepare_realtime_rows(df)
+    if not df.empty:
+        df["from_db"] = True
+    return df
+
+def filter_rows(df, sender, receiver, hour):
+    """Rows matching the sidebar's account and hour filters ("All" keeps everything)"""
+    if sender != "All" and 'sender_account' in df.columns:
+        df = df[df["sender_account"] == sender]
+    if receiver != "All" and 'receiver_account' in df.columns:
+        df = df[df["receiver_account"] == receiver]
+    if hour != "All" and 'timestamp' in df.columns and not df['timestamp'].isna().all():
+        df = df[df["timestamp"].dt.hour == int(hour)]
+    return df
+
+def window_rows(df, start):
+    """Rows of a shared frame scored at or after start (all of them, as a shallow copy, if start is None)"""
+    if start is not None and 'processed_time' in df.columns:
+        keep = ~(df['processed_time'] < start)
+        if not keep.all():
+            return df[keep]
+    # Shallow copy: with copy-on-write, changes made by this session stay out of the shared frame
+    return df.copy(deep=False)
 
 # ---------------------------
 # LOAD DATA
 # ---------------------------
+store = data_store()
 # Show loading status
 with st.spinner("Loading transaction data..."):
-    df_rt = load_realtime_data()
+    window = TIME_WINDOWS[time_window]
+    window_start = pd.Timestamp.now() - window if window is not None else None
+    try:
+        rt_snapshot = realtime_snapshot(store, window)
+        df_rt = rt_snapshot.data
+    except Exception as e:
+        rt_snapshot = None
+        df_rt = pd.DataFrame()
+    if df_rt.empty or 'transaction_id' not in df_rt.columns:
+        df_rt = pd.DataFrame()
+    else:
+        df_rt = window_rows(df_rt, window_start)
 
 # Debug info at top
 if df_rt.empty:
@@ -991,16 +1179,22 @@ if df_rt.empty:
 # Show data loaded successfully
 st.success(f"✅ Loaded {len(df_rt):,} transactions")
 
-# Detect new transactions
+# Detect new transactions (only when the shared snapshot changed since this session's last run)
 try:
-    current_ids = set(df_rt['transaction_id'].astype(str))
-    new_ids = current_ids - st.session_state.last_seen_ids
+    new_ids = set()
+    if st.session_state.get('last_seen_version') != rt_snapshot.version:
+        # Shared frozenset: the session keeps a reference, not its own copy of every ID
+        current_ids = snapshot_ids(store, rt_snapshot)
+        new_ids = current_ids - st.session_state.last_seen_ids
+        st.session_state.last_seen_ids = current_ids
+        st.session_state.last_seen_version = rt_snapshot.version
     new_transactions_count = len(new_ids)
 
     # Update session state
     if new_ids:
-        new_transactions = df_rt[df_rt['transaction_id'].astype(str).isin(new_ids)]
-        for _, tx in new_transactions.iterrows():
+        new_transactions = df_rt[[i in new_ids for i in df_rt['transaction_id']]]
+        # History keeps 100 entries and each one is inserted at the front: only the last 100 survive
+        for _, tx in new_transactions.tail(100).iterrows():
             try:
                 st.session_state.transaction_history.insert(0, {
                     'id': str(tx['transaction_id']),
@@ -1015,23 +1209,19 @@ try:
                 pass
         # Keep only last 100 transactions in history
         st.session_state.transaction_history = st.session_state.transaction_history[:100]
-        st.session_state.last_seen_ids = current_ids
 except Exception as e:
     new_transactions_count = 0
     # Initialize if not set
     if 'last_seen_ids' not in st.session_state:
         st.session_state.last_seen_ids = set()
-    if len(st.session_state.last_seen_ids) == 0:
-        st.session_state.last_seen_ids = set(df_rt['transaction_id'].astype(str))
+    if len(st.session_state.last_seen_ids) == 0 and rt_snapshot is not None:
+        st.session_state.last_seen_ids = snapshot_ids(store, rt_snapshot)
 
 try:
-    df_hist = load_historical_data()
-    if not df_hist.empty:
-        df = pd.concat([df_rt, df_hist], ignore_index=True)
-    else:
-        df = df_rt.copy()
+    df_hist = store.get("historical").data
 except Exception as e:
-    df = df_rt.copy()
+    df_hist = pd.DataFrame()
+df = pd.concat([df_rt, df_hist], ignore_index=True) if not df_hist.empty else df_rt.copy()
 
 # ---------------------------
 # FILTERS
@@ -1049,17 +1239,49 @@ try:
     receiver_filter = st.sidebar.selectbox("Receiver Account", ["All"] + sorted(receiver_accounts))
     hour_filter = st.sidebar.selectbox("Hour of Day", ["All"] + sorted(hours))
 
-    if sender_filter != "All" and 'sender_account' in df.columns:
-        df = df[df["sender_account"] == sender_filter]
-    if receiver_filter != "All" and 'receiver_account' in df.columns:
-        df = df[df["receiver_account"] == receiver_filter]
-    if hour_filter != "All" and 'timestamp' in df.columns and not df['timestamp'].isna().all():
-        df = df[df["timestamp"].dt.hour == int(hour_filter)]
+    if (sender_filter != "All" or receiver_filter != "All") and rt_snapshot is not None and os.path.exists(REALTIME_DB_FILE):
+        # The SQLite store finds an account's rows through its indexes; only rows from other sources are scanned
+        file_matches = filter_rows(window_rows(file_rows(store, rt_snapshot), window_start), sender_filter, receiver_filter, hour_filter)
+        db_matches = db_rows(window_start, sender_filter, receiver_filter, hour_filter)
+        if not file_matches.empty and not db_matches.empty:
+            db_matches = db_matches[~db_matches["transaction_id"].isin(file_matches["transaction_id"])]
+        parts = [file_matches, db_matches, filter_rows(df_hist, sender_filter, receiver_filter, hour_filter)]
+        parts = [part for part in parts if not part.empty]
+        df = pd.concat(parts, ignore_index=True) if parts else df.iloc[:0]
+    else:
+        df = filter_rows(df, sender_filter, receiver_filter, hour_filter)
 except Exception as e:
     st.sidebar.error(f"Filter error: {e}")
 
 df_rt_filtered = df[df["source"] == "Real-Time"] if 'source' in df.columns else df_rt
 
+# Charts read the scorer's rollups (O(buckets)) when no account filter is set and they hold exactly the
+# real-time rows of the window. Both are counted by processed_time over the same whole minutes: from the
+# window start up to the minute of the newest loaded row, which the scorer may still be adding to.
+# Rows from writers without rollups (broker workers, backfill) make the totals differ.
+use_rollups = False
+try:
+    if sender_filter == "All" and receiver_filter == "All" and os.path.exists(ROLLUP_FILE) and not df_rt.empty:
+        covered_end = df_rt['processed_time'].max().floor('min')
+        covered = df_rt['processed_time'] < covered_end
+        if window_start is not None:
+            covered &= df_rt['processed_time'] >= window_start.ceil('min')
+        use_rollups = rollup_store.total(ROLLUP_FILE, window_start, covered_end) == int(covered.sum())
+except Exception as e:
+    use_rollups = False
+
+def chart_rollups(by, start=None, grain=None):
+    """Rollups behind a chart, limited to the window and hour filter, or None to aggregate df_rt_filtered"""
+    if not use_rollups:
+        return None
+    if window_start is not None:
+        start = max(start, window_start) if start is not None else window_start
+    try:
+        return rollup_store.query(ROLLUP_FILE, start=start, by=by, grain=grain,
+                                  hour=None if hour_filter == "All" else int(hour_filter))
+    except Exception as e:
+        return None
+
 # ---------------------------
 # HEADER WITH LIVE STATUS
 # ---------------------------
@@ -1290,41 +1512,53 @@ try:
     <div class="section-title-large">📈 Real-Time Transaction Timeline (Past 7 Days)</div>
     """, unsafe_allow_html=True)
     if not df_rt_filtered.empty and 'processed_time' in df_rt_filtered.columns:
-        df_rt_filtered_copy = df_rt_filtered.copy()
-        # Filter to only last 7 days
-        seven_days_ago = datetime.now() - pd.Timedelta(days=7)
-        df_rt_filtered_copy = df_rt_filtered_copy[df_rt_filtered_copy['processed_time'] >= seven_days_ago]
+        # Zooming in re-fetches the range at the finest bucket size that fits the chart width
+        zoom = st.radio("Zoom", list(TIMELINE_ZOOMS), horizontal=True, key="timeline_zoom", label_visibility="collapsed")
+        zoom_end = datetime.now()
+        zoom_start = zoom_end - TIMELINE_ZOOMS[zoom]
+        freq = next((f for f in TIMELINE_FREQS if TIMELINE_ZOOMS[zoom] / pd.Timedelta(f) <= 2 * downsample.CHART_WIDTH_PX),
+                    TIMELINE_FREQS[-1])
+        recent = df_rt_filtered['processed_time'] >= zoom_start
         
-        if not df_rt_filtered_copy.empty:
-            df_rt_filtered_copy['time_bucket'] = df_rt_filtered_copy['processed_time'].dt.floor('1min')
-            timeline = df_rt_filtered_copy.groupby('time_bucket').agg({
-                'transaction_id': 'count',
-                'fraud_prediction': 'sum',
-                'amount': 'sum'
-            }).reset_index()
-            timeline.columns = ['time', 'count', 'frauds', 'volume']
+        if recent.any():
+            # Per-minute counts from the scorer's rollups when they apply, else grouped here
+            timeline = chart_rollups(["bucket"], start=zoom_start, grain="minute") if freq == "1min" else None
+            if timeline is not None:
+                timeline = timeline.sort_values('bucket')[['bucket', 'transactions', 'frauds', 'amount']]
+                timeline.columns = ['time', 'count', 'frauds', 'volume']
+            else:
+                df_rt_filtered_copy = df_rt_filtered[recent].copy()
+                df_rt_filtered_copy['time_bucket'] = df_rt_filtered_copy['processed_time'].dt.floor(freq)
+                timeline = df_rt_filtered_copy.groupby('time_bucket').agg({
+                    'transaction_id': 'count',
+                    'fraud_prediction': 'sum',
+                    'amount': 'sum'
+                }).reset_index()
+                timeline.columns = ['time', 'count', 'frauds', 'volume']
             
             if not timeline.empty:
+                # Each trace keeps only the points visible at the chart's width (spikes included)
+                count_points = downsample.downsample(timeline, 'time', 'count')
+                fraud_points = downsample.downsample(timeline, 'time', 'frauds')
                 fig_timeline = go.Figure()
                 fig_timeline.add_trace(go.Scatter(
-                    x=timeline['time'],
-                    y=timeline['count'],
+                    x=count_points['time'],
+                    y=count_points['count'],
                     mode='lines+markers',
                     name='Total Transactions',
                     line=dict(color='#007bff', width=3)
                 ))
                 fig_timeline.add_trace(go.Scatter(
-                    x=timeline['time'],
-                    y=timeline['frauds'],
+                    x=fraud_points['time'],
+                    y=fraud_points['frauds'],
                     mode='lines+markers',
                     name='Fraudulent Transactions',
                     line=dict(color='#dc3545', width=3)
                 ))
                 fig_timeline.update_layout(
                     title=dict(
-                        text="<b>Transaction Volume Over Time (Past 7 Days)</b>",
+                        text=f"<b>Transaction Volume Over Time ({zoom})</b>",
                         font=dict(size=18, color="#FAFAFA" if st.session_state.theme == 'Dark' else '#0D0D0D')
-                        font=dict(size=18, color="#FFFFFF" if st.session_state.theme == 'Light' else '#FAFAFA')
                     ),
                     xaxis_title="Time",
                     yaxis_title="Count",
@@ -1332,15 +1566,17 @@ try:
                     template=chart_template,
                     height=400,
                     xaxis=dict(
-                        range=[seven_days_ago, datetime.now()],
+                        range=[zoom_start, zoom_end],
                         tickformat='%m-%d %H:%M'
                     )
                 )
                 st.plotly_chart(fig_timeline, use_container_width=True)
+                st.caption(f"{freq} buckets: showing {len(count_points):,} + {len(fraud_points):,} of "
+                           f"{len(timeline):,} points ({downsample.DOWNSAMPLE_METHOD}, {downsample.CHART_WIDTH_PX} px)")
             else:
-                st.info("No transactions in the past 7 days.")
+                st.info(f"No transactions in the {zoom.lower()}.")
         else:
-            st.info("No transactions in the last 30 minutes.")
+            st.info(f"No transactions in the {zoom.lower()}.")
 except Exception as e:
     st.error(f"Error displaying timeline: {e}")
 
@@ -1399,9 +1635,13 @@ try:
             # Fraud by Transaction Type
             st.markdown("#### 🔄 Fraud by Transaction Type")
             if 'fraud_prediction' in df_rt_filtered.columns and 'transaction_type' in df_rt_filtered.columns:
-                type_fraud = df_rt_filtered.groupby('transaction_type').agg({
-                    'fraud_prediction': ['sum', 'count']
-                }).reset_index()
+                type_fraud = chart_rollups(["transaction_type"])
+                if type_fraud is not None:
+                    type_fraud = type_fraud[['transaction_type', 'frauds', 'transactions']]
+                else:
+                    type_fraud = df_rt_filtered.groupby('transaction_type').agg({
+                        'fraud_prediction': ['sum', 'count']
+                    }).reset_index()
                 type_fraud.columns = ['transaction_type', 'fraud_count', 'total_count']
                 type_fraud['fraud_rate'] = (type_fraud['fraud_count'] / type_fraud['total_count'] * 100).round(2)
                 type_fraud = type_fraud.sort_values('fraud_count', ascending=False)
@@ -1477,11 +1717,16 @@ try:
             # Fraud Trend by Hour
             st.markdown("#### 📈 Fraud Trend by Hour")
             if 'timestamp' in df_rt_filtered.columns and 'fraud_prediction' in df_rt_filtered.columns:
-                df_rt_filtered_copy = df_rt_filtered.copy()
-                df_rt_filtered_copy['hour'] = df_rt_filtered_copy['timestamp'].dt.hour
-                hourly_fraud = df_rt_filtered_copy.groupby('hour').agg({
-                    'fraud_prediction': ['sum', 'count']
-                }).reset_index()
+                hourly_fraud = chart_rollups(["hour"])
+                if hourly_fraud is not None:
+                    # Rows without an event time are rolled up under hour -1
+                    hourly_fraud = hourly_fraud[hourly_fraud['hour'] >= 0][['hour', 'frauds', 'transactions']]
+                else:
+                    df_rt_filtered_copy = df_rt_filtered.copy()
+                    df_rt_filtered_copy['hour'] = df_rt_filtered_copy['timestamp'].dt.hour
+                    hourly_fraud = df_rt_filtered_copy.groupby('hour').agg({
+                        'fraud_prediction': ['sum', 'count']
+                    }).reset_index()
                 hourly_fraud.columns = ['hour', 'fraud_count', 'total_count']
                 hourly_fraud['fraud_rate'] = (hourly_fraud['fraud_count'] / hourly_fraud['total_count'] * 100).round(2)
                 
@@ -1523,10 +1768,14 @@ try:
         # Top Fraud Locations
         st.markdown("#### 🌍 Top Fraud Locations")
         if 'fraud_prediction' in df_rt_filtered.columns and 'location' in df_rt_filtered.columns:
-            loc_fraud = df_rt_filtered[df_rt_filtered['fraud_prediction'] == 1].groupby('location').agg({
-                'fraud_prediction': 'count',
-                'amount': 'sum'
-            }).reset_index()
+            loc_fraud = chart_rollups(["location"])
+            if loc_fraud is not None:
+                loc_fraud = loc_fraud[loc_fraud['frauds'] > 0][['location', 'frauds', 'fraud_amount']]
+            else:
+                loc_fraud = df_rt_filtered[df_rt_filtered['fraud_prediction'] == 1].groupby('location').agg({
+                    'fraud_prediction': 'count',
+                    'amount': 'sum'
+                }).reset_index()
             loc_fraud.columns = ['location', 'fraud_count', 'total_amount']
             loc_fraud = loc_fraud.sort_values('fraud_count', ascending=False).head(10)
             
@@ -1589,7 +1838,19 @@ st.caption("Review suspicious transactions and mark them as fraud or not fraud.
 
 if 'fraud_prediction' in df_rt_filtered.columns:
     # Get suspicious transactions (fraud_prediction = 1) that haven't been reviewed yet
-    suspicious_tx = df_rt_filtered[df_rt_filtered["fraud_prediction"] == 1].copy()
+    if rt_snapshot is not None and os.path.exists(REALTIME_DB_FILE):
+        # The newest flagged rows of the SQLite store come from its (fraud_prediction, processed_time) index,
+        # enough of them to fill the table after dropping those confirmed as not fraud
+        file_flagged = filter_rows(window_rows(file_rows(store, rt_snapshot), window_start), sender_filter, receiver_filter, hour_filter)
+        file_flagged = file_flagged[file_flagged["fraud_prediction"] == 1]
+        db_flagged = db_rows(window_start, sender_filter, receiver_filter, hour_filter, fraud_only=True,
+                             limit=review_limit + len(st.session_state.confirmed_not_fraud_transactions))
+        if not file_flagged.empty and not db_flagged.empty:
+            db_flagged = db_flagged[~db_flagged["transaction_id"].isin(file_flagged["transaction_id"])]
+        parts = [part for part in (file_flagged, db_flagged) if not part.empty]
+        suspicious_tx = pd.concat(parts, ignore_index=True) if parts else df_rt_filtered.iloc[:0].copy()
+    else:
+        suspicious_tx = df_rt_filtered[df_rt_filtered["fraud_prediction"] == 1].copy()
     
     # Filter out only transactions confirmed as NOT fraud (keep fraud ones visible so they can be unchecked if needed)
     if not suspicious_tx.empty:
@@ -1846,7 +2107,7 @@ col1, col2 = st.columns([1, 3])
 with col1:
     st.download_button(
         label="📥 Export Filtered Dataset as CSV",
-        data=df.to_csv(index=False).encode('utf-8'),
+        data=df.drop(columns=["from_db"], errors="ignore").to_csv(index=False).encode('utf-8'),
         file_name=f"fraud_transactions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         mime="text/csv"
     )
@@ -1901,4 +2162,68 @@ with st.expander("🧪 Debug: Real-Time Statistics"):
             "Data shape": f"{df_rt.shape[0]} rows, {df_rt.shape[1]} columns",
             "Columns": list(df_rt.columns)[:10]  # First 10 columns
         })
+        st.write("**Shared Data Store:**")
+        st.json(store.stats())
+
+    # Compare model versions recorded by the scorer
+    if 'model_version' in df_rt.columns:
+        st.write("**Model Versions:**")
+        version_stats = df_rt.groupby(df_rt['model_version'].fillna('unknown')).agg(
+            transactions=('transaction_id', 'count'),
+            frauds=('fraud_prediction', 'sum'),
+            avg_probability=('fraud_probability', 'mean')
+        )
+        version_stats['fraud_rate_%'] = (version_stats['frauds'] / version_stats['transactions'] * 100).round(2)
+        st.dataframe(version_stats, use_container_width=True)
+
+    # Scoring latency: event time (timestamp) → scored time (processed_time)
+    st.write("**Scoring Latency (event time → scored):**")
+    try:
+        if 'timestamp' in df_rt.columns and 'processed_time' in df_rt.columns:
+            latency_ms = ((df_rt['processed_time'] - df_rt['timestamp']).dt.total_seconds() * 1000).dropna()
+            latency_ms = latency_ms[latency_ms >= 0]
+            if not latency_ms.empty:
+                p50, p95, p99 = latency_ms.quantile([0.5, 0.95, 0.99])
+                st.caption(f"p50: {p50:,.0f} ms | p95: {p95:,.0f} ms | p99: {p99:,.0f} ms over {len(latency_ms):,} transactions")
+                fig_latency = px.histogram(
+                    latency_ms.clip(upper=latency_ms.quantile(0.999)).rename('latency_ms'),
+                    x='latency_ms',
+                    nbins=60,
+                    labels={'latency_ms': 'Latency (ms)', 'count': 'Transactions'},
+                    color_discrete_sequence=['#007bff'],
+                    template=chart_template
+                )
+                fig_latency.update_layout(showlegend=False, height=300)
+                st.plotly_chart(fig_latency, use_container_width=True)
+            else:
+                st.write("No latency data available")
+        
+        # Per-stage percentiles from the scorer's in-process histograms
+        for metrics_file in sorted(glob.glob(SCORER_METRICS_GLOB)):
+            with open(metrics_file) as f:
+                scorer_metrics = json.load(f)
+            st.caption(f"Scorer stages ({os.path.basename(metrics_file)}, updated {scorer_metrics.get('updated', 'N/A')})")
+            st.dataframe(pd.DataFrame(scorer_metrics.get('stages', {})).T, use_container_width=True)
+            # Written by the scorer's --pipeline mode: busy time / wall time per stage
+            utilization = scorer_metrics.get('utilization')
+            if utilization:
+                bottleneck = max(utilization, key=lambda stage: utilization[stage]['utilization'])
+                st.caption(f"Pipeline stage utilization (bottleneck: {bottleneck})")
+                st.dataframe(pd.DataFrame(utilization).T, use_container_width=True)
+
+        # Backlog between the simulator and the slowest scorer
+        if os.path.exists(STREAM_QUEUE_METRICS_FILE):
+            with open(STREAM_QUEUE_METRICS_FILE) as f:
+                queue = json.load(f)
+            st.write("**Stream Queue Backlog:**")
+            col_backlog, col_fill, col_dropped, col_blocked = st.columns(4)
+            col_backlog.metric("Unscored rows", f"{queue['backlog_rows']:,}")
+            col_fill.metric("Queue fill", f"{(queue['fill'] or 0) * 100:.1f}%",
+                            help=f"Capacity {queue['capacity_rows']:,} rows, policy {queue['policy']}")
+            col_dropped.metric("Dropped rows", f"{queue['dropped_rows']:,}")
+            col_blocked.metric("Producer blocked", f"{queue['blocked_seconds']:,.1f} s",
+                               delta="blocked now" if queue.get('blocked') else None, delta_color="inverse")
+            st.caption(f"Stream queue ({os.path.basename(STREAM_QUEUE_METRICS_FILE)}, updated {queue.get('updated', 'N/A')})")
+    except Exception as e:
+        st.write(f"Latency data unavailable: {e}")
     st.session_state.last_refresh_time = datetime.now()
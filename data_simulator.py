@@ -5,9 +5,16 @@ import random
 from datetime import datetime
 import time
 import os
+from stream_segments import SEGMENT_DIR, SegmentWriter
+from stream_queue import BoundedStreamQueue
+from broker import TRANSACTIONS_TOPIC, open_broker
+from transaction_schema import format_timestamp
 
-STREAM_FILE = "data/realtime_stream.csv"
-os.makedirs(os.path.dirname(STREAM_FILE), exist_ok=True)
+STREAM_DIR = SEGMENT_DIR  # Rotating segment files listed in manifest.json (see stream_segments.py)
+ARCHIVE_DIR = None  # e.g. "data/stream_archive" to keep compacted segments instead of deleting them
+QUEUE_CAPACITY = int(os.environ.get("STREAM_QUEUE_CAPACITY", "100000"))  # Most unscored rows the stream may hold
+QUEUE_POLICY = os.environ.get("STREAM_QUEUE_POLICY", "block")  # "block" (wait for the scorer) or "drop-oldest"
+BROKER_URL = os.environ.get("SIMULATOR_BROKER")  # Send to a broker instead, e.g. "file:data/broker" or "redis://host:6379"
 
 columns = [
     "transaction_id", "timestamp", "processed_time",
@@ -70,8 +77,8 @@ def generate_transaction(force_fraud=False):
 
     return {
         "transaction_id": str(uuid.uuid4()),
-        "timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
-        "processed_time": now.strftime("%Y-%m-%d %H:%M:%S"),
+        "timestamp": format_timestamp(now),  # Millisecond event time for latency tracking
+        "processed_time": format_timestamp(now),
         "sender_account": f"AC{random.randint(100000, 999999)}",
         "receiver_account": f"AC{random.randint(100000, 999999)}",
         "amount": amount,
@@ -82,6 +89,11 @@ def generate_transaction(force_fraud=False):
     }
 
 print("🚀 Starting real-time transaction simulator...")
+if BROKER_URL:
+    broker = open_broker(BROKER_URL)
+    print(f"📡 Sending to {TRANSACTIONS_TOPIC} on {BROKER_URL}")
+else:
+    stream_queue = BoundedStreamQueue(SegmentWriter(STREAM_DIR, archive_dir=ARCHIVE_DIR), QUEUE_CAPACITY, QUEUE_POLICY)
 fraud_counter = 0
 while True:
     batch_size = random.randint(3, 10)  # Increased batch size for faster generation
@@ -100,7 +112,10 @@ while True:
         transactions.append(tx)
     
     df = pd.DataFrame(transactions, columns=columns)
-    df.to_csv(STREAM_FILE, mode='a', header=not os.path.exists(STREAM_FILE), index=False)
+    if BROKER_URL:
+        broker.send(TRANSACTIONS_TOPIC, df)
+    else:
+        stream_queue.put(df)
     
     for tx in transactions:
         # Safely check for fraud flag (handle both is_fraud and fraud_prediction)
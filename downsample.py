@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+CHART_WIDTH_PX = int(os.environ.get("DASHBOARD_CHART_WIDTH", "1200"))  # Plot width the timeline is downsampled for
+DOWNSAMPLE_METHOD = os.environ.get("DASHBOARD_DOWNSAMPLE", "minmax")  # "minmax" (per-pixel extremes) or "lttb"
+
+
+def _as_numbers(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype("int64")
+    return x.astype("float64")
+
+
+def min_max_indices(x, y, buckets):
+    """Indices of the lowest and highest ``y`` in each of ``buckets`` equal-width x ranges, plus both ends.
+
+    Drawn one bucket per pixel, this is indistinguishable from the full
+    series: every spike and dip keeps its exact height.
+    """
+    x, y = _as_numbers(x), np.asarray(y, dtype="float64")
+    n = len(x)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    span = x[-1] - x[0]
+    bucket = np.minimum(((x - x[0]) / span * buckets).astype("int64"), buckets - 1) if span > 0 else np.zeros(n, dtype="int64")
+    # x is sorted, so each bucket is a contiguous run; sorting by (bucket, y) puts its min first and max last
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.r_[True, bucket[order][1:] != bucket[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.r_[0, order[starts], order[ends], n - 1])
+
+
+def lttb_indices(x, y, points):
+    """Indices of ``points`` points picked by Largest-Triangle-Three-Buckets (Steinarsson, 2013).
+
+    Keeps both ends and, from each bucket in between, the point forming the
+    largest triangle with the previous pick and the next bucket's average,
+    which preserves the visual shape of the line.
+    """
+    x, y = _as_numbers(x), np.asarray(y, dtype="float64")
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, points - 1).astype("int64")  # points - 2 buckets between the ends
+    picked = np.empty(points, dtype="int64")
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        picked[i + 1] = a
+    return picked
+
+
+def downsample(df, x, y, width=CHART_WIDTH_PX, method=DOWNSAMPLE_METHOD):
+    """Rows of ``df`` (sorted by ``x``) needed to draw ``y`` against ``x`` on a ``width``-pixel plot.
+
+    "minmax" keeps at most two rows per pixel column, "lttb" one. A frame
+    that is already that small is returned as is.
+    """
+    if method == "lttb":
+        indices = lttb_indices(df[x].to_numpy(), df[y].to_numpy(), width)
+    else:
+        indices = min_max_indices(df[x].to_numpy(), df[y].to_numpy(), width)
+    return df if len(indices) == len(df) else df.iloc[indices]
@@ -0,0 +1,73 @@
+import numpy as np
+
+CATEGORICAL_COLUMNS = ("transaction_type", "location")
+
+
+class FeatureEncoder:
+    """Encode cleaned transactions straight into the booster's feature matrix.
+
+    Built once from the booster's feature names: numeric features and one-hot
+    category columns are mapped to their column index, so a batch is written
+    into a float32 matrix in exactly the order the booster expects.
+
+    Category values without a model column (the category dropped as baseline
+    at training time, or one the model never saw) are encoded as all zeros
+    and counted in ``unknown_counts``. With ``handle_unknown="error"`` they
+    raise a ValueError instead.
+    """
+
+    def __init__(self, feature_names, categorical=CATEGORICAL_COLUMNS, handle_unknown="baseline"):
+        if handle_unknown not in ("baseline", "error"):
+            raise ValueError(f"handle_unknown must be 'baseline' or 'error', got {handle_unknown!r}")
+        self.feature_names = list(feature_names)
+        self.handle_unknown = handle_unknown
+        self.numeric = {}
+        self.categories = {col: {} for col in categorical}
+        for idx, name in enumerate(self.feature_names):
+            for col in categorical:
+                prefix = f"{col}_"
+                if name.startswith(prefix):
+                    self.categories[col][name[len(prefix):]] = idx
+                    break
+            else:
+                self.numeric[name] = idx
+        self.unknown_counts = {}
+        self._buffer = np.zeros((0, len(self.feature_names)), dtype=np.float32)
+
+    @classmethod
+    def from_booster(cls, booster, **kwargs):
+        """Build an encoder matching an XGBoost Booster's feature order."""
+        if not booster.feature_names:
+            raise ValueError("Booster has no feature names to build an encoder from")
+        return cls(booster.feature_names, **kwargs)
+
+    def _rows(self, n_rows):
+        # Reuse one preallocated matrix, growing it only for larger batches
+        if n_rows > len(self._buffer):
+            self._buffer = np.zeros((max(n_rows, 2 * len(self._buffer)), len(self.feature_names)), dtype=np.float32)
+        X = self._buffer[:n_rows]
+        X.fill(0.0)
+        return X
+
+    def transform(self, df):
+        """Return the float32 feature matrix for ``df``.
+
+        The returned array is a view of an internal buffer and is overwritten
+        by the next call.
+        """
+        X = self._rows(len(df))
+        for name, idx in self.numeric.items():
+            X[:, idx] = df[name].to_numpy(dtype=np.float32, na_value=np.nan)
+
+        rows = np.arange(len(df))
+        self.unknown_counts = {}
+        for col, mapping in self.categories.items():
+            codes = df[col].map(mapping).to_numpy(dtype=np.float64, na_value=np.nan)
+            known = ~np.isnan(codes)
+            X[rows[known], codes[known].astype(np.intp)] = 1.0
+            if not known.all():
+                unknown = df[col][~known].value_counts(dropna=False).to_dict()
+                if self.handle_unknown == "error":
+                    raise ValueError(f"Unknown {col} categories: {unknown}")
+                self.unknown_counts[col] = unknown
+        return X
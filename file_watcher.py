@@ -0,0 +1,119 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class FileWatcher:
+    """Block until a file (or any file in a directory) changes.
+
+    On Linux the parent directory is watched with inotify, so waiting costs
+    no CPU and returns as soon as the writer appends. Elsewhere, or when
+    inotify is unavailable, the file is stat-polled with adaptive backoff:
+    the interval restarts at ``min_interval`` after a change and doubles up
+    to ``max_interval`` while nothing happens.
+    """
+
+    def __init__(self, path, min_interval=0.01, max_interval=1.0, use_inotify=True):
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._interval = min_interval
+        self._signature = self._stat()
+        self._fd = None
+
+        if os.path.isdir(path):
+            self._directory, self._name = path, None
+        else:
+            self._directory, self._name = os.path.dirname(path) or ".", os.path.basename(path)
+
+        libc = _load_inotify() if use_inotify else None
+        if libc is not None:
+            fd = libc.inotify_init1(IN_NONBLOCK)
+            if fd >= 0 and libc.inotify_add_watch(fd, os.fsencode(self._directory), WATCH_MASK) >= 0:
+                self._fd = fd
+            elif fd >= 0:
+                os.close(fd)
+
+    @property
+    def mode(self):
+        return "inotify" if self._fd is not None else "polling"
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _drain_events(self):
+        """Read all queued inotify events and report whether one matched."""
+        matched = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return matched
+            pos = 0
+            while pos < len(data):
+                _, _, _, name_len = EVENT_HEADER.unpack_from(data, pos)
+                name = data[pos + EVENT_HEADER.size:pos + EVENT_HEADER.size + name_len].rstrip(b"\0")
+                if self._name is None or name == os.fsencode(self._name):
+                    matched = True
+                pos += EVENT_HEADER.size + name_len
+
+    def wait(self, timeout=None):
+        """Wait for a change. Returns True on change, False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self._fd is not None:
+            while True:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                ready, _, _ = select.select([self._fd], [], [], remaining)
+                if not ready:
+                    return False
+                if self._drain_events():
+                    return True
+
+        while True:
+            signature = self._stat()
+            if signature != self._signature:
+                self._signature = signature
+                self._interval = self.min_interval
+                return True
+            sleep_for = self._interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                sleep_for = min(sleep_for, remaining)
+            time.sleep(sleep_for)
+            self._interval = min(self._interval * 2, self.max_interval)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
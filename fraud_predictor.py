@@ -0,0 +1,34 @@
+import numpy as np
+
+PREDICT_MODES = ("native", "sklearn")
+
+
+class FraudPredictor:
+    """Return positive-class fraud probabilities for encoded feature matrices.
+
+    ``native`` mode holds the raw Booster and calls ``inplace_predict`` on a
+    contiguous float32 array, skipping the sklearn wrapper's input validation
+    and conversion. ``sklearn`` mode goes through ``predict_proba`` as before.
+    """
+
+    def __init__(self, model, mode="native", nthread=None):
+        if mode not in PREDICT_MODES:
+            raise ValueError(f"mode must be one of {PREDICT_MODES}, got {mode!r}")
+        self.model = model
+        self.mode = mode
+        self.booster = model.get_booster()
+        if nthread:
+            self.booster.set_param({"nthread": int(nthread)})
+            model.set_params(n_jobs=int(nthread))
+        # Match the sklearn wrapper, which stops at the best iteration when
+        # the model was trained with early stopping
+        try:
+            self.iteration_range = (0, self.booster.best_iteration + 1)
+        except AttributeError:
+            self.iteration_range = (0, 0)
+
+    def predict_proba(self, X):
+        if self.mode == "native":
+            X = np.ascontiguousarray(X, dtype=np.float32)
+            return self.booster.inplace_predict(X, iteration_range=self.iteration_range)
+        return self.model.predict_proba(X)[:, 1]
@@ -0,0 +1,143 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram in the style of HdrHistogram.
+
+    Each power-of-two range above ``lowest_ms`` is split into
+    ``2**sub_bucket_bits`` linear sub-buckets, so percentiles keep the same
+    relative precision (under 1% with the default 7 bits) from microseconds
+    to an hour, in a fixed amount of memory.
+    """
+
+    def __init__(self, lowest_ms=0.001, highest_ms=3_600_000, sub_bucket_bits=7):
+        self.lowest_ms = lowest_ms
+        self.sub_buckets = 2 ** sub_bucket_bits
+        self.magnitudes = math.ceil(math.log2(highest_ms / lowest_ms)) + 1
+        self.counts = np.zeros(self.magnitudes * self.sub_buckets, dtype=np.int64)
+        self.total = 0
+        self.max_ms = 0.0
+
+    def _index(self, values):
+        scaled = np.maximum(values / self.lowest_ms, 1.0)
+        magnitude = np.minimum(np.floor(np.log2(scaled)).astype(np.int64), self.magnitudes - 1)
+        sub = ((scaled / np.exp2(magnitude) - 1.0) * self.sub_buckets).astype(np.int64)
+        return magnitude * self.sub_buckets + np.clip(sub, 0, self.sub_buckets - 1)
+
+    def _value(self, index):
+        magnitude, sub = divmod(int(index), self.sub_buckets)
+        return self.lowest_ms * 2.0 ** magnitude * (1.0 + (sub + 0.5) / self.sub_buckets)
+
+    def record(self, values_ms):
+        """Record one latency or an array of latencies, in milliseconds."""
+        values = np.atleast_1d(np.asarray(values_ms, dtype=np.float64))
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self.counts += np.bincount(self._index(values), minlength=len(self.counts))
+        self.total += len(values)
+        self.max_ms = max(self.max_ms, float(values.max()))
+
+    def percentile(self, p):
+        if not self.total:
+            return None
+        target = max(1, math.ceil(p / 100 * self.total))
+        index = int(np.searchsorted(np.cumsum(self.counts), target))
+        return min(self._value(index), self.max_ms)
+
+    def summary(self):
+        if not self.total:
+            return {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+        return {
+            "count": int(self.total),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class LatencyRecorder:
+    """Named latency histograms for the stages of the scoring pipeline.
+
+    Safe to share between threads: the --pipeline stages record from their
+    own executor threads while the write stage exports.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, values_ms):
+        with self._lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = LatencyHistogram()
+            self.histograms[stage].record(values_ms)
+
+    @contextmanager
+    def time(self, stage):
+        """Record the wall time spent inside the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            return {stage: hist.summary() for stage, hist in self.histograms.items()}
+
+    def export(self, path, utilization=None):
+        """Atomically write the current p50/p95/p99 of every stage (and StageUtilization.snapshot()) as JSON."""
+        payload = {
+            "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            "pid": os.getpid(),
+            "stages": self.snapshot(),
+        }
+        if utilization is not None:
+            payload["utilization"] = utilization
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+class StageUtilization:
+    """Share of wall time each pipeline stage spends busy.
+
+    A stage near 100% is the bottleneck: the stages before it wait on its
+    input queue and the stages after it sit idle.
+    """
+
+    def __init__(self, stages):
+        self.started = time.perf_counter()
+        self.busy_seconds = {stage: 0.0 for stage in stages}
+        self.batches = {stage: 0 for stage in stages}
+
+    @contextmanager
+    def busy(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.busy_seconds[stage] += time.perf_counter() - start
+            self.batches[stage] += 1
+
+    def snapshot(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            stage: {
+                "utilization": round(busy / elapsed, 4),
+                "busy_s": round(busy, 3),
+                "batches": self.batches[stage],
+            }
+            for stage, busy in self.busy_seconds.items()
+        }
@@ -0,0 +1,84 @@
+import time
+from collections import deque, namedtuple
+
+import pandas as pd
+
+# rows: DataFrame to score; queue_delay_ms: how long the oldest row waited;
+# trigger: "size", "wait" or "flush"; offset: stream offset that is safe to
+# commit once the batch is written (None if no whole read has been consumed yet)
+Batch = namedtuple("Batch", ["rows", "queue_delay_ms", "trigger", "offset"])
+
+
+class MicroBatcher:
+    """Hold incoming rows and release them in latency-bounded batches.
+
+    A batch is released as soon as ``max_batch_size`` rows are waiting or
+    the oldest waiting row has been queued for ``max_wait_ms``, whichever
+    comes first. Larger limits give bigger, cheaper batches; smaller limits
+    give lower latency.
+    """
+
+    def __init__(self, max_batch_size=10_000, max_wait_ms=100):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._chunks = deque()  # [rows, arrival time, stream offset after these rows]
+        self._rows = 0
+
+    def __len__(self):
+        return self._rows
+
+    def add(self, rows, offset=None, arrived=None):
+        """Queue rows read from the stream up to ``offset``."""
+        arrived = time.monotonic() if arrived is None else arrived
+        self._chunks.append([rows, arrived, offset])
+        self._rows += len(rows)
+
+    def time_until_flush(self, now=None):
+        """Seconds until the wait limit releases a batch, or None if nothing is queued."""
+        if not self._rows:
+            return None
+        now = time.monotonic() if now is None else now
+        oldest = next(arrived for rows, arrived, _ in self._chunks if len(rows))
+        return max(0.0, oldest + self.max_wait_ms / 1000 - now)
+
+    def next_batch(self, now=None, force=False):
+        """Return the next Batch if a limit has been reached (or force=True), else None."""
+        now = time.monotonic() if now is None else now
+        if not self._chunks:
+            return None
+        if self._rows >= self.max_batch_size:
+            trigger = "size"
+        elif self._rows and self.time_until_flush(now) == 0:
+            trigger = "wait"
+        elif force or not self._rows:
+            trigger = "flush"
+        else:
+            return None
+
+        taken, offset, oldest = [], None, None
+        remaining = self.max_batch_size
+        while self._chunks and remaining > 0:
+            # Empty chunks (reads with nothing new to score) only advance the offset
+            if not len(self._chunks[0][0]):
+                offset = self._chunks.popleft()[2]
+                continue
+            rows, arrived, chunk_offset = self._chunks[0]
+            if oldest is None:
+                oldest = arrived
+            if len(rows) <= remaining:
+                self._chunks.popleft()
+                taken.append(rows)
+                offset = chunk_offset
+                remaining -= len(rows)
+            else:
+                # Split the chunk; its offset is only reached with its last row
+                taken.append(rows.iloc[:remaining])
+                self._chunks[0][0] = rows.iloc[remaining:]
+                remaining = 0
+
+        if not taken:
+            return Batch(pd.DataFrame(), 0.0, trigger, offset)
+        batch_rows = pd.concat(taken) if len(taken) > 1 else taken[0]
+        self._rows -= len(batch_rows)
+        queue_delay_ms = (now - oldest) * 1000 if oldest is not None else 0.0
+        return Batch(batch_rows, queue_delay_ms, trigger, offset)
@@ -0,0 +1,95 @@
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import datetime
+
+import joblib
+
+from file_watcher import FileWatcher
+
+REGISTRY_DIR = "models"
+MODEL_FILENAME = "model.joblib"
+METADATA_FILENAME = "metadata.json"
+VERSION_PATTERN = re.compile(r"^v(\d{4,})$")
+
+
+def list_versions(registry_dir=REGISTRY_DIR):
+    """Published versions in the registry, oldest first (e.g. ['v0001', 'v0002'])."""
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = [name for name in os.listdir(registry_dir) if VERSION_PATTERN.match(name)]
+    return sorted(versions, key=lambda name: int(VERSION_PATTERN.match(name).group(1)))
+
+
+def latest_version(registry_dir=REGISTRY_DIR):
+    versions = list_versions(registry_dir)
+    return versions[-1] if versions else None
+
+
+def publish_model(model, registry_dir=REGISTRY_DIR, metadata=None):
+    """Save ``model`` as the next version of the registry and return the version name.
+
+    The artifact is written to a hidden staging directory and renamed into
+    place, so watchers never see a half-written version.
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+    latest = latest_version(registry_dir)
+    version = f"v{(int(latest[1:]) if latest else 0) + 1:04d}"
+    staging = os.path.join(registry_dir, f".{version}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    joblib.dump(model, os.path.join(staging, MODEL_FILENAME))
+    info = {"version": version, "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    info.update(metadata or {})
+    with open(os.path.join(staging, METADATA_FILENAME), "w") as f:
+        json.dump(info, f, indent=2)
+    os.rename(staging, os.path.join(registry_dir, version))
+    return version
+
+
+def load_model_version(version, registry_dir=REGISTRY_DIR):
+    return joblib.load(os.path.join(registry_dir, version, MODEL_FILENAME))
+
+
+class ModelRegistryWatcher:
+    """Load newly published model versions in a background thread.
+
+    ``load_fn(version)`` builds whatever the caller needs to score with a
+    version (model, encoder, ...). It runs off the scoring thread, and the
+    result is handed over through ``take_ready()``, which the caller checks
+    between batches, so swapping models never pauses scoring.
+    """
+
+    def __init__(self, load_fn, current_version=None, registry_dir=REGISTRY_DIR, recheck_interval=30.0):
+        self.load_fn = load_fn
+        self.current_version = current_version
+        self.registry_dir = registry_dir
+        self.recheck_interval = recheck_interval
+        self._ready = None
+        self._lock = threading.Lock()
+        os.makedirs(registry_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="model-registry-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        watcher = FileWatcher(self.registry_dir)
+        while True:
+            version = latest_version(self.registry_dir)
+            if version is not None and version != self.current_version:
+                try:
+                    loaded = self.load_fn(version)
+                except Exception as e:
+                    print(f"⚠️ Failed to load model {version}: {e}")
+                else:
+                    with self._lock:
+                        self._ready = loaded
+                    self.current_version = version
+            watcher.wait(timeout=self.recheck_interval)
+
+    def take_ready(self):
+        """Return a newly loaded model (once), or None if there is nothing new."""
+        with self._lock:
+            loaded, self._ready = self._ready, None
+        return loaded
@@ -0,0 +1,29 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+@lru_cache(maxsize=64)
+def one_hot_block(columns, prefix):
+    """(block columns, labels) for ``<prefix><label>`` columns in a tuple of names, parsed once per schema."""
+    block = [col for col in columns if isinstance(col, str) and col.startswith(prefix)]
+    return block, np.array([col[len(prefix):] for col in block], dtype=object)
+
+
+def decode_one_hot(df, prefix, default="UNKNOWN"):
+    """Label of the first set ``<prefix><label>`` column in each row of ``df``, or ``default``.
+
+    Vectorized form of scanning the columns row by row: each column of the
+    block is compared with 1 once (True, 1 and 1.0 count as set, NaN does
+    not), and argmax along the rows finds the first hit.
+    """
+    columns, labels = one_hot_block(tuple(df.columns), prefix)
+    if not columns:
+        return pd.Series(default, index=df.index)
+    hits = np.empty((len(df), len(columns)), dtype=bool)
+    for i, col in enumerate(columns):
+        hits[:, i] = (df[col] == 1).to_numpy(dtype=bool, na_value=False)
+    first = hits.argmax(axis=1)
+    found = hits[np.arange(len(df)), first]
+    return pd.Series(np.where(found, labels[first], default), index=df.index)
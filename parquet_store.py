@@ -0,0 +1,203 @@
+import glob
+import os
+import re
+from datetime import timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from checkpoint import fsync_directory
+from transaction_schema import parse_timestamps
+
+PARQUET_DIR = "data/scored_parquet"
+PARTITION_COLUMN = "timestamp"  # Rows are partitioned by the hour of their event time
+
+# Typed columns, so readers get datetimes and numbers without re-parsing text
+SCHEMA = pa.schema([
+    ("transaction_id", pa.string()),
+    ("timestamp", pa.timestamp("ms")),
+    ("processed_time", pa.timestamp("ms")),
+    ("sender_account", pa.string()),
+    ("receiver_account", pa.string()),
+    ("amount", pa.float64()),
+    ("transaction_type", pa.string()),
+    ("location", pa.string()),
+    ("fraud_prediction", pa.int8()),
+    ("fraud_probability", pa.float64()),
+    ("model_version", pa.string()),
+])
+PARTITION_PATTERN = re.compile(r"date=(\d{4}-\d{2}-\d{2})$")
+HOUR_PATTERN = re.compile(r"hour=(\d{2})$")
+
+
+def partition_dir(root, hour):
+    return os.path.join(root, f"date={hour:%Y-%m-%d}", f"hour={hour:%H}")
+
+
+def to_table(df):
+    """Convert scored rows to an Arrow table with SCHEMA, parsing text timestamps."""
+    df = df.reindex(columns=SCHEMA.names)
+    for col in ("timestamp", "processed_time"):
+        df[col] = parse_timestamps(df[col])
+    df["fraud_prediction"] = pd.to_numeric(df["fraud_prediction"], errors="coerce").fillna(0)
+    return pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+
+
+def write_partitioned(df, root, name):
+    """Write ``df`` as ``<root>/date=YYYY-MM-DD/hour=HH/<name>.parquet``, one file per hour.
+
+    Each file is written under a hidden temporary name, fsynced and renamed,
+    so readers only ever see complete files. Returns the written paths.
+    """
+    table = to_table(df)
+    times = table.column(PARTITION_COLUMN).to_pandas()
+    # Rows without a usable event time go with the time they were scored
+    times = times.fillna(table.column("processed_time").to_pandas())
+    hours = times.dt.floor("h")
+    paths = []
+    for hour in hours.dropna().unique():
+        rows = (hours == hour).to_numpy()
+        directory = partition_dir(root, hour)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{name}.parquet")
+        tmp_path = os.path.join(directory, f".{name}.parquet.tmp")
+        with open(tmp_path, "wb") as f:
+            pq.write_table(table.filter(pa.array(rows)), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        fsync_directory(directory)
+        paths.append(path)
+    return paths
+
+
+def partitions(root, start=None, end=None):
+    """(hour, directory) of every partition that may hold rows in [start, end]."""
+    found = []
+    for date_dir in glob.glob(os.path.join(root, "date=*")):
+        date_match = PARTITION_PATTERN.search(date_dir)
+        if not date_match:
+            continue
+        for hour_dir in glob.glob(os.path.join(date_dir, "hour=*")):
+            hour_match = HOUR_PATTERN.search(hour_dir)
+            if not hour_match:
+                continue
+            hour = pd.Timestamp(date_match.group(1)) + timedelta(hours=int(hour_match.group(1)))
+            if start is not None and hour + timedelta(hours=1) <= start:
+                continue
+            if end is not None and hour > end:
+                continue
+            found.append((hour, hour_dir))
+    return sorted(found)
+
+
+def part_files(root, start=None, end=None):
+    """Complete Parquet files in the partitions overlapping [start, end]."""
+    files = []
+    for _, directory in partitions(root, start, end):
+        files.extend(sorted(glob.glob(os.path.join(directory, "*.parquet"))))
+    return files
+
+
+def scored_since(path, since):
+    """Whether the file at ``path`` may hold rows processed at or after ``since`` (from its footer statistics)."""
+    metadata = pq.ParquetFile(path).metadata
+    column = metadata.schema.names.index("processed_time")
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column).statistics
+        if stats is None or not stats.has_min_max or pd.Timestamp(stats.max) >= since:
+            return True
+    return False
+
+
+def read_scored(root=PARQUET_DIR, start=None, end=None, columns=None, processed_since=None):
+    """Read scored rows with event time in [start, end], touching only the partitions needed.
+
+    ``processed_since`` also drops rows scored before it; files scored
+    entirely before it are skipped without reading their rows.
+    """
+    files = part_files(root, start, end)
+    if processed_since is not None:
+        processed_since = pd.Timestamp(processed_since)
+        files = [f for f in files if scored_since(f, processed_since)]
+    if not files:
+        return pd.DataFrame(columns=columns or SCHEMA.names)
+    table = pa.concat_tables([pq.read_table(f, columns=columns, schema=SCHEMA) for f in files])
+    df = table.to_pandas()
+    if PARTITION_COLUMN in df.columns:
+        if start is not None:
+            df = df[~(df[PARTITION_COLUMN] < start)]
+        if end is not None:
+            df = df[~(df[PARTITION_COLUMN] > end)]
+    if processed_since is not None and "processed_time" in df.columns:
+        df = df[~(df["processed_time"] < processed_since)]
+    return df.reset_index(drop=True)
+
+
+def read_chunks(path, chunksize=500_000):
+    """Yield DataFrames of up to ``chunksize`` rows from one Parquet file."""
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+def read_chunks_from(path, chunksize=500_000, position=None):
+    """Yield (DataFrame of ``chunksize`` rows, position after it) from one Parquet file.
+
+    A position is ``[row group, row within it]``; passing one back resumes
+    there, decoding only the row groups from it on.
+    """
+    parquet = pq.ParquetFile(path)
+    group_rows = [parquet.metadata.row_group(i).num_rows for i in range(parquet.metadata.num_row_groups)]
+    group, skip = position or (0, 0)
+    batches, rows = [], 0
+
+    def position_after(consumed):
+        # Row group and row within it of the row ``consumed`` rows after the resume point
+        row, i = skip + consumed, group
+        while i < len(group_rows) and row >= group_rows[i]:
+            row -= group_rows[i]
+            i += 1
+        return [i, row]
+
+    consumed, to_skip = 0, skip
+    for batch in parquet.iter_batches(batch_size=chunksize, row_groups=range(group, len(group_rows))):
+        if to_skip:
+            dropped = min(to_skip, batch.num_rows)
+            batch, to_skip = batch.slice(dropped), to_skip - dropped
+        batches.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(batches, parquet.schema_arrow)
+            consumed += chunksize
+            yield table.slice(0, chunksize).to_pandas(), position_after(consumed)
+            batches, rows = table.slice(chunksize).to_batches(), rows - chunksize
+    if rows:
+        consumed += rows
+        yield pa.Table.from_batches(batches, parquet.schema_arrow).to_pandas(), position_after(consumed)
+
+
+def id_chunks(root=PARQUET_DIR):
+    """Yield the transaction_id column of every part file, one Series per file."""
+    for path in part_files(root):
+        yield pq.read_table(path, columns=["transaction_id"]).column(0).to_pandas()
+
+
+def remove_parts_after(root, prefix, batch_id):
+    """Delete ``<prefix>-<n>.parquet`` files with n > batch_id (and leftover temp files).
+
+    Used on recovery to drop batches written after the last checkpoint.
+    Returns the number of part files removed.
+    """
+    pattern = re.compile(rf"^{re.escape(prefix)}-(\d+)\.parquet$")
+    removed = 0
+    for _, directory in partitions(root):
+        for name in os.listdir(directory):
+            if name.startswith(".") and name.endswith(".tmp"):
+                os.remove(os.path.join(directory, name))
+                continue
+            match = pattern.match(name)
+            if match and int(match.group(1)) > batch_id:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+    return removed
@@ -0,0 +1,219 @@
+import json
+import os
+import sqlite3
+
+import pandas as pd
+
+from transaction_schema import format_timestamp, format_timestamps, parse_timestamps
+
+ROLLUP_FILE = "data/rollups.db"
+GRAINS = {"minute": "min", "hour": "h", "day": "D"}  # Table suffix → pandas floor frequency
+KEYS = ["bucket", "transaction_type", "location", "hour"]  # hour: hour of day of the event timestamp (-1 if unknown)
+MEASURES = ["transactions", "frauds", "amount", "fraud_amount"]
+
+SCHEMA = "".join(f"""
+CREATE TABLE IF NOT EXISTS rollup_{grain} (
+    writer TEXT,
+    bucket TEXT,
+    transaction_type TEXT,
+    location TEXT,
+    hour INTEGER,
+    transactions INTEGER,
+    frauds INTEGER,
+    amount REAL,
+    fraud_amount REAL,
+    PRIMARY KEY (writer, bucket, transaction_type, location, hour)
+);
+CREATE INDEX IF NOT EXISTS idx_rollup_{grain}_bucket ON rollup_{grain} (bucket);
+""" for grain in GRAINS) + """
+CREATE TABLE IF NOT EXISTS rollup_batches (
+    writer TEXT PRIMARY KEY,
+    batch_id INTEGER,
+    deltas TEXT
+);
+"""
+
+
+def connect(path=ROLLUP_FILE):
+    """Open the rollups for writing (WAL mode, like sqlite_store, so the dashboard never blocks the scorer)."""
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def connect_readonly(path=ROLLUP_FILE):
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+
+
+def aggregate(df):
+    """Minute-grain rollup rows (KEYS + MEASURES) of scored rows, bucketed by processed_time."""
+    if df.empty:
+        return pd.DataFrame(columns=KEYS + MEASURES)
+    # Output written before a column existed still rolls up (under UNKNOWN / -1)
+    df = df.reindex(columns=["timestamp", "processed_time", "transaction_type", "location", "amount", "fraud_prediction"])
+    fraud = pd.to_numeric(df["fraud_prediction"], errors="coerce").fillna(0).astype("int64")
+    amount = pd.to_numeric(df["amount"], errors="coerce").fillna(0.0)
+    keys = pd.DataFrame({
+        "bucket": parse_timestamps(df["processed_time"]).dt.floor(GRAINS["minute"]),
+        "transaction_type": df["transaction_type"].fillna("UNKNOWN").astype(str),
+        "location": df["location"].fillna("UNKNOWN").astype(str),
+        "hour": parse_timestamps(df["timestamp"]).dt.hour.fillna(-1).astype("int64"),
+    })
+    rows = keys.assign(transactions=1, frauds=fraud, amount=amount, fraud_amount=amount.where(fraud == 1, 0.0))
+    return rows.dropna(subset=["bucket"]).groupby(KEYS, as_index=False)[MEASURES].sum()
+
+
+def _add(conn, minute_rows, writer, sign=1):
+    """Add (or with sign=-1 subtract) minute-grain rows to every grain's table."""
+    if minute_rows.empty:
+        return
+    for grain, freq in GRAINS.items():
+        rows = minute_rows.assign(bucket=minute_rows["bucket"].dt.floor(freq))
+        rows = rows.groupby(KEYS, as_index=False)[MEASURES].sum()
+        rows["bucket"] = format_timestamps(rows["bucket"])
+        values = zip([writer] * len(rows), *(rows[col].tolist() for col in KEYS),
+                     *((rows[col] * sign).tolist() for col in MEASURES))
+        updates = ", ".join(f"{col} = {col} + excluded.{col}" for col in MEASURES)
+        conn.executemany(
+            f"INSERT INTO rollup_{grain} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            f"ON CONFLICT (writer, bucket, transaction_type, location, hour) DO UPDATE SET {updates}", values)
+        if sign < 0:
+            conn.execute(f"DELETE FROM rollup_{grain} WHERE writer = ? AND transactions <= 0", (writer,))
+
+
+def _to_json(minute_rows):
+    rows = minute_rows.assign(bucket=format_timestamps(minute_rows["bucket"]))
+    return json.dumps(rows.to_dict(orient="split")["data"])
+
+
+def _from_json(deltas):
+    rows = pd.DataFrame(json.loads(deltas), columns=KEYS + MEASURES)
+    rows["bucket"] = parse_timestamps(rows["bucket"])
+    return rows
+
+
+def apply_batch(conn, df, writer, batch_id):
+    """Add one scored batch to the rollups in a single transaction.
+
+    The batch's minute-grain deltas are kept with its batch_id, so a batch
+    that is never checkpointed can be taken out again (see undo_after).
+    """
+    minute_rows = aggregate(df)
+    with conn:
+        _add(conn, minute_rows, writer)
+        conn.execute("INSERT OR REPLACE INTO rollup_batches VALUES (?, ?, ?)", (writer, batch_id, _to_json(minute_rows)))
+
+
+def applied_batch(conn, writer):
+    """The last batch_id of ``writer`` in the rollups, or None if it has none."""
+    row = conn.execute("SELECT batch_id FROM rollup_batches WHERE writer = ?", (writer,)).fetchone()
+    return row[0] if row is not None else None
+
+
+def undo_after(conn, writer, batch_id):
+    """Take out ``writer``'s last batch if it is after ``batch_id``. Returns True if it did."""
+    row = conn.execute("SELECT batch_id, deltas FROM rollup_batches WHERE writer = ?", (writer,)).fetchone()
+    if row is None or row[0] <= batch_id or row[0] > batch_id + 1:
+        # Only the batch right after the checkpoint can be uncommitted; anything else needs a rebuild
+        return False
+    with conn:
+        _add(conn, _from_json(row[1]), writer, sign=-1)
+        conn.execute("UPDATE rollup_batches SET batch_id = ?, deltas = '[]' WHERE writer = ?", (batch_id, writer))
+    return True
+
+
+def rebuild(conn, writer, chunks, batch_id):
+    """Replace ``writer``'s rollups with those of the scored DataFrames in ``chunks``, in one transaction."""
+    with conn:
+        for grain in GRAINS:
+            conn.execute(f"DELETE FROM rollup_{grain} WHERE writer = ?", (writer,))
+        for chunk in chunks:
+            _add(conn, aggregate(chunk), writer)
+        conn.execute("INSERT OR REPLACE INTO rollup_batches VALUES (?, ?, '[]')", (writer, batch_id))
+
+
+def _ranges(start, end):
+    """(table, low, high) bucket ranges covering [start, end) exactly, coarsest buckets that fit.
+
+    ``start`` is rounded up and ``end`` down to a whole minute; either may be None (unbounded).
+    """
+    low = start.ceil(GRAINS["minute"]) if start is not None else None
+    high = end.floor(GRAINS["minute"]) if end is not None else None
+    if low is not None and high is not None and low >= high:
+        return [("minute", low, low)]
+    grains = list(GRAINS)
+    ranges, level = [], 0
+    # Minutes up to the next whole hour, hours up to the next whole day...
+    while level < len(grains) - 1:
+        coarser = GRAINS[grains[level + 1]]
+        up = low.ceil(coarser) if low is not None else None
+        if up is not None and high is not None and up > high.floor(coarser):
+            break  # start and end fall in the same coarser bucket
+        if up is not None and up > low:
+            ranges.append((grains[level], low, up))
+        low, level = up, level + 1
+    if high is None:
+        return ranges + [(grains[level], low, None)]
+    # ...then whole buckets of the coarsest grain that fits, and back down to end
+    for grain in reversed(grains[:level + 1]):
+        bound = high.floor(GRAINS[grain])
+        if low is None or bound > low:
+            ranges.append((grain, low, bound))
+            low = bound
+    return ranges
+
+
+def total(path=ROLLUP_FILE, start=None, end=None):
+    """Transactions rolled up by every writer in [start, end) as query() covers it (0 if there are none)."""
+    if start is not None or end is not None:
+        df = query(path, start=start, end=end, by=("hour",))
+        return int(df["transactions"].sum()) if df is not None else 0
+    conn = connect_readonly(path)
+    try:
+        return conn.execute("SELECT COALESCE(SUM(transactions), 0) FROM rollup_day").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def query(path=ROLLUP_FILE, start=None, end=None, by=("bucket",), grain=None, hour=None):
+    """Summed MEASURES grouped by ``by`` (columns of KEYS), over every writer.
+
+    With ``grain`` the rows come from that table only. Without it the range
+    [start, end) is covered exactly to the minute by the coarsest buckets
+    that fit: minutes up to the next whole hour, hours up to the next whole
+    day, whole days, then hours and minutes again up to ``end``. ``hour``
+    keeps one hour of day. Returns None if there are no rollups at ``path``.
+    """
+    if not os.path.exists(path):
+        return None
+    by = list(by)
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    ranges = [(grain, start, end)] if grain is not None else _ranges(start, end)
+    selects, params = [], []
+    for table, low, high in ranges:
+        where = []
+        if low is not None:
+            where.append("bucket >= ?")
+            params.append(format_timestamp(low))
+        if high is not None:
+            where.append("bucket < ?")
+            params.append(format_timestamp(high))
+        if hour is not None:
+            where.append("hour = ?")
+            params.append(int(hour))
+        sql = f"SELECT {', '.join(KEYS + MEASURES)} FROM rollup_{table}"
+        selects.append(sql + (" WHERE " + " AND ".join(where) if where else ""))
+    sums = ", ".join(f"SUM({col}) AS {col}" for col in MEASURES)
+    sql = f"SELECT {', '.join(by)}, {sums} FROM ({' UNION ALL '.join(selects)}) GROUP BY {', '.join(by)}"
+
+    conn = connect_readonly(path)
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    if "bucket" in df.columns:
+        df["bucket"] = parse_timestamps(df["bucket"])
+    return df
@@ -0,0 +1,195 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+KEY_DTYPE = np.dtype("S16")
+MERGE_CHUNK = 1_000_000
+
+
+def id_keys(transaction_ids):
+    """Hash transaction IDs to fixed-width 128-bit keys."""
+    if hasattr(transaction_ids, "tolist"):
+        # Iterating a list is much faster than iterating a Series element-wise
+        transaction_ids = transaction_ids.tolist()
+    return np.array(
+        [hashlib.blake2b(str(tx_id).encode("utf-8"), digest_size=16).digest() for tx_id in transaction_ids],
+        dtype=KEY_DTYPE
+    )
+
+
+def partition_of(transaction_ids, num_partitions):
+    """Deterministically map transaction IDs to a partition in [0, num_partitions)."""
+    keys = id_keys(transaction_ids)
+    return np.frombuffer(keys.tobytes(), dtype="<u8")[::2] % num_partitions
+
+
+def csv_id_chunks(paths, chunksize=500_000, skipped=None):
+    """Yield the transaction_id column of scored CSV files in chunks.
+
+    Files without a transaction_id column are appended to ``skipped``.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        try:
+            chunks = pd.read_csv(path, usecols=["transaction_id"], dtype={"transaction_id": str}, chunksize=chunksize)
+            for chunk in chunks:
+                yield chunk["transaction_id"]
+        except ValueError:
+            # transaction_id column missing - nothing usable to index
+            if skipped is not None:
+                skipped.append(path)
+
+
+class ScoredIdIndex:
+    """On-disk set of transaction IDs that have already been scored.
+
+    IDs are stored as 128-bit hashes in two files: a sorted run that is
+    memory-mapped and binary searched, and a small append-only pending log
+    that is also kept in memory. Once the pending log reaches
+    ``merge_threshold`` keys it is merged into the sorted run, so memory use
+    stays bounded no matter how many transactions have been scored.
+
+    With ``auto_merge=False`` the caller decides when to merge (via
+    ``maybe_merge()``), so that keys only reach the sorted run once they are
+    committed and ``truncate()`` can still roll back the pending log.
+    """
+
+    def __init__(self, directory, merge_threshold=100_000, auto_merge=True):
+        self.directory = directory
+        self.merge_threshold = merge_threshold
+        self.auto_merge = auto_merge
+        self.sorted_path = os.path.join(directory, "ids.sorted")
+        self.pending_path = os.path.join(directory, "ids.pending")
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    def _open(self):
+        if os.path.exists(self.sorted_path) and os.path.getsize(self.sorted_path) >= KEY_DTYPE.itemsize:
+            self._sorted = np.memmap(self.sorted_path, dtype=KEY_DTYPE, mode="r")
+        else:
+            self._sorted = np.empty(0, dtype=KEY_DTYPE)
+        if os.path.exists(self.pending_path):
+            # Drop a torn trailing key left by an interrupted append
+            size = os.path.getsize(self.pending_path)
+            if size % KEY_DTYPE.itemsize:
+                os.truncate(self.pending_path, size - size % KEY_DTYPE.itemsize)
+            pending = np.fromfile(self.pending_path, dtype=KEY_DTYPE)
+            self._pending = set(pending.tolist())
+            self._pending_count = len(pending)
+        else:
+            self._pending = set()
+            self._pending_count = 0
+
+    def __len__(self):
+        return len(self._sorted) + len(self._pending)
+
+    @property
+    def size_on_disk(self):
+        """Number of keys stored in the index files (duplicates included)."""
+        return len(self._sorted) + self._pending_count
+
+    def contains(self, transaction_ids):
+        """Return a boolean array marking which IDs are already in the index."""
+        keys = id_keys(transaction_ids)
+        found = np.array([key in self._pending for key in keys.tolist()], dtype=bool)
+        if len(self._sorted) and len(keys):
+            pos = np.searchsorted(self._sorted, keys)
+            in_range = pos < len(self._sorted)
+            found[in_range] |= self._sorted[pos[in_range]] == keys[in_range]
+        return found
+
+    def add(self, transaction_ids, sync=False):
+        """Record IDs as scored; sync=True fsyncs the pending log before returning."""
+        keys = id_keys(transaction_ids)
+        if not len(keys):
+            return
+        with open(self.pending_path, "ab") as f:
+            f.write(keys.tobytes())
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        self._pending.update(keys.tolist())
+        self._pending_count += len(keys)
+        if self.auto_merge:
+            self.maybe_merge()
+
+    def maybe_merge(self):
+        """Merge the pending log once it has reached merge_threshold keys. Returns True if it did."""
+        if len(self._pending) >= self.merge_threshold:
+            self.merge()
+            return True
+        return False
+
+    def truncate(self, size):
+        """Roll the index back to its first ``size`` keys on disk.
+
+        Only keys still in the pending log can be dropped. Returns False if
+        that is not enough (or the index holds fewer than ``size`` keys),
+        i.e. the index is out of step with whatever recorded that size.
+        """
+        keep = size - len(self._sorted)
+        if self.size_on_disk < size or keep < 0:
+            return False
+        if keep < self._pending_count:
+            os.truncate(self.pending_path, keep * KEY_DTYPE.itemsize)
+            self._open()
+        return True
+
+    def merge(self):
+        """Fold the pending log into the sorted run."""
+        if not self._pending:
+            return
+        pending = np.sort(np.array(list(self._pending), dtype=KEY_DTYPE))
+        # Split points of the pending keys in the existing run, so the merge
+        # only ever holds one chunk of the run in memory
+        split = np.searchsorted(self._sorted, pending)
+        tmp_path = self.sorted_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for start in range(0, max(len(self._sorted), 1), MERGE_CHUNK):
+                stop = start + MERGE_CHUNK
+                chunk = np.asarray(self._sorted[start:stop])
+                lo, hi = np.searchsorted(split, [start, stop])
+                if stop >= len(self._sorted):
+                    hi = len(pending)
+                chunk = np.insert(chunk, split[lo:hi] - start, pending[lo:hi])
+                f.write(chunk.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self._sorted = np.empty(0, dtype=KEY_DTYPE)
+        os.replace(tmp_path, self.sorted_path)
+        # Pending keys are now in the sorted run; a crash before this point
+        # only leaves harmless duplicates behind
+        open(self.pending_path, "wb").close()
+        self._open()
+
+    def clear(self):
+        """Remove every ID from the index."""
+        self._sorted = np.empty(0, dtype=KEY_DTYPE)
+        for path in (self.sorted_path, self.pending_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._open()
+
+    def rebuild(self, id_chunks, id_filter=None):
+        """Replace the index contents with the IDs yielded by ``id_chunks``.
+
+        ``id_filter`` optionally narrows each chunk of IDs before it is added.
+        """
+        self.clear()
+        for ids in id_chunks:
+            ids = ids.dropna()
+            self.add(id_filter(ids) if id_filter is not None else ids)
+            self.maybe_merge()
+        self.merge()
+
+    def rebuild_from_csv(self, paths, chunksize=500_000, id_filter=None):
+        """Populate the index from the transaction_id column of scored CSV files.
+
+        Returns False if any file had no transaction_id column.
+        """
+        skipped = []
+        self.rebuild(csv_id_chunks(paths, chunksize, skipped), id_filter)
+        return not skipped
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+import traceback
+from collections import namedtuple
+from datetime import datetime
+
+REFRESH_SECONDS = float(os.environ.get("DASHBOARD_REFRESH_SECONDS", "2"))  # How often the refresher thread reloads
+
+# data: the shared DataFrame (read-only); version: bumped whenever data changes;
+# loaded: when it was loaded; seconds: how long the load took
+Snapshot = namedtuple("Snapshot", ["data", "version", "loaded", "seconds"])
+
+
+class SharedDataStore:
+    """Datasets loaded once per process and shared by every dashboard session.
+
+    Each dataset is a ``load()`` function registered under a name. A daemon
+    refresher thread calls every loader each ``interval`` seconds and
+    publishes the result as a Snapshot; sessions only read snapshots, so the
+    data is parsed and held once however many browsers are watching. A
+    loader that returns the very same object as before leaves the version
+    unchanged, which lets sessions skip work when nothing arrived.
+
+    Snapshots are shared between threads and must not be modified in
+    place (the dashboard turns on pandas copy-on-write, so a session's
+    column changes land in its own copy). Loads run one at a time, and
+    ``state`` holds whatever a loader keeps between calls (readers, caches).
+    """
+
+    def __init__(self, interval=REFRESH_SECONDS):
+        self.interval = interval
+        self.loaders = {}
+        self.snapshots = {}
+        self.state = {}
+        self.errors = {}  # name → last load error, cleared by the next successful load
+        self.load_count = 0
+        self._load_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def register(self, name, load):
+        self.loaders[name] = load
+        return self
+
+    def refresh(self, name):
+        """Run the loader for ``name`` now and publish its result. Returns the new Snapshot."""
+        with self._load_lock:
+            started = time.monotonic()
+            data = self.loaders[name]()
+            previous = self.snapshots.get(name)
+            if previous is not None and previous.data is data:
+                version = previous.version
+            else:
+                version = previous.version + 1 if previous is not None else 1
+            snapshot = Snapshot(data, version, datetime.now(), time.monotonic() - started)
+            # A single reference assignment: readers see either the old or the new snapshot
+            self.snapshots[name] = snapshot
+            self.errors.pop(name, None)
+            self.load_count += 1
+            return snapshot
+
+    def get(self, name):
+        """The latest Snapshot of ``name``, loading it first if this is the first request."""
+        snapshot = self.snapshots.get(name)
+        if snapshot is None:
+            snapshot = self.refresh(name)
+        return snapshot
+
+    def start(self):
+        """Start the refresher thread (once). Returns the store."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="shared-store-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for name in list(self.loaders):
+                try:
+                    self.refresh(name)
+                except Exception as e:
+                    # Keep serving the last good snapshot; the next round tries again
+                    if name not in self.errors:
+                        traceback.print_exc()
+                    self.errors[name] = f"{type(e).__name__}: {e}"
+
+    def stats(self):
+        """Snapshot ages, sizes and load times, for the dashboard's diagnostics."""
+        now = datetime.now()
+        return {
+            name: {
+                "version": s.version,
+                "rows": len(s.data),
+                "age_seconds": round((now - s.loaded).total_seconds(), 1),
+                "load_seconds": round(s.seconds, 3),
+                "error": self.errors.get(name),
+            }
+            for name, s in self.snapshots.items()
+        }
@@ -0,0 +1,193 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+from transaction_schema import format_timestamp, format_timestamps, parse_timestamps
+
+SQLITE_FILE = "data/scored_transactions.db"
+
+COLUMNS = [
+    "transaction_id", "timestamp", "processed_time",
+    "sender_account", "receiver_account", "amount",
+    "transaction_type", "location",
+    "fraud_prediction", "fraud_probability", "model_version",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    transaction_id TEXT PRIMARY KEY,
+    timestamp TEXT,
+    processed_time TEXT,
+    sender_account TEXT,
+    receiver_account TEXT,
+    amount REAL,
+    transaction_type TEXT,
+    location TEXT,
+    fraud_prediction INTEGER,
+    fraud_probability REAL,
+    model_version TEXT,
+    writer TEXT,
+    batch_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_transactions_processed_time ON transactions (processed_time);
+CREATE INDEX IF NOT EXISTS idx_transactions_sender_account ON transactions (sender_account);
+CREATE INDEX IF NOT EXISTS idx_transactions_receiver_account ON transactions (receiver_account);
+CREATE INDEX IF NOT EXISTS idx_transactions_fraud_prediction ON transactions (fraud_prediction, processed_time);
+CREATE INDEX IF NOT EXISTS idx_transactions_writer_batch ON transactions (writer, batch_id);
+"""
+
+
+def connect(path=SQLITE_FILE):
+    """Open the store for writing, creating it if needed.
+
+    WAL mode lets the dashboard read while the scorer writes: readers see
+    the last committed batch and never block the writer. synchronous=FULL
+    makes each committed batch durable before the scorer checkpoints it.
+    The connection may be used from another thread than the one that
+    opened it (the --pipeline write stage), one thread at a time.
+    """
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def connect_readonly(path=SQLITE_FILE):
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+
+
+def format_times(values):
+    # Stored as millisecond text, which sorts (and range-scans) in time order
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return format_timestamps(values)
+    return values.astype(str)
+
+
+def insert_batch(conn, df, writer, batch_id):
+    """Insert one scored batch in a single transaction (rows already stored are skipped)."""
+    df = df.reindex(columns=COLUMNS)
+    df["timestamp"] = format_times(df["timestamp"])
+    df["processed_time"] = format_times(df["processed_time"])
+    df["writer"] = writer
+    df["batch_id"] = batch_id
+    # tolist() gives plain Python values, which sqlite3 binds directly
+    rows = zip(*(df[col].tolist() for col in df.columns))
+    placeholders = ", ".join("?" * (len(COLUMNS) + 2))
+    with conn:
+        conn.executemany(f"INSERT OR IGNORE INTO transactions VALUES ({placeholders})", rows)
+
+
+def delete_after(conn, writer, batch_id):
+    """Delete rows ``writer`` inserted in batches after ``batch_id``. Returns the row count.
+
+    Deleting rows bumps the store's generation, so readers following it
+    with rows_after() know to read it again from the start.
+    """
+    with conn:
+        cursor = conn.execute("DELETE FROM transactions WHERE writer = ? AND batch_id > ?", (writer, batch_id))
+        if cursor.rowcount:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            conn.execute(f"PRAGMA user_version = {int(version) + 1}")
+    return cursor.rowcount
+
+
+def generation(path=SQLITE_FILE):
+    """Counter bumped whenever rows are deleted (kept in the header, so reading it is one page read)."""
+    conn = connect_readonly(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def id_chunks(path=SQLITE_FILE, chunksize=500_000):
+    """Yield stored transaction IDs in chunks."""
+    if not os.path.exists(path):
+        return
+    conn = connect_readonly(path)
+    try:
+        for chunk in pd.read_sql_query("SELECT transaction_id FROM transactions", conn, chunksize=chunksize):
+            yield chunk["transaction_id"]
+    finally:
+        conn.close()
+
+
+def _filters(start=None, end=None, sender_account=None, receiver_account=None, fraud_only=False, writer=None,
+             processed_since=None, hour=None):
+    where, params = [], []
+    if start is not None:
+        where.append("timestamp >= ?")
+        params.append(format_timestamp(pd.Timestamp(start)))
+    if end is not None:
+        where.append("timestamp <= ?")
+        params.append(format_timestamp(pd.Timestamp(end)))
+    if processed_since is not None:
+        where.append("processed_time >= ?")
+        params.append(format_timestamp(pd.Timestamp(processed_since)))
+    if sender_account is not None:
+        where.append("sender_account = ?")
+        params.append(sender_account)
+    if receiver_account is not None:
+        where.append("receiver_account = ?")
+        params.append(receiver_account)
+    if fraud_only:
+        where.append("fraud_prediction = 1")
+    if writer is not None:
+        where.append("writer = ?")
+        params.append(writer)
+    if hour is not None:
+        # Not indexed; only narrows rows the other filters found
+        where.append("CAST(substr(timestamp, 12, 2) AS INTEGER) = ?")
+        params.append(int(hour))
+    return where, params
+
+
+def _read(path, sql, params):
+    conn = connect_readonly(path)
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    for col in ("timestamp", "processed_time"):
+        df[col] = parse_timestamps(df[col])
+    return df
+
+
+def query(path=SQLITE_FILE, start=None, end=None, sender_account=None, fraud_only=False, limit=None, writer=None,
+          processed_since=None, receiver_account=None, hour=None):
+    """Scored rows matching the filters (the newest ``limit`` processed, if given).
+
+    ``start``/``end`` bound the event time, ``processed_since`` the time the
+    row was scored and ``hour`` the hour of day of the event. Every filter
+    but ``hour`` maps to an index, so only matching rows are read.
+    """
+    where, params = _filters(start, end, sender_account, receiver_account, fraud_only, writer, processed_since, hour)
+    sql = f"SELECT {', '.join(COLUMNS)} FROM transactions"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if limit is not None:
+        # Otherwise rows come back in index order and the caller sorts them
+        sql += f" ORDER BY processed_time DESC LIMIT {int(limit)}"
+    return _read(path, sql, params)
+
+
+def rows_after(path=SQLITE_FILE, row=0, processed_since=None):
+    """Rows inserted after rowid ``row``, in insert order, and the last rowid in the table.
+
+    Inserts only ever add rowids above the current largest, so a reader can
+    follow the table like a growing file until generation() changes.
+    """
+    where, params = _filters(processed_since=processed_since)
+    sql = f"SELECT {', '.join(COLUMNS)} FROM transactions WHERE " + " AND ".join(["rowid > ?"] + where)
+    conn = connect_readonly(path)
+    try:
+        # Read the last rowid first: rows committed in between are picked up next time
+        last = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM transactions").fetchone()[0]
+    finally:
+        conn.close()
+    if last <= row:
+        return pd.DataFrame(columns=COLUMNS), row
+    return _read(path, sql + " AND rowid <= ?", [row] + params + [last]), last
@@ -0,0 +1,86 @@
+import json
+import time
+from datetime import datetime
+
+from checkpoint import atomic_write_bytes
+from stream_segments import committed_offset
+
+QUEUE_METRICS_FILE = "data/stream_queue_metrics.json"  # Backlog and lag, rewritten after every put
+POLICIES = ("block", "drop-oldest")
+BLOCK_POLL_SECONDS = 0.5  # How often a blocked producer re-checks the consumer's progress
+
+
+class BoundedStreamQueue:
+    """Bounded, file-backed queue between the simulator and the scorer.
+
+    The queue is the segmented stream itself: ``put`` appends through a
+    SegmentWriter, and a row leaves the queue once every scorer checkpoint
+    has committed past it. The backlog in between is capped at
+    ``capacity`` rows. When a put would overflow it, the ``block`` policy
+    waits for the scorer to catch up, while ``drop-oldest`` discards the
+    oldest unread segments. Segments are capped at a quarter of the
+    capacity, so a drop never throws away the whole backlog at once.
+
+    Backlog, fill level, drops and time spent blocked are written to
+    ``metrics_file`` after every put for the dashboard.
+    """
+
+    def __init__(self, writer, capacity, policy="block", metrics_file=QUEUE_METRICS_FILE):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, got {policy!r}")
+        self.writer = writer
+        self.capacity = capacity
+        self.policy = policy
+        self.metrics_file = metrics_file
+        self.blocked_seconds = 0.0
+        self.put_rows = 0
+        if policy == "drop-oldest" and writer.max_rows is None:
+            writer.max_rows = max(1, capacity // 4)
+
+    def committed(self):
+        """Stream offset the slowest scorer has committed (the start of the stream before any has)."""
+        offset = committed_offset(self.writer.directory, self.writer.checkpoint_glob)
+        segments = self.writer.manifest["segments"]
+        floor = segments[0]["start"] if segments else self.writer.manifest["next_start"]
+        return max(offset or 0, floor)
+
+    def put(self, df):
+        """Append ``df`` once the backlog has room for it (or after dropping the oldest rows)."""
+        backlog, _ = self.writer.backlog(self.committed())
+        if backlog + len(df) > self.capacity:
+            if self.policy == "block":
+                started = time.monotonic()
+                # A batch bigger than the whole capacity still goes through once the queue is empty
+                while backlog and backlog + len(df) > self.capacity:
+                    self.export(blocked=True)
+                    time.sleep(BLOCK_POLL_SECONDS)
+                    backlog, _ = self.writer.backlog(self.committed())
+                self.blocked_seconds += time.monotonic() - started
+            else:
+                dropped = self.writer.drop_oldest(backlog + len(df) - self.capacity, self.committed())
+                print(f"🗑️ Stream queue full: dropped {dropped:,} unread rows")
+        self.writer.append(df)
+        self.put_rows += len(df)
+        self.export()
+
+    def lag(self):
+        """Current backlog between the producer and the slowest scorer."""
+        committed = self.committed()
+        rows, size = self.writer.backlog(committed)
+        return {
+            "backlog_rows": rows,
+            "backlog_bytes": size,
+            "capacity_rows": self.capacity,
+            "fill": round(rows / self.capacity, 4) if self.capacity else None,
+            "producer_offset": self.writer.end_offset,
+            "consumer_offset": committed,
+            "policy": self.policy,
+            "dropped_rows": self.writer.manifest.get("dropped_rows", 0),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "put_rows": self.put_rows,
+        }
+
+    def export(self, blocked=False):
+        """Write lag() (plus whether the producer is blocked right now) to metrics_file."""
+        state = {"updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3], "blocked": blocked, **self.lag()}
+        atomic_write_bytes(self.metrics_file, json.dumps(state, indent=2).encode("utf-8"))
@@ -0,0 +1,216 @@
+import csv
+import io
+import os
+import threading
+import zlib
+
+import pandas as pd
+
+FINGERPRINT_BYTES = 4096  # Bytes before the read position re-checked to notice a file rewritten past it
+
+
+class CsvTailReader:
+    """Incrementally read rows appended to a CSV file.
+
+    The reader remembers the header of the file and two byte offsets: the
+    read ``position``, where the next poll starts parsing, and the committed
+    ``offset``, up to which rows have been fully processed. Each poll only
+    parses the bytes appended since the previous one. A trailing line without
+    a newline is still being written by the producer and is left in place
+    until the next poll.
+
+    A file that shrank below the read position, or whose bytes just before
+    it changed (truncated and then appended to again, as after scorer
+    recovery), is read again from the start rather than from mid-row.
+    """
+
+    def __init__(self, path, offset=0, header=None):
+        self.path = path
+        self.offset = offset
+        self.position = offset
+        self.header = header
+        self._fingerprint = None  # CRC of the bytes before position, once this reader has read them
+
+    def _read_header(self, f):
+        f.seek(0)
+        line = f.readline()
+        if not line.endswith(b"\n"):
+            return None
+        return next(csv.reader([line.decode("utf-8").rstrip("\r\n")]))
+
+    def reset(self):
+        """Start again from the beginning of the file (e.g. after truncation)."""
+        self.offset = 0
+        self.position = 0
+        self.header = None
+        self._fingerprint = None
+
+    def _read_fingerprint(self, f):
+        start = max(0, self.position - FINGERPRINT_BYTES)
+        f.seek(start)
+        return zlib.crc32(f.read(self.position - start))
+
+    def rewritten(self):
+        """True if the bytes before the read position are no longer the ones this reader parsed."""
+        if self._fingerprint is None:
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                return self._read_fingerprint(f) != self._fingerprint
+        except FileNotFoundError:
+            return True
+
+    def read_new(self, **read_csv_kwargs):
+        """Return a DataFrame with the complete rows appended since the last read."""
+        if not os.path.exists(self.path):
+            return pd.DataFrame()
+
+        size = os.path.getsize(self.path)
+        if size < self.position or self.rewritten():
+            # File was truncated or replaced underneath us
+            self.reset()
+
+        with open(self.path, "rb") as f:
+            if self.header is None:
+                self.header = self._read_header(f)
+                if self.header is None:
+                    return pd.DataFrame()
+                if self.position == 0:
+                    self.offset = self.position = f.tell()
+            f.seek(self.position)
+            data = f.read(size - self.position)
+
+            # Only parse up to the last complete line
+            end = data.rfind(b"\n")
+            if end < 0:
+                return pd.DataFrame(columns=self.header)
+            self.position += end + 1
+            self._fingerprint = self._read_fingerprint(f)
+
+        return pd.read_csv(
+            io.BytesIO(data[:end + 1]),
+            header=None,
+            names=self.header,
+            **read_csv_kwargs
+        )
+
+    def commit(self, offset=None):
+        """Mark rows up to ``offset`` (default: everything read so far) as processed."""
+        self.offset = self.position if offset is None else offset
+
+
+class ChunkedFrame:
+    """Rows appended as DataFrame chunks, concatenated only when asked for.
+
+    Chunks are merged by size class: a chunk is folded into the one before
+    it while that one is at most twice its size, so there are O(log n)
+    chunks and each row is copied O(log n) times over its life, rather than
+    every held row on every append. ``since(rows)``
+    concatenates only the chunks after the first ``rows`` rows, and
+    ``frame()`` consolidates everything once, until more rows are appended.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, df):
+        if df.empty:
+            return
+        self.chunks.append(df)
+        self.rows += len(df)
+        while len(self.chunks) > 1 and len(self.chunks[-2]) <= 2 * len(self.chunks[-1]):
+            last = self.chunks.pop()
+            self.chunks[-1] = pd.concat([self.chunks[-1], last], ignore_index=True)
+
+    def frame(self):
+        """Every row as one DataFrame (empty if there are none)."""
+        if len(self.chunks) > 1:
+            self.chunks = [pd.concat(self.chunks, ignore_index=True)]
+        return self.chunks[0] if self.chunks else pd.DataFrame()
+
+    def since(self, rows):
+        """The rows after the first ``rows`` as one DataFrame."""
+        if rows <= 0:
+            return self.frame()
+        parts, end = [], self.rows
+        for chunk in reversed(self.chunks):
+            if end <= rows:
+                break
+            start = end - len(chunk)
+            parts.append(chunk.iloc[max(rows - start, 0):])
+            end = start
+        if not parts:
+            return self.chunks[-1].iloc[:0] if self.chunks else pd.DataFrame()
+        return parts[0] if len(parts) == 1 else pd.concat(parts[::-1], ignore_index=True)
+
+
+class CachedCsvReader:
+    """Keep a growing CSV file parsed in memory, parsing only the rows appended since the last read.
+
+    ``transform`` (e.g. transaction_schema.apply_schema) is applied to each
+    batch of new rows, so the cached frame is already typed. A file that
+    shrank, was replaced (new inode) or was rewritten past the read position
+    (see CsvTailReader) is parsed again from the start, and
+    ``generation`` is bumped so callers holding derived data know to rebuild
+    it. Appended rows are kept as chunks (see ChunkedFrame), so a poll costs
+    O(rows appended); callers that already hold the first rows use
+    read_since. One reader can be shared by several threads (e.g. Streamlit
+    sessions).
+    """
+
+    def __init__(self, path, transform=None, **read_csv_kwargs):
+        self.path = path
+        self.transform = transform
+        self.read_csv_kwargs = read_csv_kwargs
+        self.generation = 0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.tail = CsvTailReader(self.path)
+        self._rows = ChunkedFrame()
+        self._stat = None
+        self.generation += 1
+
+    def snapshot(self):
+        """(inode, size, mtime) of the file, or None if it is missing. Cheap: one stat call."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _update(self):
+        stat = self.snapshot()
+        if stat is None:
+            if self._stat is not None:
+                self.reset()
+            return
+        if stat != self._stat:
+            if self._stat is not None and (stat[0] != self._stat[0] or stat[1] < self.tail.position
+                                           or self.tail.rewritten()):
+                self.reset()
+            new = self.tail.read_new(**self.read_csv_kwargs)
+            if len(new):
+                if self.transform is not None:
+                    new = self.transform(new)
+                self._rows.append(new)
+            self._stat = stat
+
+    def read_pandas(self):
+        """The whole file as a DataFrame. Returns the cached frame if the file is unchanged."""
+        with self._lock:
+            self._update()
+            # Shallow copy: callers may add or replace columns without touching the shared frame
+            return self._rows.frame().copy(deep=False)
+
+    def read_since(self, generation, rows):
+        """(generation, row count, new rows): the rows after the first ``rows`` if ``generation`` is current, else all."""
+        with self._lock:
+            self._update()
+            since = rows if generation == self.generation else 0
+            return self.generation, len(self._rows), self._rows.since(since).copy(deep=False)
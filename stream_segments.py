@@ -0,0 +1,345 @@
+import csv
+import glob
+import io
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from checkpoint import atomic_write_bytes, load_checkpoint
+from compressed_io import DEFAULT_CODEC, compress_file, open_read
+from stream_reader import CsvTailReader
+
+SEGMENT_DIR = "data/stream_segments"
+MANIFEST_FILENAME = "manifest.json"
+MAX_SEGMENT_BYTES = 16 * 1024 * 1024  # Rotate once the active segment reaches this size...
+MAX_SEGMENT_AGE = 3600  # ...or this many seconds, whichever comes first
+
+
+def manifest_path(directory):
+    return os.path.join(directory, MANIFEST_FILENAME)
+
+
+def load_manifest(directory):
+    """The segment list (oldest first; entries have name, start, bytes, rows, sealed, created and
+    compression, the codec of a sealed segment or None)
+    plus the number and start offset of the next segment, which survive compaction,
+    and the number of rows dropped unread by a full BoundedStreamQueue."""
+    try:
+        with open(manifest_path(directory)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"segments": [], "next_number": 1, "next_start": 0, "dropped_rows": 0}
+
+
+def save_manifest(directory, manifest):
+    atomic_write_bytes(manifest_path(directory), json.dumps(manifest, indent=2).encode("utf-8"))
+
+
+def committed_offset(directory, checkpoint_glob):
+    """Lowest stream offset committed by the scorer checkpoints reading ``directory``, or None.
+
+    Only checkpoints of the current shard layout (that of the most recently
+    saved checkpoint) count: those left by a run with another --workers
+    count never advance again and would hold the offset back for good.
+    """
+    checkpoints = []
+    for path in glob.glob(checkpoint_glob):
+        checkpoint = load_checkpoint(path)
+        if checkpoint is not None and checkpoint.get("input_file") == directory:
+            # Checkpoints from before the layout was recorded are unsharded
+            checkpoints.append((os.path.getmtime(path), checkpoint.get("num_shards", 1), checkpoint["input_offset"]))
+    if not checkpoints:
+        return None
+    layout = max(checkpoints)[1]
+    return min(offset for _, num_shards, offset in checkpoints if num_shards == layout)
+
+
+class SegmentWriter:
+    """Append stream rows to size- or time-rotated CSV segment files.
+
+    Positions in the stream are byte offsets that keep counting across
+    segments: each manifest entry records the ``start`` offset of its
+    segment, so readers (and the scorer checkpoint) use one integer offset
+    no matter how many segments there are. Rows are written whole, and a
+    segment is fsynced before the manifest marks it sealed, so a sealed
+    segment is complete and never changes again.
+
+    With ``compression`` set (zstd by default), a segment is compressed as
+    it is sealed; ``bytes`` and offsets still count uncompressed bytes.
+
+    Only the writer updates the manifest, so compaction runs here too:
+    when a segment is sealed, every sealed segment the scorer checkpoints
+    have read past is deleted, or moved to ``archive_dir`` if given.
+    """
+
+    def __init__(self, directory=SEGMENT_DIR, max_bytes=MAX_SEGMENT_BYTES, max_age=MAX_SEGMENT_AGE,
+                 checkpoint_glob="data/scorer_checkpoint*.json", archive_dir=None, compression=DEFAULT_CODEC,
+                 max_rows=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_rows = max_rows  # Optional row limit per segment (see BoundedStreamQueue)
+        self.checkpoint_glob = checkpoint_glob
+        self.archive_dir = archive_dir
+        self.compression = compression
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = load_manifest(directory)
+        self._opened = time.monotonic()
+        if self.active is not None:
+            self._trim_partial_line(self._path(self.active))
+
+    def _trim_partial_line(self, path):
+        """Cut a row left half-written by a crash, so the next append starts on a fresh line."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                data = data[:data.rfind(b"\n") + 1]
+                f.truncate(len(data))
+        # The manifest only records rows when a segment is sealed; recount the resumed one
+        self.active["rows"] = max(data.count(b"\n") - 1, 0)
+
+    @property
+    def active(self):
+        segments = self.manifest["segments"]
+        return segments[-1] if segments and not segments[-1]["sealed"] else None
+
+    def _path(self, segment):
+        return os.path.join(self.directory, segment["name"])
+
+    def _size(self, segment):
+        """Uncompressed bytes in ``segment`` so far (the active one is still growing)."""
+        if segment["sealed"]:
+            return segment["bytes"]
+        path = self._path(segment)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    @property
+    def end_offset(self):
+        """Stream offset just past the last row written."""
+        segment = self.active
+        return self.manifest["next_start"] if segment is None else segment["start"] + self._size(segment)
+
+    def _unread(self, segment, committed):
+        """(rows, bytes) of ``segment`` past ``committed``; rows of a partly read segment
+        are estimated from the share of its bytes still unread."""
+        size = self._size(segment)
+        unread = segment["start"] + size - max(committed, segment["start"])
+        if unread <= 0:
+            return 0, 0
+        return round(segment["rows"] * unread / size), unread
+
+    def backlog(self, committed):
+        """(rows, bytes) written but not yet read past ``committed``."""
+        unread = [self._unread(segment, committed) for segment in self.manifest["segments"]]
+        return sum(rows for rows, _ in unread), sum(size for _, size in unread)
+
+    def _open_segment(self):
+        number = self.manifest["next_number"]
+        segment = {
+            "name": f"segment-{number:08d}.csv",
+            "start": self.manifest["next_start"],
+            "bytes": 0,
+            "rows": 0,
+            "sealed": False,
+            "compression": None,
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.manifest["segments"].append(segment)
+        self.manifest["next_number"] = number + 1
+        save_manifest(self.directory, self.manifest)
+        self._opened = time.monotonic()
+        return segment
+
+    def seal(self):
+        """Seal the active segment (if any) and compact what the scorer has finished with."""
+        segment = self.active
+        if segment is None:
+            return
+        path = self._path(segment)
+        if not os.path.exists(path):
+            open(path, "wb").close()
+        with open(path, "rb+") as f:
+            os.fsync(f.fileno())
+        segment["bytes"] = os.path.getsize(path)
+        if self.compression:
+            # Readers switch to the compressed copy when the manifest names it
+            segment["name"] = os.path.basename(compress_file(path, self.compression))
+            segment["compression"] = self.compression
+        segment["sealed"] = True
+        self.manifest["next_start"] = segment["start"] + segment["bytes"]
+        save_manifest(self.directory, self.manifest)
+        if self.compression:
+            os.remove(path)
+        self.compact()
+
+    def append(self, df):
+        """Append rows to the active segment, rotating it first if it is full or old."""
+        segment = self.active
+        if segment is not None:
+            size = os.path.getsize(self._path(segment)) if os.path.exists(self._path(segment)) else 0
+            # An active segment left by a previous run is resumed; its age restarts
+            full = size >= self.max_bytes or (self.max_rows is not None and segment["rows"] >= self.max_rows)
+            if full or time.monotonic() - self._opened >= self.max_age:
+                self.seal()
+                segment = None
+        if segment is None:
+            segment = self._open_segment()
+        path = self._path(segment)
+        data = df.to_csv(index=False, header=not os.path.exists(path) or os.path.getsize(path) == 0)
+        # One write per call, so only the last line can ever be incomplete
+        with open(path, "ab") as f:
+            f.write(data.encode("utf-8"))
+        segment["rows"] += len(df)
+
+    def compact(self):
+        """Drop sealed segments wholly before every scorer's committed offset. Returns how many."""
+        committed = committed_offset(self.directory, self.checkpoint_glob)
+        if committed is None:
+            return 0
+        keep, done = [], []
+        for segment in self.manifest["segments"]:
+            if segment["sealed"] and segment["start"] + segment["bytes"] <= committed and not keep:
+                done.append(segment)
+            else:
+                keep.append(segment)
+        if not done:
+            return 0
+        self._discard(done, keep)
+        return len(done)
+
+    def drop_oldest(self, rows, committed):
+        """Discard the oldest segments not yet read past ``committed`` until at least ``rows``
+        unread rows are gone (whole segments, sealing the active one if it has to go).
+
+        Readers positioned inside a dropped segment skip ahead to the next one.
+        Returns the number of unread rows dropped.
+        """
+        dropped, done = 0, []
+        for segment in list(self.manifest["segments"]):
+            if dropped >= rows:
+                break
+            if not segment["sealed"]:
+                self.seal()
+            dropped += self._unread(segment, committed)[0]
+            done.append(segment)
+        if not done:
+            return 0
+        self.manifest["dropped_rows"] = self.manifest.get("dropped_rows", 0) + dropped
+        self._discard(done, [segment for segment in self.manifest["segments"] if segment not in done])
+        return dropped
+
+    def _discard(self, done, keep):
+        """Remove ``done`` from the manifest, then delete (or archive) their files."""
+        # Manifest first: a crash part-way leaves stray files, never a manifest pointing at missing ones
+        self.manifest["segments"] = keep
+        save_manifest(self.directory, self.manifest)
+        for segment in done:
+            path = self._path(segment)
+            if not os.path.exists(path):
+                continue
+            if self.archive_dir:
+                os.makedirs(self.archive_dir, exist_ok=True)
+                shutil.move(path, os.path.join(self.archive_dir, segment["name"]))
+            else:
+                os.remove(path)
+
+
+def read_sealed_segment(path, offset, **read_csv_kwargs):
+    """Parse a compressed sealed segment from uncompressed byte ``offset`` to its end.
+
+    The segment is decompressed as a stream; bytes before ``offset`` are
+    skipped without being kept. Returns (DataFrame, offset of the end).
+    """
+    with open_read(path) as f:
+        data = f.read(io.DEFAULT_BUFFER_SIZE)
+        header_end = data.find(b"\n") + 1
+        while not header_end and data:
+            more = f.read(io.DEFAULT_BUFFER_SIZE)
+            if not more:
+                break
+            data += more
+            header_end = data.find(b"\n") + 1
+        if not header_end:
+            return pd.DataFrame(), offset
+        names = next(csv.reader([data[:header_end].decode("utf-8").rstrip("\r\n")]))
+        offset = max(offset, header_end)
+        consumed = len(data)
+        if consumed < offset:
+            # Skip the rows already read, in bounded chunks
+            remaining = offset - consumed
+            while remaining > 0:
+                skipped = f.read(min(remaining, 1 << 20))
+                if not skipped:
+                    break
+                remaining -= len(skipped)
+            rest = f.read()
+        else:
+            rest = data[offset:] + f.read()
+    end = offset + len(rest)
+    if not rest:
+        return pd.DataFrame(columns=names), end
+    return pd.read_csv(io.BytesIO(rest), header=None, names=names, **read_csv_kwargs), end
+
+
+class SegmentedStreamReader:
+    """Read a segmented stream with the same interface as CsvTailReader.
+
+    ``offset`` and ``position`` are stream-wide byte offsets (see
+    SegmentWriter). Only the segment holding ``position`` is opened, so a
+    poll costs the same however many segments exist. Sealed segments are
+    read to the end before moving on to the next one.
+    """
+
+    def __init__(self, directory=SEGMENT_DIR, offset=0):
+        self.path = directory
+        self.offset = offset
+        self.position = offset
+        self._segment = None
+        self._reader = None
+
+    def _current_segment(self, segments):
+        for segment in segments:
+            if segment["sealed"] and self.position >= segment["start"] + segment["bytes"]:
+                continue
+            if self.position < segment["start"]:
+                # The segments before this one have been compacted away
+                print(f"⚠️ Stream offset {self.position:,} was compacted; resuming at {segment['start']:,}")
+                self.position = segment["start"]
+            return segment
+        return None
+
+    def read_new(self, **read_csv_kwargs):
+        """Return a DataFrame with the complete rows appended since the last read."""
+        frames = []
+        while True:
+            segment = self._current_segment(load_manifest(self.path)["segments"])
+            if segment is None:
+                break
+            path = os.path.join(self.path, segment["name"])
+            if segment.get("compression"):
+                df, end = read_sealed_segment(path, self.position - segment["start"], **read_csv_kwargs)
+                self.position = segment["start"] + end
+                self._segment = self._reader = None
+            else:
+                if self._segment != segment["name"]:
+                    self._segment = segment["name"]
+                    self._reader = CsvTailReader(path, offset=self.position - segment["start"])
+                df = self._reader.read_new(**read_csv_kwargs)
+                self.position = segment["start"] + self._reader.position
+            if len(df):
+                frames.append(df)
+            if not segment["sealed"] or self.position < segment["start"] + segment["bytes"]:
+                break
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def commit(self, offset=None):
+        """Mark rows up to ``offset`` (default: everything read so far) as processed."""
+        self.offset = self.position if offset is None else offset
@@ -0,0 +1,53 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from stream_segments import SegmentWriter
+from synthetic import make_transactions
+
+
+@pytest.fixture
+def scorer_dir(tmp_path):
+    """A scratch working directory with the legacy model and an empty data/ folder, for running the scorer."""
+    (tmp_path / "data").mkdir()
+    shutil.copy(os.path.join(ROOT, "xgboost_fraud_model.joblib"), tmp_path)
+    return tmp_path
+
+
+def write_stream(directory, rows, seed=42):
+    """Append ``rows`` (a DataFrame, or a count of synthetic transactions) to the stream segments in
+    ``directory``/data, as data_simulator.py does. Returns the appended rows."""
+    df = make_transactions(rows, seed=seed) if isinstance(rows, int) else rows
+    writer = SegmentWriter(str(directory / "data" / "stream_segments"),
+                           checkpoint_glob=str(directory / "data" / "scorer_checkpoint*.json"))
+    writer.append(df)
+    return df
+
+
+def scorer_command(*args):
+    return [sys.executable, os.path.join(ROOT, "03_processor_scorer.py"), *args]
+
+
+def scorer_env():
+    return dict(os.environ, PYTHONPATH=ROOT, PYTHONIOENCODING="utf-8")
+
+
+def start_scorer(directory, *args):
+    """Start 03_processor_scorer.py in ``directory`` in the background (output discarded)."""
+    return subprocess.Popen(scorer_command(*args), cwd=directory, env=scorer_env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def run_scorer(directory, *args):
+    """Run 03_processor_scorer.py --once in ``directory`` and return its output as text."""
+    result = subprocess.run(scorer_command("--once", *args), cwd=directory, env=scorer_env(),
+                            capture_output=True, text=True, timeout=600)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
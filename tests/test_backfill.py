@@ -0,0 +1,38 @@
+import json
+
+import pandas as pd
+
+from conftest import run_scorer
+from synthetic import make_transactions
+
+
+def run_backfill(directory):
+    return run_scorer(directory, "--mode", "backfill", "--input", "data/history.csv",
+                      "--output", "data/backfill", "--chunksize", "100")
+
+
+def test_resume_seeks_past_finished_chunks(scorer_dir):
+    path = scorer_dir / "data" / "history.csv"
+    make_transactions(1050, seed=7).to_csv(path, index=False)
+    run_backfill(scorer_dir)
+
+    # Interrupted after chunks 0-3 and 5: chunk 4 and everything after it still to do
+    progress_file = scorer_dir / "data" / "backfill" / "_backfill_progress.json"
+    progress = json.loads(progress_file.read_text())
+    finished = [0, 1, 2, 3, 5]
+    progress["done"]["0"] = finished
+    progress["positions"]["0"] = {str(chunk): progress["positions"]["0"][str(chunk)] for chunk in finished}
+    progress_file.write_text(json.dumps(progress))
+
+    # Finished rows are seeked past, not parsed: make them unparseable (same length, so offsets hold)
+    data = path.read_bytes()
+    prefix_end = progress["positions"]["0"]["3"]
+    header_end = data.index(b"\n") + 1
+    garbled = bytes(b if b == ord("\n") else ord(",") for b in data[header_end:prefix_end])
+    path.write_bytes(data[:header_end] + garbled + data[prefix_end:])
+
+    output = run_backfill(scorer_dir)
+    scored_chunks = [line.split(" chunk ")[1].split(":")[0] for line in output.splitlines() if " chunk " in line]
+    assert sorted(scored_chunks, key=int) == ["4", "6", "7", "8", "9", "10"]
+    scored = pd.read_parquet(scorer_dir / "data" / "backfill")
+    assert len(scored) == 1050 and scored["transaction_id"].is_unique
@@ -0,0 +1,30 @@
+import broker
+from broker import FileBroker
+from synthetic import make_transactions
+
+
+def test_file_broker_redelivers_uncommitted_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(broker, "JOIN_DELAY", 0)
+    file_broker = FileBroker(str(tmp_path), partitions=4, session_timeout=0.2)
+    sent = make_transactions(200)
+    file_broker.send("transactions", sent)
+
+    first = file_broker.consumer("transactions", "scorers", "a")
+    delivery = first.poll(dtype=str)
+    assert sorted(delivery.rows["transaction_id"]) == sorted(sent["transaction_id"])
+    first.close()  # leaves without committing
+
+    second = file_broker.consumer("transactions", "scorers", "b")
+    delivery = second.poll(dtype=str)
+    assert sorted(delivery.rows["transaction_id"]) == sorted(sent["transaction_id"])
+    second.commit(delivery)
+    assert second.poll(dtype=str) is None
+
+    # Every group sees every row
+    other = file_broker.consumer("transactions", "auditors", "c")
+    assert len(other.poll(dtype=str).rows) == 200
+
+
+def test_open_broker_urls(tmp_path):
+    assert isinstance(broker.open_broker(f"file:{tmp_path}"), FileBroker)
+    assert isinstance(broker.open_broker("redis://localhost:6390"), broker.RedisBroker)
@@ -0,0 +1,44 @@
+import os
+import random
+import signal
+import time
+
+import pandas as pd
+
+from conftest import run_scorer, start_scorer, write_stream
+from synthetic import make_transactions
+
+ROWS = 6000
+KILLS = 3
+BATCH_ROWS = "50"  # Small batches, so each run writes and commits many times before the kill
+
+
+def output_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def test_scorer_killed_at_random_points_scores_every_row_once(scorer_dir):
+    rng = random.Random(0)
+    output = scorer_dir / "data" / "scored_transactions.csv"
+    stream = make_transactions(ROWS, seed=0)
+    chunks = [stream.iloc[i::KILLS + 1] for i in range(KILLS + 1)]
+
+    for chunk in chunks[:-1]:
+        write_stream(scorer_dir, chunk)
+        before = output_size(output)
+        scorer = start_scorer(scorer_dir, "--mode", "poll", "--interval", "0.05", "--max-batch-size", BATCH_ROWS)
+        # Wait out the model load, then kill at a random point while batches are being written
+        deadline = time.monotonic() + 60
+        while output_size(output) <= before and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(rng.uniform(0.0, 0.3))
+        scorer.send_signal(signal.SIGKILL)
+        scorer.wait()
+
+    write_stream(scorer_dir, chunks[-1])
+    run_scorer(scorer_dir)
+
+    scored = pd.read_csv(output)
+    assert not scored["transaction_id"].duplicated().any()
+    assert sorted(scored["transaction_id"]) == sorted(stream["transaction_id"])
+    assert scored["fraud_probability"].notna().all()
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from downsample import downsample, lttb_indices, min_max_indices
+
+
+def timeline(n=10_000):
+    rng = np.random.default_rng(0)
+    frauds = rng.poisson(1, n)
+    frauds[[17, n // 2, n - 3]] = [40, 55, 30]
+    return pd.DataFrame({"time": pd.date_range("2026-01-01", periods=n, freq="min"), "frauds": frauds})
+
+
+def test_min_max_keeps_every_spike_and_both_ends():
+    df = timeline()
+    points = downsample(df, "time", "frauds", width=500, method="minmax")
+    assert len(points) <= 2 * 500 + 2
+    assert {17, 5000, len(df) - 3, 0, len(df) - 1} <= set(points.index)
+    assert points["time"].is_monotonic_increasing
+
+
+def test_lttb_picks_the_requested_number_of_points():
+    df = timeline()
+    indices = lttb_indices(df["time"].to_numpy(), df["frauds"].to_numpy(), 300)
+    assert len(indices) == 300
+    assert indices[0] == 0 and indices[-1] == len(df) - 1
+    assert (np.diff(indices) > 0).all()
+    assert {17, 5000} <= set(indices.tolist())
+
+
+def test_small_series_are_left_alone():
+    df = timeline(100)
+    assert downsample(df, "time", "frauds", width=500) is df
+    assert len(min_max_indices(df["time"].to_numpy(), df["frauds"].to_numpy(), 50)) == 100
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_encoder import FeatureEncoder
+from synthetic import make_transactions
+
+
+def featurize(df):
+    df = df.copy()
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["hour"] = df["timestamp"].dt.hour
+    df["day_of_week"] = df["timestamp"].dt.dayofweek
+    df["amount_log"] = np.log1p(df["amount"])
+    return df
+
+
+def dummies_matrix(df, feature_names):
+    """The original scorer's encoding: get_dummies, then the model's columns (missing ones as 0)."""
+    encoded = pd.get_dummies(df, columns=["transaction_type", "location"], drop_first=True)
+    return encoded.reindex(columns=feature_names, fill_value=0).to_numpy(dtype=np.float32)
+
+
+@pytest.fixture
+def feature_names():
+    # Columns of a model trained like 02_model_trainer.py (first category of each dropped as baseline)
+    train = featurize(make_transactions(2000, seed=1))
+    encoded = pd.get_dummies(train[["amount", "hour", "day_of_week", "amount_log", "transaction_type", "location"]],
+                             columns=["transaction_type", "location"], drop_first=True)
+    return list(encoded.columns)
+
+
+def test_transform_matches_get_dummies(feature_names):
+    df = featurize(make_transactions(5000, seed=2))
+    X = FeatureEncoder(feature_names).transform(df)
+    np.testing.assert_array_equal(X, dummies_matrix(df, feature_names))
+
+
+def test_unknown_categories_encode_as_baseline(feature_names):
+    df = featurize(make_transactions(100, seed=3))
+    df.loc[[0, 1], "location"] = "Atlantis"
+    encoder = FeatureEncoder(feature_names)
+    X = encoder.transform(df)
+    np.testing.assert_array_equal(X, dummies_matrix(df, feature_names))
+    assert encoder.unknown_counts["location"]["Atlantis"] == 2
+
+    with pytest.raises(ValueError):
+        FeatureEncoder(feature_names, handle_unknown="error").transform(df)
+
+
+def test_buffer_is_reused_between_calls(feature_names):
+    encoder = FeatureEncoder(feature_names)
+    first = encoder.transform(featurize(make_transactions(100, seed=4)))
+    kept = first.copy()
+    encoder.transform(featurize(make_transactions(100, seed=5)))
+    # transform returns a view of one buffer: callers keeping a matrix must copy it
+    assert np.shares_memory(first, encoder._buffer)
+    assert not np.array_equal(first, kept)
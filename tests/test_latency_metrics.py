@@ -0,0 +1,44 @@
+import threading
+
+import numpy as np
+
+from latency_metrics import LatencyHistogram, LatencyRecorder
+
+
+def test_percentiles_within_one_percent():
+    values = np.random.default_rng(0).lognormal(mean=2.0, sigma=1.5, size=100_000)
+    histogram = LatencyHistogram()
+    histogram.record(values[:50_000])
+    for value in values[50_000:50_010]:
+        histogram.record(value)
+    histogram.record(values[50_010:])
+    histogram.record([np.nan, np.inf])
+
+    assert histogram.total == len(values)
+    for p in (50, 95, 99):
+        exact = np.percentile(values, p)
+        assert abs(histogram.percentile(p) - exact) / exact < 0.01
+    assert histogram.summary()["max_ms"] == round(values.max(), 3)
+
+
+def test_empty_histogram():
+    assert LatencyHistogram().summary() == {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+
+
+def test_recorder_is_shared_safely_between_threads(tmp_path):
+    recorder = LatencyRecorder()
+    stages = [f"stage{i}" for i in range(2000)]
+
+    def record(offset):
+        for i in range(2000):
+            recorder.record(stages[(i * 4 + offset) % len(stages)], 1.0)
+
+    threads = [threading.Thread(target=record, args=(offset,)) for offset in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        recorder.export(str(tmp_path / "metrics.json"))
+    for thread in threads:
+        thread.join()
+
+    assert sum(stats["count"] for stats in recorder.snapshot().values()) == 8000
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+def rows(n):
+    return pd.DataFrame({"transaction_id": [f"tx-{i}" for i in range(n)]})
+
+
+def test_size_limit_splits_chunks_and_holds_back_their_offset():
+    batcher = MicroBatcher(max_batch_size=100, max_wait_ms=1000)
+    batcher.add(rows(60), offset=600, arrived=0.0)
+    batcher.add(rows(60), offset=1200, arrived=0.0)
+
+    batch = batcher.next_batch(now=0.0)
+    assert (len(batch.rows), batch.trigger, batch.offset) == (100, "size", 600)
+    assert batcher.next_batch(now=0.5) is None
+    batch = batcher.next_batch(now=1.0)
+    assert (len(batch.rows), batch.trigger, batch.offset) == (20, "wait", 1200)
+    assert len(batcher) == 0
+
+
+def test_wait_limit_and_flush():
+    batcher = MicroBatcher(max_batch_size=100, max_wait_ms=200)
+    batcher.add(rows(5), offset=50, arrived=10.0)
+    assert batcher.time_until_flush(now=10.05) == pytest.approx(0.15)
+    assert batcher.next_batch(now=10.1) is None
+    batch = batcher.next_batch(now=10.1, force=True)
+    assert (len(batch.rows), batch.trigger, batch.offset) == (5, "flush", 50)
+
+
+def test_empty_reads_only_advance_the_offset():
+    batcher = MicroBatcher()
+    batcher.add(rows(0), offset=300, arrived=0.0)
+    batch = batcher.next_batch(now=0.0)
+    assert batch.rows.empty and batch.offset == 300
+
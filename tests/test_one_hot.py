@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+from one_hot import decode_one_hot
+
+
+def test_decode_matches_a_row_scan():
+    df = pd.DataFrame({
+        "amount": [1.0, 2.0, 3.0, 4.0, 5.0],
+        "location_Delhi": [1, 0, 0, np.nan, True],
+        "location_Mumbai": [0, 1.0, 0, np.nan, True],
+        "location_Pune": [False, False, False, np.nan, False],
+    })
+    assert decode_one_hot(df, "location_").tolist() == ["Delhi", "Mumbai", "UNKNOWN", "UNKNOWN", "Delhi"]
+
+
+def test_missing_block_gives_the_default():
+    df = pd.DataFrame({"amount": [1.0, 2.0]})
+    assert decode_one_hot(df, "transaction_type_", default="N/A").tolist() == ["N/A", "N/A"]
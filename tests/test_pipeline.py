@@ -0,0 +1,22 @@
+import shutil
+
+import pandas as pd
+
+from conftest import run_scorer, write_stream
+
+COLUMNS = ["transaction_id", "fraud_probability", "fraud_prediction", "model_version"]
+
+
+def test_pipeline_scores_like_sequential(scorer_dir, tmp_path_factory):
+    write_stream(scorer_dir, 6000)
+    pipeline_dir = tmp_path_factory.mktemp("pipeline")
+    shutil.copytree(scorer_dir, pipeline_dir, dirs_exist_ok=True)
+
+    # Small batches keep several in flight at once in the pipeline
+    run_scorer(scorer_dir, "--max-batch-size", "500")
+    run_scorer(pipeline_dir, "--pipeline", "--max-batch-size", "500")
+
+    sequential = pd.read_csv(scorer_dir / "data" / "scored_transactions.csv")
+    pipelined = pd.read_csv(pipeline_dir / "data" / "scored_transactions.csv")
+    assert len(sequential) == 6000
+    pd.testing.assert_frame_equal(sequential[COLUMNS], pipelined[COLUMNS])
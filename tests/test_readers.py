@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+
+import arrow_feed
+from synthetic import make_transactions
+from stream_reader import CachedCsvReader, ChunkedFrame
+
+
+def scored(rows, seed):
+    return make_transactions(rows, seed=seed).drop(columns=["is_fraud"]).assign(
+        fraud_prediction=0, model_version="legacy")
+
+
+def test_cached_csv_reader_rereads_a_file_rewritten_past_its_position(tmp_path):
+    path = tmp_path / "scored.csv"
+    committed, uncommitted = scored(50, 1), scored(20, 2)
+    committed.to_csv(path, index=False)
+    size = os.path.getsize(path)
+    uncommitted.to_csv(path, mode="a", header=False, index=False)
+    reader = CachedCsvReader(str(path))
+    assert len(reader.read_pandas()) == 70
+
+    # Recovery drops the uncommitted rows, then longer rows are appended before the next read
+    os.truncate(path, size)
+    replacement = scored(40, 3)
+    replacement.to_csv(path, mode="a", header=False, index=False)
+    df = reader.read_pandas()
+    assert df["transaction_id"].tolist() == committed["transaction_id"].tolist() + replacement["transaction_id"].tolist()
+
+
+def test_arrow_feed_reader_rereads_a_feed_rewritten_past_its_offset(tmp_path):
+    path = str(tmp_path / "feed.arrows")
+    committed = scored(50, 1)
+    size = arrow_feed.append_batch(path, committed)
+    arrow_feed.append_batch(path, scored(20, 2))
+    reader = arrow_feed.ArrowFeedReader(path)
+    assert len(reader.read_pandas()) == 70
+
+    os.truncate(path, size)
+    replacement = scored(40, 3)
+    arrow_feed.append_batch(path, replacement)
+    df = reader.read_pandas()
+    assert df["transaction_id"].tolist() == committed["transaction_id"].tolist() + replacement["transaction_id"].tolist()
+    assert reader.generation == 2
+
+
+def test_readers_return_only_rows_appended_since(tmp_path):
+    csv_path, feed_path = tmp_path / "scored.csv", str(tmp_path / "feed.arrows")
+    first, second, third = scored(30, 1), scored(5, 2), scored(7, 3)
+    first.to_csv(csv_path, index=False)
+    arrow_feed.append_batch(feed_path, first)
+    readers = [CachedCsvReader(str(csv_path)), arrow_feed.ArrowFeedReader(feed_path)]
+    known = [reader.read_since(None, 0) for reader in readers]
+    assert [rows for _, rows, _ in known] == [30, 30]
+
+    for batch in (second, third):
+        batch.to_csv(csv_path, mode="a", header=False, index=False)
+        arrow_feed.append_batch(feed_path, batch)
+    for reader, (generation, rows, _) in zip(readers, known):
+        new_generation, total, new = reader.read_since(generation, rows)
+        assert (new_generation, total) == (generation, 42)
+        assert new["transaction_id"].tolist() == second["transaction_id"].tolist() + third["transaction_id"].tolist()
+        assert reader.read_since(generation, total)[2].empty
+        assert reader.read_pandas()["transaction_id"].tolist() == pd.concat([first, second, third])["transaction_id"].tolist()
+        # A stale generation gets every row back
+        assert len(reader.read_since(generation - 1, rows)[2]) == 42
+
+
+def test_chunked_frame_keeps_few_chunks():
+    frame = ChunkedFrame()
+    for i in range(1000):
+        frame.append(pd.DataFrame({"n": [i]}))
+    assert len(frame) == 1000 and len(frame.chunks) <= 12
+    assert frame.since(990)["n"].tolist() == list(range(990, 1000))
+    assert frame.frame()["n"].tolist() == list(range(1000))
@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+import rollup_store
+
+
+def scored(processed_times, fraud=0, location="Delhi"):
+    return pd.DataFrame({
+        "timestamp": processed_times, "processed_time": processed_times, "transaction_type": "UPI",
+        "location": location, "amount": 100.0, "fraud_prediction": fraud,
+    })
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = rollup_store.connect(str(tmp_path / "rollups.db"))
+    yield conn
+    conn.close()
+
+
+def test_window_is_covered_exactly_across_grains(conn, tmp_path):
+    path = str(tmp_path / "rollups.db")
+    times = pd.date_range("2026-01-01 22:10", "2026-01-03 04:50", freq="7min")
+    rollup_store.apply_batch(conn, scored(times.strftime("%Y-%m-%d %H:%M:%S")), "scored", 1)
+
+    for start in ["2026-01-01 22:30:15", "2026-01-02 00:00", "2026-01-02 23:59", "2026-01-03 04:00"]:
+        expected = (times >= pd.Timestamp(start).ceil("min")).sum()
+        assert rollup_store.total(path, pd.Timestamp(start)) == expected
+    assert rollup_store.total(path) == len(times)
+    by_minute = rollup_store.query(path, start=times[-5], grain="minute")
+    assert by_minute["transactions"].tolist() == [1] * 5
+
+
+def test_uncommitted_batch_is_undone(conn, tmp_path):
+    path = str(tmp_path / "rollups.db")
+    rollup_store.apply_batch(conn, scored(["2026-01-01 10:00:00"] * 3, fraud=1), "scored", 1)
+    rollup_store.apply_batch(conn, scored(["2026-01-01 10:00:30"] * 2, location="Pune"), "scored", 2)
+
+    assert not rollup_store.undo_after(conn, "scored", 2)
+    assert rollup_store.undo_after(conn, "scored", 1)
+    by_location = rollup_store.query(path, by=["location"])
+    assert by_location.to_dict("records") == [
+        {"location": "Delhi", "transactions": 3, "frauds": 3, "amount": 300.0, "fraud_amount": 300.0}]
+    assert rollup_store.applied_batch(conn, "scored") == 1
+
+
+def test_rebuild_replaces_one_writer(conn, tmp_path):
+    path = str(tmp_path / "rollups.db")
+    rollup_store.apply_batch(conn, scored(["2026-01-01 10:00:00"] * 3), "a", 1)
+    rollup_store.apply_batch(conn, scored(["2026-01-01 10:00:00"] * 4), "b", 1)
+    rollup_store.rebuild(conn, "a", [scored(["2026-01-01 11:00:00"]), scored(["bad time"])], 7)
+    assert rollup_store.total(path) == 5
+    assert rollup_store.applied_batch(conn, "a") == 7
+
+
+def test_range_with_end_is_covered_exactly(conn, tmp_path):
+    path = str(tmp_path / "rollups.db")
+    times = pd.date_range("2026-01-01 22:10", "2026-01-04 04:50", freq="7min")
+    rollup_store.apply_batch(conn, scored(times.strftime("%Y-%m-%d %H:%M:%S")), "scored", 1)
+
+    for start, end in [("2026-01-01 22:30:15", "2026-01-04 03:20:30"), ("2026-01-02 10:05", "2026-01-02 10:40"),
+                       ("2026-01-02 22:59", "2026-01-03 01:01"), (None, "2026-01-03 04:00"), ("2026-01-03 05:00", "2026-01-03 05:00")]:
+        in_range = times < pd.Timestamp(end).floor("min")
+        if start is not None:
+            in_range &= times >= pd.Timestamp(start).ceil("min")
+        assert rollup_store.total(path, start and pd.Timestamp(start), pd.Timestamp(end)) == in_range.sum()
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+import scored_index
+from scored_index import ScoredIdIndex
+
+
+def ids(start, stop):
+    return pd.Series([f"tx-{i}" for i in range(start, stop)])
+
+
+def test_lookup_across_pending_log_and_sorted_run(tmp_path):
+    index = ScoredIdIndex(str(tmp_path), merge_threshold=1000)
+    index.add(ids(0, 1500))  # merged into the sorted run
+    index.add(ids(1500, 1800))  # still in the pending log
+    assert len(index) == 1800
+    assert index.contains(ids(0, 1800)).all()
+    assert not index.contains(ids(1800, 2500)).any()
+
+
+def test_merge_in_chunks_keeps_the_run_sorted(tmp_path, monkeypatch):
+    monkeypatch.setattr(scored_index, "MERGE_CHUNK", 64)
+    index = ScoredIdIndex(str(tmp_path), merge_threshold=10**9)
+    for start in range(0, 1000, 250):
+        index.add(ids(start, start + 250))
+        index.merge()
+    run = np.fromfile(index.sorted_path, dtype=scored_index.KEY_DTYPE)
+    assert len(run) == 1000
+    assert (run[1:] > run[:-1]).all()
+    assert index.contains(ids(0, 1000)).all()
+
+
+def test_reopen_and_truncate_roll_back_pending_keys(tmp_path):
+    index = ScoredIdIndex(str(tmp_path), auto_merge=False)
+    index.add(ids(0, 100))
+    index.merge()
+    index.add(ids(100, 150), sync=True)
+    committed = index.size_on_disk
+
+    index.add(ids(150, 200))
+    reopened = ScoredIdIndex(str(tmp_path), auto_merge=False)
+    assert reopened.contains(ids(0, 200)).all()
+    assert reopened.truncate(committed)
+    assert reopened.contains(ids(0, 150)).all()
+    assert not reopened.contains(ids(150, 200)).any()
+    # Keys already merged into the sorted run can't be rolled back
+    assert not reopened.truncate(50)
+
+
+def test_rebuild_replaces_the_contents(tmp_path):
+    index = ScoredIdIndex(str(tmp_path), merge_threshold=100)
+    index.add(ids(0, 10))
+    index.rebuild([ids(500, 600), pd.Series(["tx-700", None])])
+    assert not index.contains(ids(0, 10)).any()
+    assert index.contains(ids(500, 600)).all() and index.contains(["tx-700"]).all()
+    assert len(index) == 101
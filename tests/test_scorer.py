@@ -0,0 +1,39 @@
+import pandas as pd
+
+from conftest import run_scorer, write_stream
+from synthetic import make_transactions
+
+
+def test_rows_with_unparseable_timestamps_are_scored(scorer_dir):
+    df = make_transactions(200)
+    df.loc[[3, 50], "timestamp"] = "not a time"
+    write_stream(scorer_dir, df)
+
+    output = run_scorer(scorer_dir)
+
+    scored = pd.read_csv(scorer_dir / "data" / "scored_transactions.csv")
+    assert sorted(scored["transaction_id"]) == sorted(df["transaction_id"])
+    assert scored["timestamp"].isna().sum() == 2
+    assert "2 rows have a missing or unparseable timestamp" in output
+
+
+def test_segments_are_read_even_with_a_leftover_single_file(scorer_dir):
+    # A stream file left by an older simulator, before the new one has written any segment
+    make_transactions(50, seed=1).to_csv(scorer_dir / "data" / "realtime_stream.csv", index=False)
+    output = run_scorer(scorer_dir)
+    assert "Ignoring data/realtime_stream.csv" in output
+    assert not (scorer_dir / "data" / "scored_transactions.csv").exists() or \
+        pd.read_csv(scorer_dir / "data" / "scored_transactions.csv").empty
+
+    df = write_stream(scorer_dir, 100, seed=2)
+    run_scorer(scorer_dir)
+    scored = pd.read_csv(scorer_dir / "data" / "scored_transactions.csv")
+    assert sorted(scored["transaction_id"]) == sorted(df["transaction_id"])
+
+
+def test_legacy_stream_flag_reads_the_single_file(scorer_dir):
+    df = make_transactions(100, seed=3)
+    df.to_csv(scorer_dir / "data" / "realtime_stream.csv", index=False)
+    run_scorer(scorer_dir, "--legacy-stream")
+    scored = pd.read_csv(scorer_dir / "data" / "scored_transactions.csv")
+    assert sorted(scored["transaction_id"]) == sorted(df["transaction_id"])
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+import sqlite_store
+
+
+def scored(ids, processed_time="2026-01-01 10:00:00", sender="A", receiver="B", fraud=0, timestamp="2026-01-01 09:00:00"):
+    return pd.DataFrame({
+        "transaction_id": ids, "timestamp": pd.Timestamp(timestamp), "processed_time": pd.Timestamp(processed_time),
+        "sender_account": sender, "receiver_account": receiver, "amount": 100.0, "transaction_type": "UPI",
+        "location": "Delhi", "fraud_prediction": fraud, "fraud_probability": 0.5, "model_version": "v1",
+    })
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "scored.db")
+    conn = sqlite_store.connect(path)
+    yield path, conn
+    conn.close()
+
+
+def test_rows_after_follows_inserts(db):
+    path, conn = db
+    sqlite_store.insert_batch(conn, scored(["t1", "t2"]), "scored", 1)
+    rows, last = sqlite_store.rows_after(path, 0)
+    assert rows["transaction_id"].tolist() == ["t1", "t2"]
+
+    sqlite_store.insert_batch(conn, scored(["t3"], processed_time="2026-01-01 09:59:00"), "scored", 2)
+    rows, last = sqlite_store.rows_after(path, last)
+    assert rows["transaction_id"].tolist() == ["t3"]
+    rows, same = sqlite_store.rows_after(path, last)
+    assert rows.empty and same == last
+
+    rows, _ = sqlite_store.rows_after(path, 0, processed_since="2026-01-01 10:00:00")
+    assert rows["transaction_id"].tolist() == ["t1", "t2"]
+
+
+def test_deleting_rows_bumps_generation(db):
+    path, conn = db
+    sqlite_store.insert_batch(conn, scored(["t1"]), "scored", 1)
+    sqlite_store.insert_batch(conn, scored(["t2"]), "scored", 2)
+    before = sqlite_store.generation(path)
+    assert sqlite_store.delete_after(conn, "scored", 2) == 0
+    assert sqlite_store.generation(path) == before
+    assert sqlite_store.delete_after(conn, "scored", 1) == 1
+    assert sqlite_store.generation(path) == before + 1
+
+
+def test_query_filters(db):
+    path, conn = db
+    sqlite_store.insert_batch(conn, scored(["t1"], receiver="C", fraud=1), "scored", 1)
+    sqlite_store.insert_batch(conn, scored(["t2"], timestamp="2026-01-01 11:30:00", fraud=1,
+                                           processed_time="2026-01-01 11:31:00"), "scored", 2)
+    sqlite_store.insert_batch(conn, scored(["t3"], sender="D"), "scored", 3)
+
+    assert sqlite_store.query(path, receiver_account="C")["transaction_id"].tolist() == ["t1"]
+    assert sqlite_store.query(path, hour=11)["transaction_id"].tolist() == ["t2"]
+    newest = sqlite_store.query(path, fraud_only=True, limit=1, sender_account="A")
+    assert newest["transaction_id"].tolist() == ["t2"]
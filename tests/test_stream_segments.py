@@ -0,0 +1,35 @@
+import os
+
+from checkpoint import save_checkpoint
+from stream_segments import committed_offset
+
+STREAM = "data/stream_segments"
+
+
+def write_checkpoint(path, offset, mtime, **layout):
+    save_checkpoint(str(path), {"input_file": STREAM, "input_offset": offset, **layout})
+    os.utime(path, (mtime, mtime))
+
+
+def test_committed_offset_is_the_slowest_shard(tmp_path):
+    for shard, offset in enumerate([700, 500, 900]):
+        write_checkpoint(tmp_path / f"scorer_checkpoint-shard{shard:02d}of03.json", offset, 1000 + shard,
+                         shard=shard, num_shards=3)
+    assert committed_offset(STREAM, str(tmp_path / "scorer_checkpoint*.json")) == 500
+
+
+def test_committed_offset_ignores_stale_shard_layouts(tmp_path):
+    # Left over from an earlier --workers 2 run, which stopped at offset 500
+    for shard in range(2):
+        write_checkpoint(tmp_path / f"scorer_checkpoint-shard{shard:02d}of02.json", 500, 1000,
+                         shard=shard, num_shards=2)
+    write_checkpoint(tmp_path / "scorer_checkpoint.json", 2000, 2000, shard=0, num_shards=1)
+    assert committed_offset(STREAM, str(tmp_path / "scorer_checkpoint*.json")) == 2000
+
+
+def test_committed_offset_treats_old_checkpoints_as_unsharded(tmp_path):
+    write_checkpoint(tmp_path / "scorer_checkpoint.json", 300, 1000)
+    write_checkpoint(tmp_path / "scorer_checkpoint-other.json", 100, 900, shard=0, num_shards=1)
+    save_checkpoint(str(tmp_path / "scorer_checkpoint-elsewhere.json"), {"input_file": "other", "input_offset": 0})
+    assert committed_offset(STREAM, str(tmp_path / "scorer_checkpoint*.json")) == 100
+    assert committed_offset("missing", str(tmp_path / "scorer_checkpoint*.json")) is None
@@ -0,0 +1,121 @@
+"""Check that scorer workers sharing a broker consumer group score every row after one dies.
+
+For the file broker and for the Redis broker (against tools/resp_standin.py),
+in a scratch directory:
+  1. sends a first half of synthetic transactions to the transactions topic
+  2. starts two `03_processor_scorer.py --broker ...` workers in one group
+  3. SIGKILLs one of them, then sends the second half
+  4. waits for the survivor to take over the dead worker's partitions or
+     unacknowledged entries, and reads back the scored topic
+
+Every sent transaction_id must come back scored. Repeats are allowed
+(delivery is at least once) and counted.
+
+Usage: python tools/broker_check.py [--rows 4000] [--brokers file redis] [--timeout 120]
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+from synthetic import make_transactions
+
+SCORER = os.path.join(REPO_DIR, "03_processor_scorer.py")
+STANDIN = os.path.join(REPO_DIR, "tools", "resp_standin.py")
+SESSION_TIMEOUT = "3"  # Short, so the dead worker's share moves quickly
+SEND_BATCH = 100
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start(workdir, *args):
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, PYTHONWARNINGS="ignore", BROKER_SESSION_TIMEOUT=SESSION_TIMEOUT)
+    return subprocess.Popen([sys.executable, *args], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def send(broker_module, url, df):
+    producer = broker_module.open_broker(url)
+    for start_row in range(0, len(df), SEND_BATCH):
+        producer.send(broker_module.TRANSACTIONS_TOPIC, df.iloc[start_row:start_row + SEND_BATCH])
+
+
+def scored_ids(consumer):
+    """Drain the scored topic into a list of transaction_ids (repeats included)."""
+    ids = []
+    while (delivery := consumer.poll(dtype=str)) is not None:
+        ids += delivery.rows["transaction_id"].tolist()
+        consumer.commit(delivery)
+    return ids
+
+
+def check(kind, rows, timeout):
+    os.environ["BROKER_SESSION_TIMEOUT"] = SESSION_TIMEOUT
+    import broker as broker_module
+    with tempfile.TemporaryDirectory() as workdir:
+        os.symlink(os.path.join(REPO_DIR, "xgboost_fraud_model.joblib"), os.path.join(workdir, "xgboost_fraud_model.joblib"))
+        os.makedirs(os.path.join(workdir, "data"))
+        standin = None
+        if kind == "redis":
+            port = free_port()
+            url = f"redis://127.0.0.1:{port}"
+            standin = start(workdir, STANDIN, "--port", str(port))
+            time.sleep(1.0)
+        else:
+            url = "file:" + os.path.join(workdir, "data", "broker")
+
+        df = make_transactions(rows)
+        half = rows // 2
+        send(broker_module, url, df.iloc[:half])
+        workers = [start(workdir, SCORER, "--broker", url, "--consumer", f"worker-{i}", "--interval", "0.2")
+                   for i in range(2)]
+        reader = broker_module.open_broker(url).consumer(broker_module.SCORED_TOPIC, "check", "checker")
+        seen = []
+        # Kill one worker once both are scoring
+        deadline = time.monotonic() + timeout
+        while len(set(seen)) < half // 4 and time.monotonic() < deadline:
+            time.sleep(0.5)
+            seen += scored_ids(reader)
+        workers[0].send_signal(signal.SIGKILL)
+        workers[0].wait()
+        send(broker_module, url, df.iloc[half:])
+
+        expected = set(df["transaction_id"])
+        while not expected <= set(seen) and time.monotonic() < deadline:
+            time.sleep(0.5)
+            seen += scored_ids(reader)
+        for process in workers[1:] + ([standin] if standin else []):
+            process.terminate()
+            process.wait()
+
+    missing = len(expected - set(seen))
+    repeats = len(seen) - len(set(seen))
+    status = "✅" if not missing else "❌"
+    print(f"{status} {kind}: sent {rows:,}, scored {len(set(seen) & expected):,}, missing {missing:,}, "
+          f"scored twice {repeats:,}")
+    return not missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=4000)
+    parser.add_argument("--brokers", nargs="+", choices=["file", "redis"], default=["file", "redis"])
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for all rows to be scored")
+    args = parser.parse_args()
+    ok = all([check(kind, args.rows, args.timeout) for kind in args.brokers])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
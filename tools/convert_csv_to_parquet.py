@@ -0,0 +1,58 @@
+"""Convert scored transaction CSV files to the hourly-partitioned Parquet layout.
+
+Reads each CSV in chunks and writes typed part files under
+data/scored_parquet/date=YYYY-MM-DD/hour=HH/, the layout written by
+`03_processor_scorer.py --backend parquet` and read by the dashboard.
+The CSV files are left in place; the dashboard drops duplicate IDs, and
+the scorer indexes both formats, so nothing is scored twice.
+
+Usage: python tools/convert_csv_to_parquet.py [CSV ...] [--output data/scored_parquet]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parquet_store
+import transaction_schema
+
+DEFAULT_INPUTS = ["data/scored_transactions.csv", "data/scored_shards/*.csv"]
+
+
+def convert(path, output_dir, chunksize):
+    rows = 0
+    name = os.path.splitext(os.path.basename(path))[0]
+    chunks = pd.read_csv(path, chunksize=chunksize, **transaction_schema.read_options(chunked=True))
+    for i, chunk in enumerate(chunks):
+        # Part names are stable, so re-running a conversion overwrites instead of duplicating
+        parquet_store.write_partitioned(chunk, output_dir, f"converted-{name}-{i:06d}")
+        rows += len(chunk)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help="CSV files or glob patterns")
+    parser.add_argument("--output", default=parquet_store.PARQUET_DIR)
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    if not paths:
+        print("⚠️ No CSV files to convert.")
+        return
+    for path in paths:
+        start = time.perf_counter()
+        rows = convert(path, args.output, args.chunksize)
+        before = os.path.getsize(path)
+        print(f"✅ {path}: {rows:,} rows in {time.perf_counter() - start:.1f}s ({before / 1e6:,.1f} MB CSV)")
+    after = sum(os.path.getsize(f) for f in parquet_store.part_files(args.output))
+    print(f"📦 {args.output} now holds {after / 1e6:,.1f} MB of Parquet")
+
+
+if __name__ == "__main__":
+    main()
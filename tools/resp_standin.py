@@ -0,0 +1,231 @@
+"""In-memory stand-in for the Redis stream commands used by broker.RedisBroker.
+
+Speaks RESP2 and implements PING, XADD, XLEN, XGROUP CREATE, XREADGROUP,
+XACK, XPENDING (summary form), XAUTOCLAIM and FLUSHALL with Redis
+semantics, so RedisBroker (and tools/broker_check.py) can be exercised
+without a Redis server. Nothing is persisted; this is for local testing,
+not a replacement for Redis.
+
+Usage: python tools/resp_standin.py [--host 127.0.0.1] [--port 6379]
+"""
+import argparse
+import asyncio
+import time
+
+
+class RespError(Exception):
+    pass
+
+
+def parse_id(value):
+    ms, _, seq = value.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def format_id(entry_id):
+    return f"{entry_id[0]}-{entry_id[1]}"
+
+
+class Stream:
+    def __init__(self):
+        self.entries = []  # [(id, [field, value, ...])], ids increasing
+        self.last_id = (0, 0)
+        self.groups = {}  # name → {"last": id, "pending": {id: [consumer, delivered_ms, deliveries]}}
+
+    def add(self, fields):
+        ms = int(time.time() * 1000)
+        # Like Redis: a new millisecond starts at sequence 0, the same (or a skewed) one counts up
+        entry_id = (ms, 0) if ms > self.last_id[0] else (self.last_id[0], self.last_id[1] + 1)
+        self.entries.append((entry_id, fields))
+        self.last_id = entry_id
+        return entry_id
+
+    def get(self, entry_id):
+        for candidate, fields in self.entries:
+            if candidate == entry_id:
+                return fields
+        return None
+
+
+class Store:
+    def __init__(self):
+        self.streams = {}
+
+    def stream(self, key, create=False):
+        if key not in self.streams:
+            if not create:
+                raise RespError("ERR no such key")
+            self.streams[key] = Stream()
+        return self.streams[key]
+
+    def group(self, key, name):
+        stream = self.stream(key)
+        if name not in stream.groups:
+            raise RespError(f"NOGROUP No such key '{key}' or consumer group '{name}'")
+        return stream.groups[name]
+
+    def execute(self, args):
+        command = args[0].upper()
+        handler = getattr(self, "cmd_" + command.lower(), None)
+        if handler is None:
+            raise RespError(f"ERR unknown command '{command}'")
+        return handler(*args[1:])
+
+    def cmd_ping(self, *args):
+        return ("+", "PONG")
+
+    def cmd_flushall(self, *args):
+        self.streams.clear()
+        return ("+", "OK")
+
+    def cmd_xadd(self, key, entry_id, *fields):
+        if entry_id != "*":
+            raise RespError("ERR only auto-generated IDs are supported")
+        return format_id(self.stream(key, create=True).add(list(fields)))
+
+    def cmd_xlen(self, key):
+        return len(self.streams[key].entries) if key in self.streams else 0
+
+    def cmd_xgroup(self, subcommand, key, group, start, *options):
+        if subcommand.upper() != "CREATE":
+            raise RespError("ERR only XGROUP CREATE is supported")
+        stream = self.stream(key, create="MKSTREAM" in (o.upper() for o in options))
+        if group in stream.groups:
+            raise RespError("BUSYGROUP Consumer Group name already exists")
+        last = stream.last_id if start == "$" else parse_id(start)
+        stream.groups[group] = {"last": last, "pending": {}}
+        return ("+", "OK")
+
+    def cmd_xreadgroup(self, *args):
+        upper = [a.upper() for a in args]
+        group_name, consumer = args[upper.index("GROUP") + 1], args[upper.index("GROUP") + 2]
+        count = int(args[upper.index("COUNT") + 1]) if "COUNT" in upper else None
+        streams_at = upper.index("STREAMS")
+        keys_and_ids = args[streams_at + 1:]
+        half = len(keys_and_ids) // 2
+        reply = []
+        now = int(time.time() * 1000)
+        for key, start in zip(keys_and_ids[:half], keys_and_ids[half:]):
+            group = self.group(key, group_name)
+            stream = self.streams[key]
+            if start != ">":
+                # Re-read this consumer's own pending entries
+                after = parse_id(start)
+                ids = sorted(i for i, p in group["pending"].items() if p[0] == consumer and i > after)
+                entries = [(i, stream.get(i)) for i in ids[:count]]
+            else:
+                entries = [(i, f) for i, f in stream.entries if i > group["last"]][:count]
+                for entry_id, _ in entries:
+                    group["pending"][entry_id] = [consumer, now, 1]
+                if entries:
+                    group["last"] = entries[-1][0]
+            if entries:
+                reply.append([key, [[format_id(i), f] for i, f in entries]])
+        return reply or None
+
+    def cmd_xack(self, key, group_name, *ids):
+        group = self.group(key, group_name)
+        acked = 0
+        for entry_id in ids:
+            if group["pending"].pop(parse_id(entry_id), None) is not None:
+                acked += 1
+        return acked
+
+    def cmd_xpending(self, key, group_name):
+        pending = self.group(key, group_name)["pending"]
+        if not pending:
+            return [0, None, None, None]
+        consumers = {}
+        for owner, _, _ in pending.values():
+            consumers[owner] = consumers.get(owner, 0) + 1
+        ids = sorted(pending)
+        return [len(pending), format_id(ids[0]), format_id(ids[-1]),
+                [[owner, str(n)] for owner, n in sorted(consumers.items())]]
+
+    def cmd_xautoclaim(self, key, group_name, consumer, min_idle, start, *options):
+        upper = [o.upper() for o in options]
+        count = int(options[upper.index("COUNT") + 1]) if "COUNT" in upper else 100
+        group = self.group(key, group_name)
+        stream = self.streams[key]
+        now = int(time.time() * 1000)
+        claimed, deleted = [], []
+        ids = sorted(i for i in group["pending"] if i >= parse_id(start))
+        for entry_id in ids:
+            if len(claimed) + len(deleted) >= count:
+                break
+            owner, delivered, deliveries = group["pending"][entry_id]
+            if now - delivered < int(min_idle):
+                continue
+            fields = stream.get(entry_id)
+            if fields is None:
+                del group["pending"][entry_id]
+                deleted.append(format_id(entry_id))
+                continue
+            group["pending"][entry_id] = [consumer, now, deliveries + 1]
+            claimed.append([format_id(entry_id), fields])
+        return ["0-0", claimed, deleted]
+
+
+def encode(value):
+    if isinstance(value, tuple):
+        return f"{value[0]}{value[1]}\r\n".encode()
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode(v) for v in value)
+    data = value if isinstance(value, bytes) else str(value).encode("utf-8")
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+async def read_command(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.decode().split()  # Inline command, e.g. from telnet
+    args = []
+    for _ in range(int(line[1:-2])):
+        length = int((await reader.readline())[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2].decode("utf-8"))
+    return args
+
+
+async def serve(host, port):
+    store = Store()
+
+    async def handle(reader, writer):
+        try:
+            while (args := await read_command(reader)) is not None:
+                if not args:
+                    continue
+                try:
+                    reply = encode(store.execute(args))
+                except RespError as e:
+                    reply = f"-{e}\r\n".encode()
+                except (TypeError, ValueError, IndexError) as e:
+                    reply = f"-ERR {e}\r\n".encode()
+                writer.write(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"🧪 RESP stand-in listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
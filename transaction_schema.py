@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"  # Written with milliseconds (the last 3 digits of %f are dropped)
+TIME_FORMAT_SECONDS = "%Y-%m-%d %H:%M:%S"  # Rows written before millisecond timestamps
+
+STRING_COLUMNS = ["transaction_id", "sender_account", "receiver_account", "transaction_type", "location", "model_version"]
+FLOAT_COLUMNS = ["amount", "fraud_probability"]
+FLAG_COLUMNS = ["is_fraud", "fraud_prediction"]
+TIME_COLUMNS = ["timestamp", "processed_time"]
+
+# "pyarrow" switches whole-file reads to Arrow's multithreaded CSV parser
+CSV_ENGINE = os.environ.get("CSV_ENGINE", "c")
+
+
+def csv_engine(chunked=False):
+    """The configured engine, or the C parser for chunked reads (pyarrow can't chunk)."""
+    if CSV_ENGINE == "pyarrow" and not chunked:
+        try:
+            import pyarrow  # noqa: F401
+            return "pyarrow"
+        except ImportError:
+            pass
+    return "c"
+
+
+def read_options(chunked=False):
+    """read_csv keyword arguments for transaction files.
+
+    IDs and categories are read straight into string columns; numbers are
+    left to the parser's native float/int conversion.
+    """
+    options = {"dtype": {col: "str" for col in STRING_COLUMNS}, "engine": csv_engine(chunked)}
+    if options["engine"] == "c":
+        options["low_memory"] = False
+    return options
+
+
+def parse_timestamps(values):
+    """Parse timestamps written with or without milliseconds (unparseable values become NaT)."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    # Both TIME_FORMAT and TIME_FORMAT_SECONDS are ISO 8601, which pandas parses on a
+    # vectorized fast path (several times faster than an explicit strptime format)
+    return pd.to_datetime(values, format="ISO8601", errors="coerce")
+
+
+def format_timestamps(values):
+    return values.dt.strftime(TIME_FORMAT).str[:-3]
+
+
+def format_timestamp(value):
+    return value.strftime(TIME_FORMAT)[:-3]
+
+
+def apply_schema(df):
+    """Coerce the known columns of ``df`` to their types. Columns already typed are left alone."""
+    for col in STRING_COLUMNS:
+        if col in df.columns and not pd.api.types.is_string_dtype(df[col]):
+            df[col] = df[col].astype("str")
+    for col in FLOAT_COLUMNS:
+        if col in df.columns and not pd.api.types.is_float_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    for col in FLAG_COLUMNS:
+        if col in df.columns and not pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("int64")
+    for col in TIME_COLUMNS:
+        if col in df.columns:
+            df[col] = parse_timestamps(df[col])
+    return df
+
+
+def read_csv(source, **read_csv_kwargs):
+    """Read a transaction CSV with the shared dtypes and return it with apply_schema applied."""
+    return apply_schema(pd.read_csv(source, **{**read_options(), **read_csv_kwargs}))